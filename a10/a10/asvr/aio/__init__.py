@@ -0,0 +1,40 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Asyncio versions of a10.asvr.db.core and of the elements, policies, claims, results and expectedvalues modules.
+
+   Every function has the same name, parameters and return value as its synchronous counterpart but is a
+   coroutine, eg:
+
+       r = await a10.asvr.aio.elements.getElement(i)
+
+   The synchronous function runs on a shared pool of aioworkers threads, set in the [database] section of
+   /etc/a10.conf, so one event loop can have many calls in flight while the database sees no more than
+   aioworkers at a time. This works the same for every storage backend.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+import a10.asvr.db.configuration
+
+executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=a10.asvr.db.configuration.AIOWORKERS, thread_name_prefix="a10aio"
+)
+
+
+def asynchronous(f):
+    """ Returns a coroutine function which runs f on the executor
+
+	:param function f: a synchronous function
+	:return: an async function with the same name, parameters and docstring as f
+	"""
+
+    @functools.wraps(f)
+    async def a(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(f, *args, **kwargs))
+
+    return a
@@ -0,0 +1,17 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The asyncio version of a10.asvr.claims, see a10.asvr.aio"""
+
+import a10.asvr.claims
+
+from a10.asvr.aio import asynchronous
+
+addClaim = asynchronous(a10.asvr.claims.addClaim)
+addClaims = asynchronous(a10.asvr.claims.addClaims)
+getClaim = asynchronous(a10.asvr.claims.getClaim)
+getPayloadItem = asynchronous(a10.asvr.claims.getPayloadItem)
+getClaims = asynchronous(a10.asvr.claims.getClaims)
+getClaimsFull = asynchronous(a10.asvr.claims.getClaimsFull)
+getAssociatedResults = asynchronous(a10.asvr.claims.getAssociatedResults)
@@ -0,0 +1,173 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""The asyncio version of a10.asvr.db.core, see a10.asvr.aio"""
+
+import asyncio
+
+import a10.asvr.db.core
+
+from a10.asvr.aio import asynchronous, executor
+
+#
+# Indexes and Migration
+#
+
+createIndexes = asynchronous(a10.asvr.db.core.createIndexes)
+migrateTimestamps = asynchronous(a10.asvr.db.core.migrateTimestamps)
+migrateResultsLayout = asynchronous(a10.asvr.db.core.migrateResultsLayout)
+
+#
+# Retention and Archive
+#
+
+pruneCollections = asynchronous(a10.asvr.db.core.pruneCollections)
+getArchivedItem = asynchronous(a10.asvr.db.core.getArchivedItem)
+
+#
+# Change Events
+#
+
+
+async def watch(cs, since=None, idle=None):
+    """ An async generator of the changes made to the given collections, see a10.asvr.db.core.watch
+
+	Each change is waited for on one of the executor's threads so idle should be given, otherwise that thread
+	is held until the next change is made.
+
+	:param list cs: the collections, eg: claims
+	:param str since: the token of the last change seen, or None to start with the next change
+	:param float idle: if given an idle event is generated when no change is made for this many seconds
+	"""
+
+    loop = asyncio.get_running_loop()
+    changes = await loop.run_in_executor(
+        executor, a10.asvr.db.core.watch, cs, since, idle
+    )
+    try:
+        while True:
+            c = await loop.run_in_executor(executor, next, changes, None)
+            if c is None:
+                return
+            yield c
+    finally:
+        changes.close()
+
+
+#
+# Generics
+#
+
+getDatabaseStatus = asynchronous(a10.asvr.db.core.getDatabaseStatus)
+getExactDatabaseStatus = asynchronous(a10.asvr.db.core.getExactDatabaseStatus)
+getClientStatistics = asynchronous(a10.asvr.db.core.getClientStatistics)
+
+#
+# Logging
+#
+
+writeLogEntry = asynchronous(a10.asvr.db.core.writeLogEntry)
+newLogEntryKeys = asynchronous(a10.asvr.db.core.newLogEntryKeys)
+writeLogEntries = asynchronous(a10.asvr.db.core.writeLogEntries)
+getLogEntries = asynchronous(a10.asvr.db.core.getLogEntries)
+getLatestLogEntries = asynchronous(a10.asvr.db.core.getLatestLogEntries)
+getLogEntryCount = asynchronous(a10.asvr.db.core.getLogEntryCount)
+
+#
+# Elements
+#
+
+addElement = asynchronous(a10.asvr.db.core.addElement)
+getElement = asynchronous(a10.asvr.db.core.getElement)
+getElementByName = asynchronous(a10.asvr.db.core.getElementByName)
+getElements = asynchronous(a10.asvr.db.core.getElements)
+getElementsFull = asynchronous(a10.asvr.db.core.getElementsFull)
+getElementsByIds = asynchronous(a10.asvr.db.core.getElementsByIds)
+deleteElement = asynchronous(a10.asvr.db.core.deleteElement)
+updateElement = asynchronous(a10.asvr.db.core.updateElement)
+
+#
+# Policies
+#
+
+addPolicy = asynchronous(a10.asvr.db.core.addPolicy)
+getPolicy = asynchronous(a10.asvr.db.core.getPolicy)
+getPolicyByName = asynchronous(a10.asvr.db.core.getPolicyByName)
+getPolicies = asynchronous(a10.asvr.db.core.getPolicies)
+getPoliciesFull = asynchronous(a10.asvr.db.core.getPoliciesFull)
+getPoliciesByIds = asynchronous(a10.asvr.db.core.getPoliciesByIds)
+deletePolicy = asynchronous(a10.asvr.db.core.deletePolicy)
+updatePolicy = asynchronous(a10.asvr.db.core.updatePolicy)
+
+#
+# Hashes
+#
+
+addHash = asynchronous(a10.asvr.db.core.addHash)
+getHash = asynchronous(a10.asvr.db.core.getHash)
+getHashes = asynchronous(a10.asvr.db.core.getHashes)
+getHashesFull = asynchronous(a10.asvr.db.core.getHashesFull)
+
+#
+# Expected Values
+#
+
+addExpectedValue = asynchronous(a10.asvr.db.core.addExpectedValue)
+getExpectedValue = asynchronous(a10.asvr.db.core.getExpectedValue)
+getExpectedValues = asynchronous(a10.asvr.db.core.getExpectedValues)
+getExpectedValuesFull = asynchronous(a10.asvr.db.core.getExpectedValuesFull)
+getExpectedValuesForElement = asynchronous(a10.asvr.db.core.getExpectedValuesForElement)
+getExpectedValuesForPolicy = asynchronous(a10.asvr.db.core.getExpectedValuesForPolicy)
+getExpectedValueForElementAndPolicy = asynchronous(
+    a10.asvr.db.core.getExpectedValueForElementAndPolicy
+)
+deleteExpectedValue = asynchronous(a10.asvr.db.core.deleteExpectedValue)
+updateExpectedValue = asynchronous(a10.asvr.db.core.updateExpectedValue)
+
+#
+# Claims
+#
+
+addClaim = asynchronous(a10.asvr.db.core.addClaim)
+addClaims = asynchronous(a10.asvr.db.core.addClaims)
+getClaim = asynchronous(a10.asvr.db.core.getClaim)
+getClaims = asynchronous(a10.asvr.db.core.getClaims)
+getClaimsFull = asynchronous(a10.asvr.db.core.getClaimsFull)
+getAssociatedResults = asynchronous(a10.asvr.db.core.getAssociatedResults)
+
+#
+# Results
+#
+
+addResult = asynchronous(a10.asvr.db.core.addResult)
+addResults = asynchronous(a10.asvr.db.core.addResults)
+getResult = asynchronous(a10.asvr.db.core.getResult)
+getResults = asynchronous(a10.asvr.db.core.getResults)
+getResultsSince = asynchronous(a10.asvr.db.core.getResultsSince)
+getResultsFull = asynchronous(a10.asvr.db.core.getResultsFull)
+getLatestResultPerElement = asynchronous(a10.asvr.db.core.getLatestResultPerElement)
+getResultCounts = asynchronous(a10.asvr.db.core.getResultCounts)
+getLatestResultCounts = asynchronous(a10.asvr.db.core.getLatestResultCounts)
+getLatestResults = asynchronous(a10.asvr.db.core.getLatestResults)
+getLatestResultsForElementAndPolicy = asynchronous(
+    a10.asvr.db.core.getLatestResultsForElementAndPolicy
+)
+
+#
+# Element Status
+#
+
+updateElementStatus = asynchronous(a10.asvr.db.core.updateElementStatus)
+getElementStatus = asynchronous(a10.asvr.db.core.getElementStatus)
+deleteElementStatus = asynchronous(a10.asvr.db.core.deleteElementStatus)
+rebuildElementStatus = asynchronous(a10.asvr.db.core.rebuildElementStatus)
+
+#
+# Schedule
+#
+
+updateScheduleEntries = asynchronous(a10.asvr.db.core.updateScheduleEntries)
+getScheduleEntries = asynchronous(a10.asvr.db.core.getScheduleEntries)
+getDueScheduleEntries = asynchronous(a10.asvr.db.core.getDueScheduleEntries)
+deleteScheduleEntry = asynchronous(a10.asvr.db.core.deleteScheduleEntry)
@@ -0,0 +1,18 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The asyncio version of a10.asvr.elements, see a10.asvr.aio"""
+
+import a10.asvr.elements
+
+from a10.asvr.aio import asynchronous
+
+addElement = asynchronous(a10.asvr.elements.addElement)
+getElement = asynchronous(a10.asvr.elements.getElement)
+getElementByName = asynchronous(a10.asvr.elements.getElementByName)
+getElements = asynchronous(a10.asvr.elements.getElements)
+getElementsFull = asynchronous(a10.asvr.elements.getElementsFull)
+getElementsByIds = asynchronous(a10.asvr.elements.getElementsByIds)
+updateElement = asynchronous(a10.asvr.elements.updateElement)
+deleteElement = asynchronous(a10.asvr.elements.deleteElement)
@@ -0,0 +1,18 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The asyncio version of a10.asvr.expectedvalues, see a10.asvr.aio"""
+
+import a10.asvr.expectedvalues
+
+from a10.asvr.aio import asynchronous
+
+addExpectedValue = asynchronous(a10.asvr.expectedvalues.addExpectedValue)
+getExpectedValue = asynchronous(a10.asvr.expectedvalues.getExpectedValue)
+getExpectedValuesFull = asynchronous(a10.asvr.expectedvalues.getExpectedValuesFull)
+getExpectedValuesForElement = asynchronous(a10.asvr.expectedvalues.getExpectedValuesForElement)
+getExpectedValuesForPolicy = asynchronous(a10.asvr.expectedvalues.getExpectedValuesForPolicy)
+getExpectedValueForElementAndPolicy = asynchronous(a10.asvr.expectedvalues.getExpectedValueForElementAndPolicy)
+deleteExpectedValue = asynchronous(a10.asvr.expectedvalues.deleteExpectedValue)
+updateExpectedValue = asynchronous(a10.asvr.expectedvalues.updateExpectedValue)
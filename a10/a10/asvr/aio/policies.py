@@ -0,0 +1,18 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The asyncio version of a10.asvr.policies, see a10.asvr.aio"""
+
+import a10.asvr.policies
+
+from a10.asvr.aio import asynchronous
+
+addPolicy = asynchronous(a10.asvr.policies.addPolicy)
+getPolicy = asynchronous(a10.asvr.policies.getPolicy)
+getPolicyByName = asynchronous(a10.asvr.policies.getPolicyByName)
+getPolicies = asynchronous(a10.asvr.policies.getPolicies)
+getPoliciesFull = asynchronous(a10.asvr.policies.getPoliciesFull)
+getPoliciesByIds = asynchronous(a10.asvr.policies.getPoliciesByIds)
+deletePolicy = asynchronous(a10.asvr.policies.deletePolicy)
+updatePolicy = asynchronous(a10.asvr.policies.updatePolicy)
@@ -0,0 +1,19 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The asyncio version of a10.asvr.results, see a10.asvr.aio"""
+
+import a10.asvr.results
+
+from a10.asvr.aio import asynchronous
+
+addResult = asynchronous(a10.asvr.results.addResult)
+addResults = asynchronous(a10.asvr.results.addResults)
+getResult = asynchronous(a10.asvr.results.getResult)
+getResults = asynchronous(a10.asvr.results.getResults)
+getResultsFull = asynchronous(a10.asvr.results.getResultsFull)
+getResultsSince = asynchronous(a10.asvr.results.getResultsSince)
+getLatestResultPerElement = asynchronous(a10.asvr.results.getLatestResultPerElement)
+getLatestResults = asynchronous(a10.asvr.results.getLatestResults)
+getLatestResultsForElementAndPolicy = asynchronous(a10.asvr.results.getLatestResultsForElementAndPolicy)
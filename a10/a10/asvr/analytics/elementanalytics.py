@@ -4,6 +4,7 @@
 
 import a10.structures.timestamps
 import a10.asvr.results
+import a10.asvr.db.core
 
 from collections import Counter
 
@@ -18,12 +19,31 @@ def getResultCounts(e, n=250):
     return Counter(res)
 
 
-def getResultCountsByPolicy(e, p, n=250):
+def getResultCountsPerPolicy(e, since=None, until=None, bucket=None):
     """
-	Returns the counts of result codes for a given element and a given policy
+	Returns the counts of result codes for a given element per policy, and optionally per time bucket.
+	The counting is made by the database so no results are read.
+
+	:params str e: the element id
+	:params float since: only results verified at or after this time, defaults to None meaning all
+	:params float until: only results verified before this time, defaults to None meaning all
+	:params float bucket: size of the time buckets in seconds, defaults to None meaning no buckets, with buckets
+	                      results stored before utilities/Database/migratetimestamps.py was run are not counted
+	:return: entries of policyID, result, bucket and count
+	:rtype: list dict
+	"""
+    return a10.asvr.db.core.getResultCounts(e, since, until, bucket)
 
 
+def getResultCountsByPolicy(e, p, n=250):
+    """
+	Returns the counts of result codes among the latest n results for a given element and a given policy.
+	The counting is made by the database so no results are read.
+
+	:params str e: the element id
+	:params str p: the policy id
+	:params int n: the number of results counted, defaults to 250
+	:return: the count of each result code
+	:rtype: Counter
 	"""
-    rs = a10.asvr.results.getLatestResultsForElementAndPolicy(e, p, n)
-    res = [x["result"] for x in rs]
-    return Counter(res)
+    return Counter(a10.asvr.db.core.getLatestResultCounts(e, p, n))
@@ -2,6 +2,9 @@
 #Licensed under the BSD 3-Clause Clear License.
 #SPDX-License-Identifier: BSD-3-Clear
 
+import concurrent.futures
+import copy
+import time
 
 import a10.structures.constants
 import a10.structures.identity
@@ -14,6 +17,7 @@ import a10.asvr.protocols.protocol_dispatcher
 import a10.asvr.rules.rule_dispatcher
 
 from a10.asvr import elements, policies, expectedvalues, claims, results
+from a10.asvr.db import configuration
 
 
 def attest(e, p, aps):
@@ -49,6 +53,77 @@ def attest(e, p, aps):
         return result
 
 
+def attestMany(requests, max_concurrency=None):
+    """
+    Attests a batch of elements against policies. The trust agents are called concurrently by a bounded pool of threads
+    and the claims obtained are added to the database in one batch. A request which fails does not stop the others.
+
+    :params list requests: dicts of eid (the element's itemid), pid (the policy's itemid) and optionally cps (the additional parameters)
+    :params int max_concurrency: the most trust agents called at the same time, defaults to maxconcurrency in the [attestation] section of /etc/a10.conf
+    :returns: a dict of claims, one ReturnCode per request in the same order with the claim ID on success, and elapsed, the wall time in seconds
+    :rtype: dict
+    """
+
+    started = time.monotonic()
+
+    if max_concurrency is None:
+        max_concurrency = configuration.ATTESTCONCURRENCY
+    max_concurrency = max(1, max_concurrency)
+
+    rcs = [None] * len(requests)
+
+    # The elements and policies of the whole batch in two queries
+    es = elements.getElementsByIds([r.get("eid") for r in requests])
+    ps = policies.getPoliciesByIds([r.get("pid") for r in requests])
+
+    pending = []
+    for (k, r) in enumerate(requests):
+        if r.get("eid") not in es:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.ITEMDOESNOTEXIST,
+                "Element does not exist " + str(r.get("eid")),
+            )
+        elif r.get("pid") not in ps:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.ITEMDOESNOTEXIST,
+                "Policy does not exist " + str(r.get("pid")),
+            )
+        else:
+            pending.append(k)
+
+    def resolve(k):
+        # Copies as requests may share elements and policies, and these end up in the claims
+        r = requests[k]
+        try:
+            return resolvePolicyIntent(
+                copy.deepcopy(es[r["eid"]]),
+                copy.deepcopy(ps[r["pid"]]),
+                r.get("cps", {}),
+            )
+        except Exception as err:
+            return a10.structures.returncode.ReturnCode(
+                a10.structures.constants.GENERALERROR, "General error " + str(err)
+            )
+
+    obtained = []
+    if pending != []:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(pending)),
+            thread_name_prefix="a10attest",
+        ) as pool:
+            for (k, result) in zip(pending, pool.map(resolve, pending)):
+                if result.rc() == a10.structures.constants.PROTOCOLSUCCESS:
+                    obtained.append((k, result.msg()))
+                else:
+                    rcs[k] = result
+
+    added = claims.addClaims([c for (k, c) in obtained])
+    for ((k, c), rc) in zip(obtained, added):
+        rcs[k] = rc
+
+    return {"claims": rcs, "elapsed": time.monotonic() - started}
+
+
 def resolvePolicyIntent(element, policy, additionalparameters):
     """
       The type are STR, STR and DICT (!!! <- dict is really important!!!)
@@ -136,15 +211,70 @@ def resolvePolicyIntent(element, policy, additionalparameters):
         )
 
 
-def verify(cid, rule):
-    # cid is a claim ID
-    # r is a structure of rules   -  this must be a DICT
+def attestAndVerify(e, p, aps, rules):
+    """
+    Attests an element against a policy and verifies the claim with one or more rules. The rules are given the claim
+    obtained rather than reading it back from the database, and their results are added in one batch.
+
+    :params uuid4 e: The item id of the element
+    :params uuid4 p: The item id of the policy
+    :params dict aps: the additional parameters to be used
+    :params list rules: the rules as 2-tuples of rule name and parameters, see verify
+    :returns: a dict of claim, a ReturnCode with the claim ID on success, and results, one ReturnCode per rule in the same order with the result ID on success
+    :rtype: dict
+    """
 
-    # Verify the claim according to rule r
+    element = elements.getElement(e)
+    if element.rc() != a10.structures.constants.SUCCESS:
+        return {"claim": element, "results": []}
+    policy = policies.getPolicy(p)
+    if policy.rc() != a10.structures.constants.SUCCESS:
+        return {"claim": policy, "results": []}
+
+    result = resolvePolicyIntent(element.msg(), policy.msg(), aps)
+    if result.rc() != a10.structures.constants.PROTOCOLSUCCESS:
+        return {"claim": result, "results": []}
+
+    # Adding the claim replaces its large payload items with references to the blob store,
+    # the rules are given the items themselves
+    claim = result.msg()
+    stored = copy.copy(claim)
+    if isinstance(claim["payload"], dict):
+        stored["payload"] = copy.copy(claim["payload"])
+        if isinstance(claim["payload"].get("payload"), dict):
+            stored["payload"]["payload"] = copy.copy(claim["payload"]["payload"])
+
+    addClaimResult = claims.addClaims([stored])[0]
+    if addClaimResult.rc() != a10.structures.constants.SUCCESS:
+        return {"claim": addClaimResult, "results": []}
+    claim["itemid"] = addClaimResult.msg()
+
+    rcs = [None] * len(rules)
+    applied = []
+    for (k, rule) in enumerate(rules):
+        r = applyRule(claim["itemid"], rule, claim)
+        if r.rc() == a10.structures.constants.RULESUCCESS:
+            applied.append((k, r.msg()))
+        else:
+            rcs[k] = r
+
+    added = results.addResults([r for (k, r) in applied])
+    for ((k, r), rc) in zip(applied, added):
+        rcs[k] = rc
+
+    return {"claim": addClaimResult, "results": rcs}
+
+
+def applyRule(cid, rule, claim=None):
+    """
+    Applies a rule to a claim
 
-    # A rule is a 2-tuple  ( rule name, parameters )
-    # Where the parameters is a json document that may be understood by the receiving rule
-    # The claim contains the eid and pid, for example: ("tpm2_firmwareVersion", {} )
+    :params str cid: the claim ID
+    :params tuple rule: the rule name and parameters, see verify
+    :params dict claim: the whole claim if the caller has it, otherwise the rule reads what it needs from the database
+    :returns: the result, not yet added to the database
+    :rtype: ResultCode
+    """
 
     rule_name = rule[0]
     rule_parameters = rule[1]
@@ -155,7 +285,7 @@ def verify(cid, rule):
         return handler_return  # this is a return structure anyway :)
 
     rule_handler = handler_return.msg()  # this is the actual class instance
-    handler_instance = rule_handler(cid, rule_parameters)
+    handler_instance = rule_handler(cid, rule_parameters, claim)
 
     #
     # And make the call!
@@ -168,9 +298,6 @@ def verify(cid, rule):
 
     verifiedAt = a10.structures.timestamps.now()
 
-    # get the element and policy ids from the claim and add these to the results
-    clm = claims.getClaim(cid).msg()
-
     # What needs to be in a result are:
     # the ids of the claim, pid and eid
     # the rule name that was applied
@@ -181,7 +308,8 @@ def verify(cid, rule):
     # the message           [1]
     # additional            [2]
 
-    cid = clm["itemid"]
+    # The rule has read the element and policy ids of the claim, see BaseRule.claimFields
+    clm = handler_instance.claim
     eid = clm["header"]["element"]["itemid"]
     pid = clm["header"]["policy"]["itemid"]
 
@@ -198,6 +326,25 @@ def verify(cid, rule):
         application_result["ev"],
     )
 
+    return a10.structures.returncode.ReturnCode(
+        a10.structures.constants.RULESUCCESS, theResult.asDict()
+    )
+
+
+def verify(cid, rule):
+    # cid is a claim ID
+    # r is a structure of rules   -  this must be a DICT
+
+    # Verify the claim according to rule r
+
+    # A rule is a 2-tuple  ( rule name, parameters )
+    # Where the parameters is a json document that may be understood by the receiving rule
+    # The claim contains the eid and pid, for example: ("tpm2_firmwareVersion", {} )
+
+    r = applyRule(cid, rule)
+    if r.rc() != a10.structures.constants.RULESUCCESS:
+        return r
+
     # and add the result to the database and return the result
-    rid = results.addResult(theResult.asDict())
+    rid = results.addResult(r.msg())
     return rid
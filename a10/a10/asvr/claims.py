@@ -7,6 +7,29 @@ import a10.structures.identity
 import a10.structures.constants
 import a10.structures.returncode
 import a10.asvr.db.announce
+import a10.asvr.db.blobs
+
+
+def storePayload(e):
+    # Returns None, or a ReturnCode if the large payload items could not be written to the blob store
+    try:
+        a10.asvr.db.blobs.storeLargePayloadItems(e)
+    except Exception as err:
+        return a10.structures.returncode.ReturnCode(
+            a10.structures.constants.GENERALERROR,
+            "Payload not stored " + (str(err)),
+        )
+    return None
+
+
+def notAdded(e, msg):
+    # Blobs are shared by every claim with the same item so those written for a claim which was not added are
+    # not deleted, the digests are announced with the failure so that they can be removed once nothing refers to them
+    data = {"msg": msg, "itemid": e["itemid"]}
+    ds = a10.asvr.db.blobs.getBlobDigests(e)
+    if ds != []:
+        data["blobs"] = ds
+    a10.asvr.db.announce.announceClaim("add", data)
 
 
 def addClaim(e):
@@ -48,30 +71,96 @@ def addClaim(e):
     i = a10.structures.identity.generateID()
     e["itemid"] = i
 
+    rc = storePayload(e)
+    if rc is not None:
+        notAdded(e, rc.msg())
+        return rc
     r = a10.asvr.db.core.addClaim(e)
 
     if r == True:
         a10.asvr.db.announce.announceClaim("add", {"type": "claim", "itemid": i})
         return a10.structures.returncode.ReturnCode(a10.structures.constants.SUCCESS, i)
     else:
-        a10.asvr.db.announce.announceClaim(
-            "add", {"msg": "Claim not added to database", "itemid": i}
-        )
+        notAdded(e, "Claim not added to database")
         return a10.structures.returncode.ReturnCode(
             a10.structures.constants.ADDITEMFAIL, "Claim not added to database"
         )
 
 
-def getClaim(i):
+def addClaims(es):
+    """
+    Adds a list of claims to the database in one batch. The same fields as addClaim MUST be present
+    in each claim. A claim that is missing fields or fails to be written does not stop the others.
+
+    :params list es: a list of dictionaries with claim information
+    :return: one ReturnCode per claim in the same order, with the itemid of the claim on success
+    :rtype: list ReturnCode
+    """
+
+    rcs = [None] * len(es)
+    batch = []
+
+    for (k, e) in enumerate(es):
+        try:
+            tmp = e["header"]["as_requested"]
+            tmp = e["header"]["as_received"]
+            tmp = e["header"]["element"]
+            tmp = e["header"]["policy"]
+            tmp = e["payload"]
+        except KeyError as err:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.MISSINGFIELDS, "Missing fields " + (str(err))
+            )
+            continue
+        except Exception as err:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.GENERALERROR, "General error " + (str(err))
+            )
+            continue
+
+        e["itemid"] = a10.structures.identity.generateID()
+        rcs[k] = storePayload(e)
+        if rcs[k] is not None:
+            notAdded(e, rcs[k].msg())
+            continue
+        batch.append((k, e))
+
+    try:
+        errors = a10.asvr.db.core.addClaims([e for (k, e) in batch])
+    except Exception as err:
+        errors = [str(err)] * len(batch)
+
+    added = []
+    for ((k, e), err) in zip(batch, errors):
+        if err is None:
+            added.append({"type": "claim", "itemid": e["itemid"]})
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.SUCCESS, e["itemid"]
+            )
+        else:
+            notAdded(e, "Claim not added to database " + err)
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.ADDITEMFAIL,
+                "Claim not added to database " + err,
+            )
+
+    if added != []:
+        a10.asvr.db.announce.announceClaims("add", added)
+
+    return rcs
+
+
+def getClaim(i, fields=None):
     """
     Gets a claim from the database with the given itemid
 
     :params str i: an itemID of a claim
+    :params list fields: dotted paths of the fields to return, eg: payload.payload.quote, or None for the whole claim
     :return: the claim as a dictionary
     :rtype: ReturnCode
     """
 
-    e = a10.asvr.db.core.getClaim(i)
+    e = a10.asvr.db.core.getClaim(i, fields)
     if e == None:
         return a10.structures.returncode.ReturnCode(
             a10.structures.constants.ITEMDOESNOTEXIST, "Element does not exist"
@@ -80,6 +169,19 @@ def getClaim(i):
         return a10.structures.returncode.ReturnCode(a10.structures.constants.SUCCESS, e)
 
 
+def getPayloadItem(c, k):
+    """
+    Gets an item of a claim's payload. Large items are kept in the blob store and are only read when asked for here.
+
+    :params dict c: the claim
+    :params str k: the name of the payload item, eg: eventlog
+    :return: the payload item as it was in the claim made by the trust agent, None if missing
+    """
+
+    v = c.get("payload", {}).get("payload", {}).get(k)
+    return a10.asvr.db.blobs.resolveBlobReference(v)
+
+
 def getClaims(n):
     """
     Gets a list of claim itemids from the database 
@@ -2,6 +2,7 @@
 # Licensed under the BSD 3-Clause Clear License.
 # SPDX-License-Identifier: BSD-3-Clear
 
+import ast
 import threading
 import time
 
@@ -9,39 +10,92 @@ import a10.structures.timestamps
 
 import a10.asvr.db.log
 import a10.asvr.db.mqtt
+import a10.asvr.db.cache
 import a10.asvr.db.core
+import a10.asvr.db.logsink
 
 import a10.asvr.db.configuration
 
 
+def receiveItemManagement(payload):
+    # Item management announced by any ASVR process, including this one, on AS/IM
+    try:
+        m = ast.literal_eval(payload.decode("utf-8"))
+        a10.asvr.db.cache.invalidate(m["op"], m["data"])
+    except Exception as e:
+        print("Unreadable AS/IM message ", e)
+
+
+a10.asvr.db.mqtt.subscribe("AS/IM", receiveItemManagement)
+
+
 def announceItemManagement(op, data):
+    a10.asvr.db.cache.invalidate(op, data)
     t = a10.structures.timestamps.now()
     a10.asvr.db.log.writelog(t, "IM", op, data)
-    a10.asvr.db.core.writeLogEntry(t, "IM", op, data)
+    a10.asvr.db.logsink.write(t, "IM", op, data)
     a10.asvr.db.mqtt.publish("AS/IM", t, op, data)
 
 
 def announceClaim(op, data):
     t = a10.structures.timestamps.now()
     a10.asvr.db.log.writelog(t, "C", op, data)
-    a10.asvr.db.core.writeLogEntry(t, "C", op, data)
+    a10.asvr.db.logsink.write(t, "C", op, data)
     a10.asvr.db.mqtt.publish("AS/C", t, op, data)
 
 
 def announceResult(op, data):
     t = a10.structures.timestamps.now()
     a10.asvr.db.log.writelog(t, "R", op, data)
-    a10.asvr.db.core.writeLogEntry(t, "R", op, data)
+    a10.asvr.db.logsink.write(t, "R", op, data)
     a10.asvr.db.mqtt.publish("AS/R", t, op, data)
 
 
+def announceMany(ch, op, ds):
+    """ Announces a batch of items on one channel, the log entries are written in one batch
+
+	:params str ch: the channel, eg: C or R
+	:params str op: the operation, eg: add
+	:params list ds: the data of each announcement
+	"""
+
+    t = a10.structures.timestamps.now()
+    for data in ds:
+        a10.asvr.db.log.writelog(t, ch, op, data)
+    a10.asvr.db.logsink.writeMany([(t, ch, op, data) for data in ds])
+    for data in ds:
+        a10.asvr.db.mqtt.publish("AS/" + ch, t, op, data)
+
+
+def announceClaims(op, ds):
+    announceMany("C", op, ds)
+
+
+def announceResults(op, ds):
+    announceMany("R", op, ds)
+
+
 def announceMessage(op, data):
     t = a10.structures.timestamps.now()
     a10.asvr.db.log.writelog(t, "MSG", op, data)
-    a10.asvr.db.core.writeLogEntry(t, "MSG", op, data)
+    a10.asvr.db.logsink.write(t, "MSG", op, data)
     a10.asvr.db.mqtt.publish("AS/MSG", t, op, data)
     print("message received ",op,data)
 
+def getLogEntries(n=250, cursor=None, ch=None, op=None):
+    """ Returns one page of log entries, newest first, see a10.asvr.db.core.getLogEntries
+
+	:params int n: maximum number of entries in the page, defaults to 250
+	:params str cursor: the cursor returned with the previous page, or None for the latest entries
+	:params str ch: only entries on this channel, or None for all channels
+	:params str op: only entries with this operation, or None for all operations
+	:returns: the entries under "entries" and the cursor for the next page under "cursor"
+	:rtype: dict
+	"""
+
+    return a10.asvr.db.core.getLogEntries(n, cursor, ch, op)
+
+
 def getLatestLogEntries(n=250):
     """ Returns the latest log entries 
 
@@ -0,0 +1,67 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""Archive files for claims and results removed from the database by a10.asvr.db.core.pruneCollections.
+
+   Each file is gzip compressed NDJSON, one document per line. Which file holds an item is recorded in the
+   archive index by the storage backend so that the item can be read back by getClaim and getResult.
+"""
+
+import gzip
+import json
+import os
+
+import a10.structures.identity
+import a10.structures.timestamps
+
+
+def writeArchive(d, c, es):
+    """ Writes documents to a new archive file
+
+	:param str d: the archive directory, which is created if necessary
+	:param str c: the collection the documents were removed from, eg: claims
+	:param list es: the documents
+	:return: the path of the archive file
+	:rtype: str
+	"""
+
+    os.makedirs(d, exist_ok=True)
+    f = os.path.join(
+        d,
+        c
+        + "-"
+        + str(int(a10.structures.timestamps.now()))
+        + "-"
+        + a10.structures.identity.generateID()
+        + ".ndjson.gz",
+    )
+
+    with gzip.open(f, "wt", encoding="utf-8") as a:
+        for e in es:
+            a.write(json.dumps(e, default=str) + "\n")
+        a.flush()
+        os.fsync(a.fileno())
+
+    return f
+
+
+def readArchive(f, i):
+    """ Reads the document with the given itemid from an archive file
+
+	:param str f: the path of the archive file
+	:param str i: the itemid
+	:return: the document
+	:rtype: dict or None
+	"""
+
+    try:
+        with gzip.open(f, "rt", encoding="utf-8") as a:
+            for l in a:
+                e = json.loads(l)
+                if e.get("itemid") == i:
+                    return e
+    except OSError as err:
+        print("A10 archive file error ", err, " while reading ", f)
+
+    return None
@@ -0,0 +1,3 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
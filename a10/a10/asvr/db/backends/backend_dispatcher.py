@@ -0,0 +1,46 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+import a10.asvr.db.backends.mongobackend
+import a10.asvr.db.backends.sqlitebackend
+
+import a10.structures.constants
+import a10.structures.returncode
+
+REGISTER = {
+    a10.asvr.db.backends.mongobackend.MongoBackend.NAME: a10.asvr.db.backends.mongobackend.MongoBackend,
+    a10.asvr.db.backends.sqlitebackend.SQLiteBackend.NAME: a10.asvr.db.backends.sqlitebackend.SQLiteBackend,
+}
+
+
+def getRegisteredBackends():
+    """
+	Returns all the registered storage backends
+
+	:returns: a list of all registered names
+	:rtype: list
+	"""
+
+    return REGISTER.keys()
+
+
+def getBackendHandler(n):
+    """
+	Returns the class of the storage backend with the given name
+
+	:returns: the class of the backend if successful otherwise an errorcode of UNREGISTEREDBACKEND.
+	:rtype: ResultCode
+	"""
+    try:
+        p = REGISTER[n]
+        return a10.structures.returncode.ReturnCode(a10.structures.constants.SUCCESS, p)
+    except KeyError as err:
+        return a10.structures.returncode.ReturnCode(
+            a10.structures.constants.UNREGISTEREDBACKEND,
+            "Unregistered Backend " + (str(err)),
+        )
+    except Exception as err:
+        return a10.structures.returncode.ReturnCode(
+            a10.structures.constants.GENERALERROR, "General error " + (str(err))
+        )
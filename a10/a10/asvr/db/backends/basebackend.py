@@ -0,0 +1,459 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""The storage backend interface.
+
+   a10.asvr.db.core delegates every call to one instance of a subclass of BaseBackend, chosen by the
+   backend entry in the [database] section of /etc/a10.conf. A backend stores documents as python dicts
+   and must return them without any database specific fields, eg: MongoDB's _id.
+"""
+
+
+# The collections that are reported by getDatabaseStatus
+COLLECTIONS = [
+    "elements",
+    "policies",
+    "expectedvalues",
+    "claims",
+    "results",
+    "hashes",
+    "log",
+    "elementstatus",
+    "schedule",
+]
+
+
+def elementStatusEntry(r):
+    # The part of a result kept in elementstatus, one per element, policy and rule, see a10.asvr.status
+    # A missing ruleName is kept as "" so that it is one key in unique indexes, which treat nulls as distinct
+    return {
+        "elementID": r["elementID"],
+        "policyID": r["policyID"],
+        "verifiedAt": float(r["verifiedAt"]),
+        "result": r["result"],
+        "resultID": r["itemid"],
+        "claimID": r.get("claimID"),
+        "ruleName": r.get("ruleName") or "",
+    }
+
+
+def project(d, fields):
+    # The equivalent of a MongoDB projection: only the given dotted paths that exist in d are returned
+    p = {}
+    for f in fields:
+        ks = f.split(".")
+        v = d
+        for k in ks:
+            if not isinstance(v, dict) or k not in v:
+                break
+            v = v[k]
+        else:
+            t = p
+            for k in ks[:-1]:
+                t = t.setdefault(k, {})
+            t[ks[-1]] = v
+    return p
+
+
+class BaseBackend:
+    NAME = "<<abstract>>basebackend.BaseBackend"
+
+    def __init__(self, settings):
+        """
+	   Initialises the backend
+
+	   :param dict settings: the database settings, see a10.asvr.db.configuration.DATABASESETTINGS
+		"""
+
+        self.settings = settings
+
+    #
+    # Indexes and Migration
+    #
+
+    def createIndexes(self):
+        """ Creates the indexes, or whatever the backend uses, for the queries below if they do not already exist
+
+	:return: the indexes per collection
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".createIndexes")
+
+    def migrateTimestamps(self, batchsize=1000):
+        """ Converts timestamps stored as strings into numbers
+
+	:param int batchsize: number of documents to convert per round trip
+	:return: the number of fields converted per collection
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".migrateTimestamps")
+
+    def migrateResultsLayout(self, batchsize=1000):
+        """ Moves the stored results into the layout given by resultslayout
+
+	:param int batchsize: number of results to move per round trip
+	:return: the number of results moved, and of those which could not be
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".migrateResultsLayout")
+
+    #
+    # Retention and Archive
+    #
+
+    def getItemsOlderThan(self, c, t, n):
+        """ Returns the oldest claims or results which were made before the given time
+
+	:param str c: claims or results
+	:param float t: the time
+	:param int n: the maximum number of documents to return
+	:rtype: list dict
+	"""
+        raise NotImplementedError(self.NAME + ".getItemsOlderThan")
+
+    def getElementPolicyPairs(self, c):
+        """ Returns the element and policy pairs which have claims or results
+
+	:param str c: claims or results
+	:return: element id and policy id pairs
+	:rtype: list tuple
+	"""
+        raise NotImplementedError(self.NAME + ".getElementPolicyPairs")
+
+    def getItemsBeyondCount(self, c, e, p, keep, n):
+        """ Returns the claims or results of an element and policy which are older than its newest keep
+
+	:param str c: claims or results
+	:param str e: the element id
+	:param str p: the policy id
+	:param int keep: the number of documents kept for the element and policy
+	:param int n: the maximum number of documents to return
+	:rtype: list dict
+	"""
+        raise NotImplementedError(self.NAME + ".getItemsBeyondCount")
+
+    def deleteItems(self, c, ids):
+        """ Deletes the documents with the given itemids
+
+	:return: the number of documents deleted
+	:rtype: int
+	"""
+        raise NotImplementedError(self.NAME + ".deleteItems")
+
+    def deleteLogEntriesOlderThan(self, t):
+        """ Deletes the log entries written before the given time, unless the log is limited some other way, eg: capped
+
+	:return: the number of entries deleted
+	:rtype: int
+	"""
+        raise NotImplementedError(self.NAME + ".deleteLogEntriesOlderThan")
+
+    def addArchiveEntries(self, c, ids, f):
+        """ Records that the documents with the given itemids were archived to the file f
+	"""
+        raise NotImplementedError(self.NAME + ".addArchiveEntries")
+
+    def getArchiveEntry(self, i):
+        """ Returns where the document with the given itemid was archived
+
+	:return: the itemid, collection and file of the archived document
+	:rtype: dict or None
+	"""
+        raise NotImplementedError(self.NAME + ".getArchiveEntry")
+
+    #
+    # Blobs
+    #
+
+    def putBlob(self, d, data):
+        """ Stores binary data under its digest, unless data with that digest is already stored
+
+	:param str d: the sha256 digest of the data in hex
+	:param bytes data: the data, as compressed by a10.asvr.db.blobs
+	"""
+        raise NotImplementedError(self.NAME + ".putBlob")
+
+    def getBlob(self, d):
+        """ Returns the data stored under the given digest
+
+	:rtype: bytes or None
+	"""
+        raise NotImplementedError(self.NAME + ".getBlob")
+
+    #
+    # Change Events
+    #
+
+    def watch(self, cs, since=None, idle=None):
+        """ A generator of the changes made to the given collections, see a10.asvr.events.stream
+
+	:param list cs: the collections
+	:param str since: the token of the last change seen, or None to start with the next change
+	:param float idle: if given an idle event is generated when no change is made for this many seconds
+
+	A delete has the itemid of the deleted item if the backend can know it, otherwise None. Errors opening the
+	feed, eg: NotImplementedError or ValueError for an invalid since, are raised by this call, not by the generator.
+	"""
+        raise NotImplementedError(self.NAME + ".watch")
+
+    #
+    # Generics
+    #
+
+    def getDatabaseStatus(self):
+        """ Returns the estimated number of items in each collection as strings.
+
+	This must take constant time whatever the size of the database, eg: by using metadata.
+
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".getDatabaseStatus")
+
+    def getExactDatabaseStatus(self):
+        """ Returns the exact number of items in each collection as strings. This may be slow.
+
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".getExactDatabaseStatus")
+
+    def getClientStatistics(self):
+        """ Returns the statistics of the connections to the database held by this process
+
+	:rtype: dict
+	"""
+        raise NotImplementedError(self.NAME + ".getClientStatistics")
+
+    #
+    # Logging
+    #
+
+    def writeLogEntry(self, t, ch, op, data):
+        raise NotImplementedError(self.NAME + ".writeLogEntry")
+
+    def newLogEntryKeys(self, n):
+        raise NotImplementedError(self.NAME + ".newLogEntryKeys")
+
+    def writeLogEntries(self, ls, keys=None):
+        raise NotImplementedError(self.NAME + ".writeLogEntries")
+
+    def getLogEntries(self, n, cursor=None, ch=None, op=None):
+        raise NotImplementedError(self.NAME + ".getLogEntries")
+
+    def getLatestLogEntries(self, n):
+        raise NotImplementedError(self.NAME + ".getLatestLogEntries")
+
+    def getLogEntryCount(self):
+        raise NotImplementedError(self.NAME + ".getLogEntryCount")
+
+    #
+    # Elements
+    #
+
+    def addElement(self, e):
+        raise NotImplementedError(self.NAME + ".addElement")
+
+    def getElement(self, i):
+        raise NotImplementedError(self.NAME + ".getElement")
+
+    def getElementByName(self, n):
+        raise NotImplementedError(self.NAME + ".getElementByName")
+
+    def getElements(self):
+        raise NotImplementedError(self.NAME + ".getElements")
+
+    def getElementsFull(self):
+        raise NotImplementedError(self.NAME + ".getElementsFull")
+
+    def getElementsByIds(self, ids, fields=None):
+        raise NotImplementedError(self.NAME + ".getElementsByIds")
+
+    def deleteElement(self, e):
+        raise NotImplementedError(self.NAME + ".deleteElement")
+
+    def updateElement(self, e):
+        raise NotImplementedError(self.NAME + ".updateElement")
+
+    #
+    # Policies
+    #
+
+    def addPolicy(self, e):
+        raise NotImplementedError(self.NAME + ".addPolicy")
+
+    def getPolicy(self, i):
+        raise NotImplementedError(self.NAME + ".getPolicy")
+
+    def getPolicyByName(self, n):
+        raise NotImplementedError(self.NAME + ".getPolicyByName")
+
+    def getPolicies(self):
+        raise NotImplementedError(self.NAME + ".getPolicies")
+
+    def getPoliciesFull(self):
+        raise NotImplementedError(self.NAME + ".getPoliciesFull")
+
+    def getPoliciesByIds(self, ids, fields=None):
+        raise NotImplementedError(self.NAME + ".getPoliciesByIds")
+
+    def deletePolicy(self, i):
+        raise NotImplementedError(self.NAME + ".deletePolicy")
+
+    def updatePolicy(self, e):
+        raise NotImplementedError(self.NAME + ".updatePolicy")
+
+    #
+    # Hashes
+    #
+
+    def addHash(self, h):
+        raise NotImplementedError(self.NAME + ".addHash")
+
+    def getHash(self, h):
+        raise NotImplementedError(self.NAME + ".getHash")
+
+    def getHashes(self):
+        raise NotImplementedError(self.NAME + ".getHashes")
+
+    def getHashesFull(self):
+        raise NotImplementedError(self.NAME + ".getHashesFull")
+
+    #
+    # Expected Values
+    #
+
+    def addExpectedValue(self, e):
+        raise NotImplementedError(self.NAME + ".addExpectedValue")
+
+    def getExpectedValue(self, i):
+        raise NotImplementedError(self.NAME + ".getExpectedValue")
+
+    def getExpectedValues(self):
+        raise NotImplementedError(self.NAME + ".getExpectedValues")
+
+    def getExpectedValuesFull(self):
+        raise NotImplementedError(self.NAME + ".getExpectedValuesFull")
+
+    def getExpectedValuesForElement(self, i):
+        raise NotImplementedError(self.NAME + ".getExpectedValuesForElement")
+
+    def getExpectedValuesForPolicy(self, i):
+        raise NotImplementedError(self.NAME + ".getExpectedValuesForPolicy")
+
+    def getExpectedValueForElementAndPolicy(self, e, p):
+        raise NotImplementedError(self.NAME + ".getExpectedValueForElementAndPolicy")
+
+    def deleteExpectedValue(self, i):
+        raise NotImplementedError(self.NAME + ".deleteExpectedValue")
+
+    def updateExpectedValue(self, e):
+        raise NotImplementedError(self.NAME + ".updateExpectedValue")
+
+    #
+    # Claims
+    #
+
+    def addClaim(self, e):
+        raise NotImplementedError(self.NAME + ".addClaim")
+
+    def addClaims(self, es):
+        raise NotImplementedError(self.NAME + ".addClaims")
+
+    def getClaim(self, i, fields=None):
+        raise NotImplementedError(self.NAME + ".getClaim")
+
+    def getClaims(self):
+        raise NotImplementedError(self.NAME + ".getClaims")
+
+    def getClaimsFull(self, n):
+        raise NotImplementedError(self.NAME + ".getClaimsFull")
+
+    def getAssociatedResults(self, i):
+        raise NotImplementedError(self.NAME + ".getAssociatedResults")
+
+    #
+    # Results
+    #
+
+    def addResult(self, e):
+        raise NotImplementedError(self.NAME + ".addResult")
+
+    def addResults(self, es):
+        raise NotImplementedError(self.NAME + ".addResults")
+
+    def getResult(self, i):
+        raise NotImplementedError(self.NAME + ".getResult")
+
+    def getResults(self):
+        raise NotImplementedError(self.NAME + ".getResults")
+
+    def getResultsSince(self, t, u=None):
+        raise NotImplementedError(self.NAME + ".getResultsSince")
+
+    def getResultsFull(self, n):
+        raise NotImplementedError(self.NAME + ".getResultsFull")
+
+    def getLatestResultPerElement(self, byPolicy=False, byRule=False):
+        raise NotImplementedError(self.NAME + ".getLatestResultPerElement")
+
+    def getResultCounts(self, e, since=None, until=None, bucket=None):
+        raise NotImplementedError(self.NAME + ".getResultCounts")
+
+    def getLatestResultCounts(self, e, p, n):
+        raise NotImplementedError(self.NAME + ".getLatestResultCounts")
+
+    def getLatestResults(self, e, n):
+        raise NotImplementedError(self.NAME + ".getLatestResults")
+
+    def getLatestResultsForElementAndPolicy(self, e, p, n):
+        raise NotImplementedError(self.NAME + ".getLatestResultsForElementAndPolicy")
+
+    #
+    # Element Status
+    #
+
+    def updateElementStatus(self, rs):
+        """ Makes each result the status of its element and policy unless a later result already is
+
+	:param list rs: the results
+	"""
+        raise NotImplementedError(self.NAME + ".updateElementStatus")
+
+    def getElementStatus(self, e=None):
+        """ Returns the status of each policy of the given element, or of every element, see elementStatusEntry
+
+	:rtype: list dict
+	"""
+        raise NotImplementedError(self.NAME + ".getElementStatus")
+
+    def deleteElementStatus(self, e=None, p=None):
+        """ Deletes the status entries of an element, of a policy, or of an element and policy
+
+	:param str e: the element id, or None for every element
+	:param str p: the policy id, or None for every policy
+	"""
+        raise NotImplementedError(self.NAME + ".deleteElementStatus")
+
+    #
+    # Schedule
+    #
+
+    def updateScheduleEntries(self, ss):
+        """ Adds or replaces the schedule entries, there is one per element and policy, see a10.asvr.scheduler
+
+	:param list ss: the entries, each has at least elementID, policyID and due
+	"""
+        raise NotImplementedError(self.NAME + ".updateScheduleEntries")
+
+    def getScheduleEntries(self, e=None):
+        raise NotImplementedError(self.NAME + ".getScheduleEntries")
+
+    def getDueScheduleEntries(self, t, n):
+        """ Returns up to n schedule entries due at or before t, the earliest first
+
+	:rtype: list dict
+	"""
+        raise NotImplementedError(self.NAME + ".getDueScheduleEntries")
+
+    def deleteScheduleEntry(self, e, p):
+        raise NotImplementedError(self.NAME + ".deleteScheduleEntry")
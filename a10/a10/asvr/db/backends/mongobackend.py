@@ -0,0 +1,1187 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+import datetime
+
+import bson.errors
+import bson.objectid
+import gridfs
+import gridfs.errors
+import pymongo
+import pymongo.errors
+
+from a10.asvr.db.backends import basebackend, mongoclient
+
+
+# Every query in this backend must be answerable from one of these indexes without falling
+# back to a collection scan or an in-memory sort. If you add a query, add its index here
+# and the query to tests/queryPlanTests.py
+
+INDEXES = {
+    "elements": [
+        [("itemid", pymongo.ASCENDING)],
+        [("name", pymongo.ASCENDING)],
+    ],
+    "policies": [
+        [("itemid", pymongo.ASCENDING)],
+        [("name", pymongo.ASCENDING)],
+    ],
+    "expectedvalues": [
+        [("itemid", pymongo.ASCENDING)],
+        [("elementID", pymongo.ASCENDING), ("policyID", pymongo.ASCENDING)],
+        [("policyID", pymongo.ASCENDING)],
+    ],
+    "claims": [
+        [
+            ("header.element.itemid", pymongo.ASCENDING),
+            ("header.policy.itemid", pymongo.ASCENDING),
+            ("header.as_requested", pymongo.DESCENDING),
+        ],
+        [("itemid", pymongo.ASCENDING)],
+        [("header.as_requested", pymongo.DESCENDING)],
+    ],
+    "results": [
+        [("itemid", pymongo.ASCENDING)],
+        [
+            ("elementID", pymongo.ASCENDING),
+            ("policyID", pymongo.ASCENDING),
+            ("verifiedAt", pymongo.DESCENDING),
+        ],
+        [("elementID", pymongo.ASCENDING), ("verifiedAt", pymongo.DESCENDING)],
+        [("claimID", pymongo.ASCENDING), ("verifiedAt", pymongo.DESCENDING)],
+        [("verifiedAt", pymongo.DESCENDING)],
+    ],
+    "hashes": [
+        [("hash", pymongo.ASCENDING)],
+    ],
+    "log": [
+        [("t", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        [("ch", pymongo.ASCENDING), ("t", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        [("op", pymongo.ASCENDING), ("t", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+    ],
+    "archiveindex": [
+        [("itemid", pymongo.ASCENDING)],
+    ],
+    "elementstatus": [
+        [("policyID", pymongo.ASCENDING)],
+    ],
+    "schedule": [
+        [("due", pymongo.ASCENDING)],
+    ],
+}
+
+# Created with unique=True
+UNIQUEINDEXES = {
+    "elementstatus": [
+        [
+            ("elementID", pymongo.ASCENDING),
+            ("policyID", pymongo.ASCENDING),
+            ("ruleName", pymongo.ASCENDING),
+        ],
+    ],
+    "schedule": [
+        [("elementID", pymongo.ASCENDING), ("policyID", pymongo.ASCENDING)],
+    ],
+}
+
+
+# The error of a change stream on a MongoDB which is not a replica set
+NOTREPLICASET = 40573
+# The error when the changes after a resume token have gone from the oplog
+HISTORYLOST = 286
+
+# Indexes replaced by those above, dropped when the indexes are created
+DROPPEDINDEXES = {
+    "elementstatus": ["elementID_1_policyID_1"],
+}
+
+# The item management collections whose change events keep the document before the change, so that
+# the itemid of a deleted item is known, see watch. This needs MongoDB 6.0 or later
+PREIMAGES = ["elements", "policies", "expectedvalues", "hashes"]
+
+
+# The results collection in the timeseries layout, see resultslayout in INSTALL.md. Results are
+# bucketed by element and policy, which are also kept in meta, and by ts, verifiedAt as a date
+TIMESERIESRESULTS = {"timeField": "ts", "metaField": "meta", "granularity": "minutes"}
+
+TIMESERIESINDEXES = [
+    [
+        ("meta.elementID", pymongo.ASCENDING),
+        ("meta.policyID", pymongo.ASCENDING),
+        ("ts", pymongo.DESCENDING),
+    ],
+    [("meta.elementID", pymongo.ASCENDING), ("ts", pymongo.DESCENDING)],
+    [("itemid", pymongo.ASCENDING)],
+    [("claimID", pymongo.ASCENDING), ("ts", pymongo.DESCENDING)],
+]
+
+# Where the element, policy and time of a result are queried in each layout
+RESULTSFIELDS = {
+    "document": {"elementID": "elementID", "policyID": "policyID", "verifiedAt": "verifiedAt"},
+    "timeseries": {"elementID": "meta.elementID", "policyID": "meta.policyID", "verifiedAt": "ts"},
+}
+
+
+# The time, element and policy fields used to prune claims and results
+RETENTIONFIELDS = {
+    "claims": ("header.as_requested", "header.element.itemid", "header.policy.itemid"),
+    "results": ("verifiedAt", "elementID", "policyID"),
+}
+
+
+# Fields which were stored as strings in earlier versions
+TIMESTAMPFIELDS = {
+    "claims": ["header.as_requested", "header.as_received"],
+    "results": ["verifiedAt"],
+    "log": ["t"],
+}
+
+
+def logEntry(t, ch, op, data):
+    # createdAt is a date for the TTL index on the log, it is not returned by reads
+    return {
+        "t": t,
+        "ch": ch,
+        "op": op,
+        "data": data,
+        "createdAt": datetime.datetime.fromtimestamp(t, datetime.timezone.utc),
+    }
+
+
+def insertMany(collection, es, duplicates=False):
+    # Unordered so that one failure does not stop the rest of the batch
+    # Returns one entry per document, None if inserted otherwise the error message
+    # With duplicates a document whose _id exists was inserted by an earlier attempt and is not an error
+    errors = [None] * len(es)
+    if es == []:
+        return errors
+
+    try:
+        collection.insert_many(es, ordered=False)
+    except pymongo.errors.BulkWriteError as err:
+        for w in err.details["writeErrors"]:
+            if duplicates and w["code"] == 11000:
+                continue
+            errors[w["index"]] = w["errmsg"]
+
+    return errors
+
+
+class MongoBackend(basebackend.BaseBackend):
+    NAME = "mongo"
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.clients = mongoclient.ClientManager(settings)
+        self.indexed = False
+        self.preImages = False
+        self.timeseries = settings.get("resultslayout", "document") == "timeseries"
+        self.rf = RESULTSFIELDS["timeseries" if self.timeseries else "document"]
+
+    @property
+    def asdb(self):
+        # Connects on first use, the indexes are created then rather than at import
+        db = self.clients.database()
+        if not self.indexed:
+            self.indexed = True
+            try:
+                self.createIndexes()
+            except pymongo.errors.PyMongoError:
+                # Tried again on next use, eg: when the server is back
+                self.indexed = False
+                raise
+        return db
+
+    @property
+    def blobs(self):
+        return gridfs.GridFSBucket(self.asdb, bucket_name="blobs")
+
+    ##################################################
+    #
+    # Helpers for the layout of results
+    #
+    ##################################################
+
+    def resultsTime(self, t):
+        # A verifiedAt as queried, dates are only needed for ts
+        if self.timeseries:
+            return datetime.datetime.fromtimestamp(t, datetime.timezone.utc)
+        return t
+
+    def resultsProjection(self):
+        if self.timeseries:
+            return {"_id": False, "ts": False, "meta": False}
+        return {"_id": False}
+
+    def resultDocument(self, e):
+        # The result as stored, ts and meta are not returned by reads
+        if not self.timeseries:
+            return e
+        d = dict(e)
+        d["ts"] = self.resultsTime(float(e["verifiedAt"]))
+        d["meta"] = {"elementID": e.get("elementID"), "policyID": e.get("policyID")}
+        return d
+
+    def findByIds(self, c, ids, fields=None):
+        # One query on the itemid index however many ids there are
+        collection = self.asdb[c]
+        projection = {"_id": False}
+        if fields is not None:
+            projection["itemid"] = True
+            for f in fields:
+                projection[f] = True
+        return list(collection.find({"itemid": {"$in": list(ids)}}, projection))
+
+    def isTimeSeries(self, db, c):
+        for info in db.list_collections(filter={"name": c}):
+            return info.get("type") == "timeseries"
+        return None
+
+    ##################################################
+    #
+    # Indexes and Migration
+    #
+    ##################################################
+
+    def createIndexes(self):
+        # Creating an index that already exists is a no-op in MongoDB
+        created = {}
+
+        # A capped log can only be made when the collection is created
+        logcapsize = self.settings.get("logcapsize", 0)
+        if logcapsize > 0 and "log" not in self.asdb.list_collection_names():
+            self.asdb.create_collection("log", capped=True, size=logcapsize)
+
+        if self.timeseries:
+            ts = self.isTimeSeries(self.asdb, "results")
+            if ts is None:
+                self.asdb.create_collection("results", timeseries=TIMESERIESRESULTS)
+            elif ts == False:
+                raise pymongo.errors.ConfigurationError(
+                    "resultslayout is timeseries but results is not a time-series collection, "
+                    + "see utilities/Database/migrateresults.py"
+                )
+
+        for c, indexes in INDEXES.items():
+            if c == "results" and self.timeseries:
+                indexes = TIMESERIESINDEXES
+            collection = self.asdb[c]
+            created[c] = [collection.create_index(keys) for keys in indexes]
+
+        for c, names in DROPPEDINDEXES.items():
+            collection = self.asdb[c]
+            for name in names:
+                if name in collection.index_information():
+                    collection.drop_index(name)
+
+        for c, indexes in UNIQUEINDEXES.items():
+            collection = self.asdb[c]
+            created[c] = created[c] + [
+                collection.create_index(keys, unique=True) for keys in indexes
+            ]
+
+        # Capped collections can not have TTL indexes
+        logttl = self.settings.get("logttl", 0)
+        if logttl > 0 and not self.asdb["log"].options().get("capped", False):
+            created["log"].append(self.createTTLIndex("log", "createdAt", logttl))
+
+        # The collections exist now that their indexes do
+        try:
+            for c in PREIMAGES:
+                self.asdb.command(
+                    "collMod", c, changeStreamPreAndPostImages={"enabled": True}
+                )
+            self.preImages = True
+        except pymongo.errors.OperationFailure:
+            # Before MongoDB 6.0, deletes are reported without an itemid
+            self.preImages = False
+
+        return created
+
+    def createTTLIndex(self, c, f, ttl):
+        collection = self.asdb[c]
+        try:
+            return collection.create_index(f, expireAfterSeconds=ttl)
+        except pymongo.errors.OperationFailure:
+            # The index exists with another expiry time
+            self.asdb.command(
+                "collMod", c, index={"keyPattern": {f: 1}, "expireAfterSeconds": ttl}
+            )
+            return f + "_1"
+
+    def migrateTimestamps(self, batchsize=1000):
+        # Only updates a field if it has not changed since it was read, so this can run online
+        migrated = {}
+
+        for c, fields in TIMESTAMPFIELDS.items():
+            collection = self.asdb[c]
+            migrated[c] = 0
+            if c == "results" and self.timeseries:
+                # verifiedAt was converted when the results were moved into the time-series collection
+                continue
+
+            for f in fields:
+                last = None
+                while True:
+                    q = {f: {"$type": "string"}}
+                    if last is not None:
+                        q["_id"] = {"$gt": last}
+                    ds = list(
+                        collection.find(q, {f: True})
+                        .sort("_id", pymongo.ASCENDING)
+                        .limit(batchsize)
+                    )
+                    if ds == []:
+                        break
+                    last = ds[-1]["_id"]
+
+                    ops = []
+                    for d in ds:
+                        v = d
+                        for k in f.split("."):
+                            v = v[k]
+                        try:
+                            ops.append(
+                                pymongo.UpdateOne(
+                                    {"_id": d["_id"], f: v}, {"$set": {f: float(v)}}
+                                )
+                            )
+                        except ValueError:
+                            pass
+
+                    if ops != []:
+                        r = collection.bulk_write(ops, ordered=False)
+                        migrated[c] = migrated[c] + r.modified_count
+
+        return migrated
+
+    def migrateResultsLayout(self, batchsize=1000):
+        # The collection is renamed and its results moved over in batches, deleting each batch once it is
+        # copied, so this continues where it stopped if it is interrupted. A batch copied but not deleted
+        # when interrupted is copied twice
+        if not self.timeseries:
+            return {"results": 0, "notmoved": 0}
+
+        db = self.clients.database()
+        ts = self.isTimeSeries(db, "results")
+        if ts == False:
+            db["results"].rename("results_document")
+        if ts != True:
+            db.create_collection("results", timeseries=TIMESERIESRESULTS)
+
+        source = db["results_document"]
+        target = db["results"]
+        moved = 0
+        last = None
+        while True:
+            q = {}
+            if last is not None:
+                q["_id"] = {"$gt": last}
+            ds = list(source.find(q).sort("_id", pymongo.ASCENDING).limit(batchsize))
+            if ds == []:
+                break
+            last = ds[-1]["_id"]
+
+            rs = []
+            ids = []
+            for d in ds:
+                r = dict(d)
+                del r["_id"]
+                try:
+                    r["verifiedAt"] = float(r["verifiedAt"])
+                except (KeyError, TypeError, ValueError):
+                    # Without a time it can not be stored, it is left in results_document
+                    continue
+                rs.append(self.resultDocument(r))
+                ids.append(d["_id"])
+
+            if rs != []:
+                target.insert_many(rs, ordered=False)
+                source.delete_many({"_id": {"$in": ids}})
+                moved = moved + len(rs)
+
+        left = source.count_documents({})
+        if left == 0:
+            source.drop()
+
+        # The indexes of the new layout
+        self.indexed = True
+        self.createIndexes()
+        return {"results": moved, "notmoved": left}
+
+    ##################################################
+    #
+    # Retention and Archive
+    #
+    ##################################################
+
+    def retentionFields(self, c):
+        if c == "results" and self.timeseries:
+            return ("ts", "meta.elementID", "meta.policyID")
+        return RETENTIONFIELDS[c]
+
+    def getItemsOlderThan(self, c, t, n):
+        collection = self.asdb[c]
+        (tf, ef, pf) = self.retentionFields(c)
+        projection = {"_id": False}
+        if c == "results":
+            t = self.resultsTime(t)
+            projection = self.resultsProjection()
+        es = (
+            collection.find({tf: {"$lt": t}}, projection)
+            .sort(tf, pymongo.ASCENDING)
+            .limit(n)
+        )
+        return list(es)
+
+    def getElementPolicyPairs(self, c):
+        collection = self.asdb[c]
+        (tf, ef, pf) = self.retentionFields(c)
+        pairs = collection.aggregate(
+            [
+                {"$sort": {ef: pymongo.ASCENDING, pf: pymongo.ASCENDING}},
+                {"$group": {"_id": {"e": "$" + ef, "p": "$" + pf}}},
+            ]
+        )
+        return [(pair["_id"].get("e"), pair["_id"].get("p")) for pair in pairs]
+
+    def getItemsBeyondCount(self, c, e, p, keep, n):
+        collection = self.asdb[c]
+        (tf, ef, pf) = self.retentionFields(c)
+        projection = {"_id": False}
+        if c == "results":
+            projection = self.resultsProjection()
+
+        es = (
+            collection.find({ef: e, pf: p}, projection)
+            .sort(tf, pymongo.DESCENDING)
+            .skip(keep)
+            .limit(n)
+        )
+        return list(es)
+
+    def deleteItems(self, c, ids):
+        collection = self.asdb[c]
+        r = collection.delete_many({"itemid": {"$in": ids}})
+        return r.deleted_count
+
+    def deleteLogEntriesOlderThan(self, t):
+        collection = self.asdb["log"]
+        # Before MongoDB 5.0 nothing can be deleted from a capped collection, the cap removes the oldest entries
+        if collection.options().get("capped", False):
+            return 0
+        r = collection.delete_many({"t": {"$lt": t}})
+        return r.deleted_count
+
+    def addArchiveEntries(self, c, ids, f):
+        collection = self.asdb["archiveindex"]
+        collection.insert_many([{"itemid": i, "collection": c, "file": f} for i in ids])
+
+    def getArchiveEntry(self, i):
+        collection = self.asdb["archiveindex"]
+        return collection.find_one({"itemid": i}, {"_id": False})
+
+    ##################################################
+    #
+    # Blobs
+    #
+    ##################################################
+
+    def putBlob(self, d, data):
+        # The digest is the GridFS filename. Two processes storing the same blob at once
+        # leave two identical copies, which is harmless
+        if self.asdb["blobs.files"].find_one({"filename": d}, {"_id": True}) is None:
+            self.blobs.upload_from_stream(d, data)
+
+    def getBlob(self, d):
+        try:
+            return self.blobs.open_download_stream_by_name(d).read()
+        except gridfs.errors.NoFile:
+            return None
+
+    ##################################################
+    #
+    # Change Events
+    #
+    ##################################################
+
+    def watch(self, cs, since=None, idle=None):
+        # Change streams need MongoDB to run as a replica set, a single node replica set will do
+        # Changes to a time-series collection, ie: results in the timeseries layout, are not reported
+        # The stream is opened here rather than by the generator, so errors are raised to the caller straight away
+        db = self.asdb
+        options = {}
+        if self.preImages:
+            # Only used for the itemid of deleted items, see PREIMAGES
+            options["full_document_before_change"] = "whenAvailable"
+
+        pipeline = [{"$match": {"ns.coll": {"$in": cs}}}]
+        resume = None
+        if since is not None:
+            resume = {"_data": since}
+        wait = None
+        if idle is not None:
+            wait = int(idle * 1000)
+
+        try:
+            changes = db.watch(
+                pipeline,
+                full_document="updateLookup",
+                resume_after=resume,
+                max_await_time_ms=wait,
+                **options
+            )
+        except pymongo.errors.OperationFailure as err:
+            if err.code == NOTREPLICASET:
+                raise NotImplementedError(self.NAME + ".watch needs a replica set")
+            if since is not None:
+                # Not a token, or one whose change is no longer in the oplog
+                raise ValueError("Invalid change token " + str(since) + " " + str(err))
+            raise
+        return self.changes(changes, idle)
+
+    def changes(self, changes, idle):
+        with changes:
+            while changes.alive:
+                try:
+                    if idle is None:
+                        change = changes.next()
+                    else:
+                        change = changes.try_next()
+                except pymongo.errors.OperationFailure as err:
+                    if err.code == HISTORYLOST:
+                        raise ValueError("Change token no longer in the oplog " + str(err))
+                    raise
+
+                if change is None:
+                    # The resume token moves on even when nothing changes
+                    yield {
+                        "token": changes.resume_token["_data"],
+                        "t": None,
+                        "collection": None,
+                        "op": "idle",
+                        "itemid": None,
+                        "document": None,
+                    }
+                    continue
+
+                d = change.get("fullDocument")
+                if d is not None:
+                    del d["_id"]
+                    itemid = d.get("itemid")
+                else:
+                    itemid = (change.get("fullDocumentBeforeChange") or {}).get("itemid")
+
+                t = None
+                if "clusterTime" in change:
+                    t = float(change["clusterTime"].time)
+
+                yield {
+                    "token": change["_id"]["_data"],
+                    "t": t,
+                    "collection": change["ns"]["coll"],
+                    "op": change["operationType"],
+                    "itemid": itemid,
+                    "document": d,
+                }
+
+    ##################################################
+    #
+    # Generics
+    #
+    ##################################################
+
+    def getDatabaseStatus(self):
+        dbstatus = {}
+
+        for c in basebackend.COLLECTIONS:
+            collection = self.asdb[c]
+            count = collection.estimated_document_count()
+            dbstatus[c] = str(count)
+
+        return dbstatus
+
+    def getExactDatabaseStatus(self):
+        dbstatus = {}
+
+        for c in basebackend.COLLECTIONS:
+            collection = self.asdb[c]
+            count = collection.count_documents({})
+            dbstatus[c] = str(count)
+
+        return dbstatus
+
+    def getClientStatistics(self):
+        return self.clients.getStatistics()
+
+    ##################################################
+    #
+    # Logging
+    #
+    ##################################################
+
+    def writeLogEntry(self, t, ch, op, data):
+        collection = self.asdb["log"]
+
+        e = logEntry(t, ch, op, data)
+
+        r = collection.insert_one(e)
+
+    def newLogEntryKeys(self, n):
+        # Made by the client, so a batch that was partly inserted before an error is not inserted twice
+        return [bson.objectid.ObjectId() for k in range(n)]
+
+    def writeLogEntries(self, ls, keys=None):
+        collection = self.asdb["log"]
+        es = [logEntry(t, ch, op, data) for (t, ch, op, data) in ls]
+        if keys is None:
+            return insertMany(collection, es)
+        for (e, k) in zip(es, keys):
+            e["_id"] = k
+        return insertMany(collection, es, duplicates=True)
+
+    def getLogEntries(self, n, cursor=None, ch=None, op=None):
+        collection = self.asdb["log"]
+
+        q = {}
+        if ch is not None:
+            q["ch"] = ch
+        if op is not None:
+            q["op"] = op
+        if cursor is not None:
+            # Keyset pagination, the cursor is the t and _id of the last entry of the previous page
+            try:
+                (t, i) = cursor.split(":")
+                t = float(t)
+                i = bson.objectid.ObjectId(i)
+            except (ValueError, bson.errors.InvalidId):
+                raise ValueError("Invalid log cursor " + str(cursor))
+            q["t"] = {"$lte": t}
+            q["$or"] = [{"t": {"$lt": t}}, {"_id": {"$lt": i}}]
+
+        # One more than asked for tells us whether there is a next page
+        ls = list(
+            collection.find(q, {"createdAt": False})
+            .sort([("t", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+            .limit(n + 1)
+        )
+
+        next = None
+        if len(ls) > n:
+            ls = ls[:n]
+            next = str(ls[-1]["t"]) + ":" + str(ls[-1]["_id"])
+        for l in ls:
+            del l["_id"]
+
+        return {"entries": ls, "cursor": next}
+
+    def getLatestLogEntries(self, n):
+        return self.getLogEntries(n)["entries"]
+
+    def getLogEntryCount(self):
+        collection = self.asdb["log"]
+        return collection.estimated_document_count()
+
+    ##################################################
+    #
+    # Elements
+    #
+    ##################################################
+
+    def addElement(self, e):
+        collection = self.asdb["elements"]
+        r = collection.insert_one(e)
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def getElement(self, i):
+        collection = self.asdb["elements"]
+        e = collection.find_one({"itemid": i}, {"_id": False})
+        return e
+
+    def getElementByName(self, n):
+        collection = self.asdb["elements"]
+        e = collection.find_one({"name": n}, {"_id": False})
+        return e
+
+    def getElements(self):
+        collection = self.asdb["elements"]
+        e = collection.find({}, {"_id": False, "itemid": True})
+        return list(e)
+
+    def getElementsFull(self):
+        collection = self.asdb["elements"]
+        e = collection.find({}, {"_id": False})
+        return list(e)
+
+    def getElementsByIds(self, ids, fields=None):
+        return self.findByIds("elements", ids, fields)
+
+    def deleteElement(self, e):
+        collection = self.asdb["elements"]
+        r = collection.delete_one({"itemid": e})
+
+        if r.deleted_count == 1:
+            return True
+        else:
+            return False
+
+    def updateElement(self, e):
+        collection = self.asdb["elements"]
+        r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
+
+        if r.matched_count == 1:
+            return True
+        else:
+            return False
+
+    ##################################################
+    #
+    # Policies
+    #
+    ##################################################
+
+    def addPolicy(self, e):
+        collection = self.asdb["policies"]
+
+        r = collection.insert_one(e)
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def getPolicy(self, i):
+        collection = self.asdb["policies"]
+        e = collection.find_one({"itemid": i}, {"_id": False})
+        return e
+
+    def getPolicyByName(self, n):
+        collection = self.asdb["policies"]
+        e = collection.find_one({"name": n}, {"_id": False})
+        return e
+
+    def getPolicies(self):
+        collection = self.asdb["policies"]
+        e = collection.find({}, {"_id": False, "itemid": True})
+        return list(e)
+
+    def getPoliciesFull(self):
+        collection = self.asdb["policies"]
+        e = collection.find({}, {"_id": False})
+        return list(e)
+
+    def getPoliciesByIds(self, ids, fields=None):
+        return self.findByIds("policies", ids, fields)
+
+    def deletePolicy(self, i):
+        collection = self.asdb["policies"]
+        r = collection.delete_one({"itemid": i})
+
+        if r.deleted_count == 1:
+            return True
+        else:
+            return False
+
+    def updatePolicy(self, e):
+        collection = self.asdb["policies"]
+        r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
+
+        if r.matched_count == 1:
+            return True
+        else:
+            return False
+
+    ##################################################
+    #
+    # Hashes
+    #
+    ##################################################
+
+    def addHash(self, h):
+        collection = self.asdb["hashes"]
+        r = collection.insert_one(h)
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def getHash(self, h):
+        collection = self.asdb["hashes"]
+        e = collection.find_one({"hash": h}, {"_id": False})
+        return e
+
+    def getHashes(self):
+        collection = self.asdb["hashes"]
+        e = collection.find({}, {"_id": False, "hash": True})
+        return list(e)
+
+    def getHashesFull(self):
+        collection = self.asdb["hashes"]
+        e = collection.find({}, {"_id": False})
+        return list(e)
+
+    ##################################################
+    #
+    # Expected Values
+    #
+    ##################################################
+
+    def addExpectedValue(self, e):
+        collection = self.asdb["expectedvalues"]
+
+        r = collection.insert_one(e)
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def getExpectedValue(self, i):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find_one({"itemid": i}, {"_id": False})
+        return e
+
+    def getExpectedValues(self):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find({}, {"_id": False, "itemid": True})
+        return list(e)
+
+    def getExpectedValuesFull(self):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find({}, {"_id": False})
+        return list(e)
+
+    def getExpectedValuesForElement(self, i):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find({"elementID": i}, {"_id": False})
+        return list(e)
+
+    def getExpectedValuesForPolicy(self, i):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find({"policyID": i}, {"_id": False})
+        return list(e)
+
+    def getExpectedValueForElementAndPolicy(self, e, p):
+        collection = self.asdb["expectedvalues"]
+        e = collection.find_one({"elementID": e, "policyID": p}, {"_id": False})
+        return e
+
+    def deleteExpectedValue(self, i):
+        collection = self.asdb["expectedvalues"]
+        r = collection.delete_one({"itemid": i})
+
+        if r.deleted_count == 1:
+            return True
+        else:
+            return False
+
+    def updateExpectedValue(self, e):
+        collection = self.asdb["expectedvalues"]
+        r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
+
+        if r.matched_count == 1:
+            return True
+        else:
+            return False
+
+    ##################################################
+    #
+    # Claims
+    #
+    ##################################################
+
+    def addClaim(self, e):
+        collection = self.asdb["claims"]
+
+        r = collection.insert_one(e)
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def addClaims(self, es):
+        collection = self.asdb["claims"]
+        return insertMany(collection, es)
+
+    def getClaim(self, i, fields=None):
+        collection = self.asdb["claims"]
+        projection = {"_id": False}
+        if fields is not None:
+            for f in fields:
+                projection[f] = True
+        e = collection.find_one({"itemid": i}, projection)
+        return e
+
+    def getClaims(self):
+        collection = self.asdb["claims"]
+        e = collection.find({}, {"_id": False, "itemid": True})
+        return list(e)
+
+    def getClaimsFull(self, n):
+        collection = self.asdb["claims"]
+        e = (
+            collection.find({}, {"_id": False})
+            .sort("header.as_requested", pymongo.DESCENDING)
+            .limit(n)
+        )
+        return list(e)
+
+    def getAssociatedResults(self, i):
+        collection = self.asdb["results"]
+        rs = collection.find({"claimID": i}, self.resultsProjection()).sort(
+            self.rf["verifiedAt"], pymongo.DESCENDING
+        )
+        return list(rs)
+
+    ##################################################
+    #
+    # Results
+    #
+    ##################################################
+
+    def addResult(self, e):
+        collection = self.asdb["results"]
+
+        r = collection.insert_one(self.resultDocument(e))
+
+        if r.inserted_id == None:
+            return False
+        else:
+            return True
+
+    def addResults(self, es):
+        collection = self.asdb["results"]
+        return insertMany(collection, [self.resultDocument(e) for e in es])
+
+    def getResult(self, i):
+        collection = self.asdb["results"]
+        e = collection.find_one({"itemid": i}, self.resultsProjection())
+        return e
+
+    def getResults(self):
+        collection = self.asdb["results"]
+        e = collection.find({}, {"_id": False, "itemid": True})
+        return list(e)
+
+    def getResultsSince(self, t, u=None):
+        # Results whose verifiedAt is still a string, ie: before migrateTimestamps, are not returned
+        window = {"$gt": self.resultsTime(t)}
+        if u is not None:
+            window["$lt"] = self.resultsTime(u)
+
+        collection = self.asdb["results"]
+        e = collection.find(
+            {self.rf["verifiedAt"]: window}, self.resultsProjection()
+        ).sort(self.rf["verifiedAt"], pymongo.DESCENDING)
+        return list(e)
+
+    def getResultsFull(self, n):
+        collection = self.asdb["results"]
+        e = (
+            collection.find({}, self.resultsProjection())
+            .sort(self.rf["verifiedAt"], pymongo.DESCENDING)
+            .limit(n)
+        )
+        return list(e)
+
+    def getLatestResultPerElement(self, byPolicy=False, byRule=False):
+        collection = self.asdb["results"]
+
+        # The sort matches an index so the group only reads the first result of each element (and policy)
+        (ef, pf, tf) = (self.rf["elementID"], self.rf["policyID"], self.rf["verifiedAt"])
+        if byPolicy == True:
+            sort = {ef: pymongo.ASCENDING, pf: pymongo.ASCENDING}
+            group = {"e": "$" + ef, "p": "$" + pf}
+            if byRule == True:
+                # Still sorted by the index, the first of each rule is its latest
+                group["r"] = "$ruleName"
+        else:
+            sort = {ef: pymongo.ASCENDING}
+            group = "$" + ef
+        sort[tf] = pymongo.DESCENDING
+
+        rs = collection.aggregate(
+            [
+                {"$sort": sort},
+                {"$group": {"_id": group, "latest": {"$first": "$$ROOT"}}},
+                {"$replaceRoot": {"newRoot": "$latest"}},
+                {"$project": self.resultsProjection()},
+            ]
+        )
+        return list(rs)
+
+    def getResultCounts(self, e, since=None, until=None, bucket=None):
+        collection = self.asdb["results"]
+
+        match = {self.rf["elementID"]: e}
+        tf = self.rf["verifiedAt"]
+        if since is not None or until is not None:
+            match[tf] = {}
+            if since is not None:
+                match[tf]["$gte"] = self.resultsTime(since)
+            if until is not None:
+                match[tf]["$lt"] = self.resultsTime(until)
+
+        group = {"policyID": "$policyID", "result": "$result"}
+        if bucket is not None:
+            # $mod needs a number, results still with a string verifiedAt, see migratetimestamps.py, are left out
+            match.setdefault("verifiedAt", {})["$type"] = "number"
+            group["bucket"] = {
+                "$subtract": ["$verifiedAt", {"$mod": ["$verifiedAt", bucket]}]
+            }
+
+        cs = collection.aggregate(
+            [
+                {"$match": match},
+                {"$group": {"_id": group, "count": {"$sum": 1}}},
+                {"$sort": {"_id.policyID": 1, "_id.bucket": 1, "_id.result": 1}},
+            ]
+        )
+        return [
+            {
+                "policyID": c["_id"]["policyID"],
+                "result": c["_id"]["result"],
+                "bucket": c["_id"].get("bucket"),
+                "count": c["count"],
+            }
+            for c in cs
+        ]
+
+    def getLatestResultCounts(self, e, p, n):
+        collection = self.asdb["results"]
+        cs = collection.aggregate(
+            [
+                {"$match": {self.rf["elementID"]: e, self.rf["policyID"]: p}},
+                {"$sort": {self.rf["verifiedAt"]: pymongo.DESCENDING}},
+                {"$limit": n},
+                {"$group": {"_id": "$result", "count": {"$sum": 1}}},
+            ]
+        )
+        return {c["_id"]: c["count"] for c in cs}
+
+    def getLatestResults(self, e, n):
+        collection = self.asdb["results"]
+        rs = list(
+            collection.find({self.rf["elementID"]: e}, self.resultsProjection())
+            .sort(self.rf["verifiedAt"], pymongo.DESCENDING)
+            .limit(n)
+        )
+        return rs
+
+    def getLatestResultsForElementAndPolicy(self, e, p, n):
+        collection = self.asdb["results"]
+        q = {self.rf["elementID"]: e, self.rf["policyID"]: p}
+        projection = None
+        if self.timeseries:
+            projection = {"ts": False, "meta": False}
+        rs = list(
+            collection.find(q, projection)
+            .sort(self.rf["verifiedAt"], pymongo.DESCENDING)
+            .limit(n)
+        )
+        return rs
+
+    ##################################################
+    #
+    # Element Status
+    #
+    ##################################################
+
+    def updateElementStatus(self, rs):
+        # The filter only matches a status older than the result. If there is a newer one the
+        # upsert tries to insert a second status for the element, policy and rule, which the unique
+        # index refuses, so an out of order result never replaces a newer one
+        collection = self.asdb["elementstatus"]
+        ops = []
+        for r in rs:
+            s = basebackend.elementStatusEntry(r)
+            ops.append(
+                pymongo.UpdateOne(
+                    {
+                        "elementID": s["elementID"],
+                        "policyID": s["policyID"],
+                        "ruleName": s["ruleName"],
+                        "verifiedAt": {"$lt": s["verifiedAt"]},
+                    },
+                    {"$set": s},
+                    upsert=True,
+                )
+            )
+        if ops == []:
+            return
+
+        try:
+            collection.bulk_write(ops, ordered=False)
+        except pymongo.errors.BulkWriteError as err:
+            others = [w for w in err.details["writeErrors"] if w["code"] != 11000]
+            if others != []:
+                raise
+
+    def getElementStatus(self, e=None):
+        collection = self.asdb["elementstatus"]
+        q = {}
+        if e is not None:
+            q["elementID"] = e
+        ss = collection.find(q, {"_id": False}).sort(
+            [
+                ("elementID", pymongo.ASCENDING),
+                ("policyID", pymongo.ASCENDING),
+                ("ruleName", pymongo.ASCENDING),
+            ]
+        )
+        return list(ss)
+
+    def deleteElementStatus(self, e=None, p=None):
+        collection = self.asdb["elementstatus"]
+        q = {}
+        if e is not None:
+            q["elementID"] = e
+        if p is not None:
+            q["policyID"] = p
+        if q == {}:
+            return
+        collection.delete_many(q)
+
+    ##################################################
+    #
+    # Schedule
+    #
+    ##################################################
+
+    def updateScheduleEntries(self, ss):
+        collection = self.asdb["schedule"]
+        ops = [
+            pymongo.ReplaceOne(
+                {"elementID": s["elementID"], "policyID": s["policyID"]}, s, upsert=True
+            )
+            for s in ss
+        ]
+        if ops != []:
+            collection.bulk_write(ops, ordered=False)
+
+    def getScheduleEntries(self, e=None):
+        collection = self.asdb["schedule"]
+        q = {}
+        if e is not None:
+            q["elementID"] = e
+        return list(collection.find(q, {"_id": False}))
+
+    def getDueScheduleEntries(self, t, n):
+        collection = self.asdb["schedule"]
+        ss = (
+            collection.find({"due": {"$lte": t}}, {"_id": False})
+            .sort("due", pymongo.ASCENDING)
+            .limit(n)
+        )
+        return list(ss)
+
+    def deleteScheduleEntry(self, e, p):
+        collection = self.asdb["schedule"]
+        collection.delete_one({"elementID": e, "policyID": p})
@@ -0,0 +1,190 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""The MongoDB client used by the mongo storage backend.
+
+   The client is created on first use rather than when a10.asvr is imported, so tools which never touch the
+   database never connect to it. A MongoClient must not be used across a fork, so a process which finds it
+   was forked, eg: a worker of a pre-forking server, creates its own client. The pool, timeouts, read
+   preference and write concern are read from the [mongo] section of /etc/a10.conf.
+"""
+
+import os
+import threading
+
+import pymongo
+import pymongo.monitoring
+
+
+# Options of the [mongo] section and the MongoClient arguments they become, 0 means the driver's default
+CLIENTOPTIONS = {
+    "maxpoolsize": "maxPoolSize",
+    "minpoolsize": "minPoolSize",
+    "maxidletimems": "maxIdleTimeMS",
+    "connecttimeoutms": "connectTimeoutMS",
+    "sockettimeoutms": "socketTimeoutMS",
+    "serverselectiontimeoutms": "serverSelectionTimeoutMS",
+    "waitqueuetimeoutms": "waitQueueTimeoutMS",
+    "wtimeoutms": "wTimeoutMS",
+}
+
+
+class PoolStatistics(pymongo.monitoring.ConnectionPoolListener):
+    """Counts the connection pool events of a client"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {
+            "created": 0,
+            "closed": 0,
+            "checkoutsstarted": 0,
+            "checkedout": 0,
+            "checkedin": 0,
+            "checkoutfailures": 0,
+            "cleared": 0,
+        }
+
+    def count(self, k):
+        with self.lock:
+            self.counts[k] = self.counts[k] + 1
+
+    def get(self):
+        with self.lock:
+            s = dict(self.counts)
+        s["open"] = s["created"] - s["closed"]
+        s["inuse"] = s["checkedout"] - s["checkedin"]
+        s["waiting"] = s["checkoutsstarted"] - s["checkedout"] - s["checkoutfailures"]
+        return s
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.count("cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.count("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.count("closed")
+
+    def connection_check_out_started(self, event):
+        self.count("checkoutsstarted")
+
+    def connection_check_out_failed(self, event):
+        self.count("checkoutfailures")
+
+    def connection_checked_out(self, event):
+        self.count("checkedout")
+
+    def connection_checked_in(self, event):
+        self.count("checkedin")
+
+
+def clientArguments(settings):
+    """ Returns the arguments for MongoClient given the settings of the [mongo] section
+
+	:param dict settings: the database settings, see a10.asvr.db.configuration.DATABASESETTINGS
+	:rtype: dict
+	"""
+
+    options = settings.get("mongoclient", {})
+    args = {}
+    for k, a in CLIENTOPTIONS.items():
+        v = options.get(k, 0)
+        if v > 0:
+            args[a] = v
+
+    if options.get("readpreference", "") != "":
+        args["readPreference"] = options["readpreference"]
+
+    w = options.get("writeconcern", "")
+    if w != "":
+        if w.isdigit():
+            args["w"] = int(w)
+        else:
+            args["w"] = w
+
+    # No connection is made until the first operation
+    args["connect"] = False
+    return args
+
+
+class ClientManager:
+    def __init__(self, settings):
+        """
+	   Initialises the manager, no client is created until database is called
+
+	   :param dict settings: the database settings, see a10.asvr.db.configuration.DATABASESETTINGS
+		"""
+
+        self.settings = settings
+        self.arguments = clientArguments(settings)
+        self.lock = threading.Lock()
+        self.client = None
+        self.pid = None
+        self.statistics = None
+        self.connects = 0
+
+    def database(self):
+        """ Returns the database, creating the client if this process does not have one
+
+	:rtype: pymongo.database.Database
+	"""
+
+        pid = os.getpid()
+        if self.client is None or self.pid != pid:
+            if self.pid is not None and self.pid != pid:
+                # A lock held by another thread when the process forked is never released in the child
+                self.lock = threading.Lock()
+            with self.lock:
+                if self.client is None or self.pid != pid:
+                    # A client inherited over a fork is abandoned rather than closed, its
+                    # sockets are shared with the parent
+                    self.statistics = PoolStatistics()
+                    self.client = pymongo.MongoClient(
+                        self.settings["mongodburl"],
+                        event_listeners=[self.statistics],
+                        **self.arguments
+                    )
+                    self.pid = pid
+                    self.connects = self.connects + 1
+
+        return self.client[self.settings["mongodbname"]]
+
+    def close(self):
+        """ Closes the client of this process, the next call to database creates a new one
+		"""
+
+        with self.lock:
+            if self.client is not None and self.pid == os.getpid():
+                self.client.close()
+            self.client = None
+            self.pid = None
+
+    def getStatistics(self):
+        """ Returns the settings and connection pool statistics of the client
+
+	:return: the counts of pool events since the client was created and the open, in use and waiting connections
+	:rtype: dict
+	"""
+
+        s = {
+            "pid": os.getpid(),
+            "connected": self.client is not None and self.pid == os.getpid(),
+            "clients": self.connects,
+            "arguments": {k: v for k, v in self.arguments.items() if k != "connect"},
+        }
+        if s["connected"]:
+            s["pool"] = self.statistics.get()
+        return s
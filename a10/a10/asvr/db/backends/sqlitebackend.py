@@ -0,0 +1,825 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+import collections
+import contextlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+
+from a10.asvr.db.backends import basebackend
+
+
+# Each collection is a table holding the document as JSON in the doc column. The fields
+# that are queried or sorted on are copied into their own columns so that they can be indexed.
+# Entries are (column, path of the field in the document, SQLite type)
+
+COLUMNS = {
+    "elements": [("itemid", "itemid", "TEXT"), ("name", "name", "TEXT")],
+    "policies": [("itemid", "itemid", "TEXT"), ("name", "name", "TEXT")],
+    "expectedvalues": [
+        ("itemid", "itemid", "TEXT"),
+        ("elementID", "elementID", "TEXT"),
+        ("policyID", "policyID", "TEXT"),
+    ],
+    "claims": [
+        ("itemid", "itemid", "TEXT"),
+        ("as_requested", "header.as_requested", "REAL"),
+        ("elementID", "header.element.itemid", "TEXT"),
+        ("policyID", "header.policy.itemid", "TEXT"),
+    ],
+    "results": [
+        ("itemid", "itemid", "TEXT"),
+        ("elementID", "elementID", "TEXT"),
+        ("policyID", "policyID", "TEXT"),
+        ("claimID", "claimID", "TEXT"),
+        ("verifiedAt", "verifiedAt", "REAL"),
+    ],
+    "hashes": [("hash", "hash", "TEXT")],
+    "log": [("t", "t", "REAL"), ("ch", "ch", "TEXT"), ("op", "op", "TEXT")],
+    "archiveindex": [
+        ("itemid", "itemid", "TEXT"),
+        ("collection", "collection", "TEXT"),
+        ("file", "file", "TEXT"),
+    ],
+    "elementstatus": [
+        ("elementID", "elementID", "TEXT"),
+        ("policyID", "policyID", "TEXT"),
+        ("verifiedAt", "verifiedAt", "REAL"),
+        ("ruleName", "ruleName", "TEXT"),
+    ],
+    "schedule": [
+        ("elementID", "elementID", "TEXT"),
+        ("policyID", "policyID", "TEXT"),
+        ("due", "due", "REAL"),
+    ],
+}
+
+# The same indexes as the MongoDB backend, see tests/sqliteBackendTests.py
+
+INDEXES = {
+    "elements": [["itemid"], ["name"]],
+    "policies": [["itemid"], ["name"]],
+    "expectedvalues": [["itemid"], ["elementID", "policyID"], ["policyID"]],
+    "claims": [
+        ["itemid"],
+        ["as_requested DESC"],
+        ["elementID", "policyID", "as_requested DESC"],
+    ],
+    "results": [
+        ["itemid"],
+        ["elementID", "policyID", "verifiedAt DESC"],
+        ["elementID", "verifiedAt DESC"],
+        ["claimID", "verifiedAt DESC"],
+        ["verifiedAt DESC"],
+    ],
+    "hashes": [["hash"]],
+    "log": [["t DESC", "id DESC"], ["ch", "t DESC", "id DESC"], ["op", "t DESC", "id DESC"]],
+    "archiveindex": [["itemid"]],
+    "elementstatus": [["policyID"]],
+    "schedule": [["due"]],
+}
+
+UNIQUEINDEXES = {
+    "elementstatus": [["elementID", "policyID", "ruleName"]],
+    "schedule": [["elementID", "policyID"]],
+}
+
+# Indexes replaced by those above, dropped when the tables are created
+DROPPEDINDEXES = ["elementstatus_elementID_policyID"]
+
+# The time column used to prune claims and results, both are also pruned per elementID and policyID
+RETENTIONCOLUMNS = {"claims": "as_requested", "results": "verifiedAt"}
+
+# Used to give each in-memory database its own name
+memorydatabases = itertools.count()
+
+
+class SQLiteBackend(basebackend.BaseBackend):
+    NAME = "sqlite"
+
+    def __init__(self, settings):
+        super().__init__(settings)
+
+        path = settings["sqlitepath"]
+        self.memory = path == ":memory:"
+        if self.memory:
+            # A named shared in-memory database so that every thread sees the same data
+            self.database = (
+                "file:a10memory" + str(next(memorydatabases)) + "?mode=memory&cache=shared"
+            )
+        else:
+            self.database = path
+
+        self.local = threading.local()
+        self.pid = None
+        self.opened = 0
+        self.anchor = None
+        self.indexed = False
+
+    def connection(self):
+        """ Returns the connection for the calling thread, opening it if necessary
+
+	The database is opened on first use rather than at import. Connections are not used across a fork,
+	a forked process opens its own.
+
+	:return: a connection in autocommit mode, transactions are made explicitly with transaction()
+	:rtype: sqlite3.Connection
+	"""
+
+        if self.pid != os.getpid():
+            self.local = threading.local()
+            self.pid = os.getpid()
+            self.opened = 0
+
+        c = getattr(self.local, "connection", None)
+        if c is None:
+            c = sqlite3.connect(
+                self.database,
+                uri=self.memory,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            if not self.memory:
+                c.execute("PRAGMA journal_mode=WAL")
+                c.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = c
+            self.opened = self.opened + 1
+
+            if self.anchor is None:
+                # In-memory databases disappear with their last connection so we hold on to this one
+                self.anchor = c
+            if not self.indexed:
+                self.indexed = True
+                self.createIndexes()
+        return c
+
+    @contextlib.contextmanager
+    def transaction(self):
+        c = self.connection()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        c.execute("COMMIT")
+
+    ##################################################
+    #
+    # Helpers
+    #
+    ##################################################
+
+    def fieldValue(self, d, path):
+        for k in path.split("."):
+            if not isinstance(d, dict) or k not in d:
+                return None
+            d = d[k]
+
+        if d is None or isinstance(d, (str, int, float)):
+            return d
+        else:
+            return json.dumps(d, default=str)
+
+    def row(self, t, e):
+        return [self.fieldValue(e, p) for (n, p, ty) in COLUMNS[t]] + [
+            json.dumps(e, default=str)
+        ]
+
+    def insert(self, t, e):
+        columns = [n for (n, p, ty) in COLUMNS[t]] + ["doc"]
+        q = "INSERT INTO {} ({}) VALUES ({})".format(
+            t, ", ".join(columns), ", ".join(["?"] * len(columns))
+        )
+        with self.transaction() as c:
+            r = c.execute(q, self.row(t, e))
+        return r.rowcount == 1
+
+    def insertMany(self, t, es):
+        # One transaction for the batch, but a failure of one document does not stop the rest
+        # Returns one entry per document, None if inserted otherwise the error message
+        columns = [n for (n, p, ty) in COLUMNS[t]] + ["doc"]
+        q = "INSERT INTO {} ({}) VALUES ({})".format(
+            t, ", ".join(columns), ", ".join(["?"] * len(columns))
+        )
+
+        errors = []
+        with self.transaction() as c:
+            for e in es:
+                try:
+                    c.execute(q, self.row(t, e))
+                    errors.append(None)
+                except (sqlite3.Error, TypeError, ValueError) as err:
+                    errors.append(str(err))
+        return errors
+
+    def select(self, t, where="", params=(), order="", limit=None, offset=0):
+        q = "SELECT doc FROM " + t
+        if where != "":
+            q = q + " WHERE " + where
+        if order != "":
+            q = q + " ORDER BY " + order
+        if limit is not None:
+            q = q + " LIMIT ? OFFSET ?"
+            params = tuple(params) + (limit, offset)
+        return [json.loads(r[0]) for r in self.connection().execute(q, params)]
+
+    def selectOne(self, t, where, params):
+        rs = self.select(t, where, params, limit=1)
+        if rs == []:
+            return None
+        else:
+            return rs[0]
+
+    def selectByIds(self, t, ids, fields=None):
+        # In chunks to stay below SQLite's limit on the number of parameters
+        ids = list(ids)
+        es = []
+        for k in range(0, len(ids), 500):
+            chunk = ids[k : k + 500]
+            es = es + self.select(
+                t, "itemid IN ({})".format(", ".join(["?"] * len(chunk))), chunk
+            )
+        if fields is not None:
+            es = [basebackend.project(e, ["itemid"] + list(fields)) for e in es]
+        return es
+
+    def selectColumn(self, t, column):
+        q = "SELECT {} FROM {}".format(column, t)
+        return [{column: r[0]} for r in self.connection().execute(q)]
+
+    def count(self, t):
+        return self.connection().execute("SELECT count(*) FROM " + t).fetchone()[0]
+
+    def estimatedCount(self, t):
+        # min and max of the primary key are read from either end of the table's b-tree,
+        # rows deleted from the middle are still counted
+        r = self.connection().execute(
+            "SELECT max(id) - min(id) + 1 FROM " + t
+        ).fetchone()[0]
+        if r is None:
+            return 0
+        else:
+            return r
+
+    def delete(self, t, column, v):
+        q = "DELETE FROM {0} WHERE id IN (SELECT id FROM {0} WHERE {1} = ? LIMIT 1)".format(
+            t, column
+        )
+        with self.transaction() as c:
+            r = c.execute(q, (v,))
+        return r.rowcount == 1
+
+    def update(self, t, e):
+        # The same semantics as MongoDB's $set, ie: the top level fields of e replace those stored
+        with self.transaction() as c:
+            r = c.execute(
+                "SELECT id, doc FROM {} WHERE itemid = ? LIMIT 1".format(t),
+                (e["itemid"],),
+            ).fetchone()
+            if r is None:
+                return False
+
+            d = json.loads(r[1])
+            d.update(e)
+
+            columns = [n for (n, p, ty) in COLUMNS[t]] + ["doc"]
+            q = "UPDATE {} SET {} WHERE id = ?".format(
+                t, ", ".join([n + " = ?" for n in columns])
+            )
+            c.execute(q, self.row(t, d) + [r[0]])
+        return True
+
+    ##################################################
+    #
+    # Indexes and Migration
+    #
+    ##################################################
+
+    def createIndexes(self):
+        # Also creates the tables
+        created = {}
+
+        with self.transaction() as c:
+            for t, columns in COLUMNS.items():
+                cs = ", ".join([n + " " + ty for (n, p, ty) in columns])
+                c.execute(
+                    "CREATE TABLE IF NOT EXISTS {} (id INTEGER PRIMARY KEY, {}, doc TEXT NOT NULL)".format(
+                        t, cs
+                    )
+                )
+
+                # Columns added since the table was created are filled in from the documents
+                existing = [r[1] for r in c.execute("PRAGMA table_info({})".format(t))]
+                for (n, p, ty) in columns:
+                    if n not in existing:
+                        c.execute("ALTER TABLE {} ADD COLUMN {} {}".format(t, n, ty))
+                        c.execute(
+                            "UPDATE {} SET {} = json_extract(doc, ?)".format(t, n),
+                            ("$." + p,),
+                        )
+
+                created[t] = []
+                for keys in INDEXES[t]:
+                    name = t + "_" + "_".join([k.split()[0] for k in keys])
+                    c.execute(
+                        "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                            name, t, ", ".join(keys)
+                        )
+                    )
+                    created[t].append(name)
+
+                for keys in UNIQUEINDEXES.get(t, []):
+                    name = t + "_" + "_".join(keys)
+                    c.execute(
+                        "CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                            name, t, ", ".join(keys)
+                        )
+                    )
+                    created[t].append(name)
+
+            for name in DROPPEDINDEXES:
+                c.execute("DROP INDEX IF EXISTS " + name)
+
+            # Blobs are binary and are not stored as documents
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL)"
+            )
+
+        return created
+
+    def migrateTimestamps(self, batchsize=1000):
+        # Timestamps have always been stored as numbers in this backend
+        return {t: 0 for t in ["claims", "results", "log"]}
+
+    ##################################################
+    #
+    # Retention and Archive
+    #
+    ##################################################
+
+    def getItemsOlderThan(self, c, t, n):
+        tc = RETENTIONCOLUMNS[c]
+        return self.select(c, tc + " < ?", (t,), order=tc + " ASC", limit=n)
+
+    def getElementPolicyPairs(self, c):
+        pairs = self.connection().execute(
+            "SELECT DISTINCT elementID, policyID FROM " + c
+        ).fetchall()
+        return [(e, p) for (e, p) in pairs]
+
+    def getItemsBeyondCount(self, c, e, p, keep, n):
+        tc = RETENTIONCOLUMNS[c]
+        return self.select(
+            c,
+            "elementID IS ? AND policyID IS ?",
+            (e, p),
+            order=tc + " DESC",
+            limit=n,
+            offset=keep,
+        )
+
+    def deleteItems(self, c, ids):
+        deleted = 0
+        with self.transaction() as cn:
+            # In chunks to stay below SQLite's limit on the number of parameters
+            for k in range(0, len(ids), 500):
+                chunk = ids[k : k + 500]
+                r = cn.execute(
+                    "DELETE FROM {} WHERE itemid IN ({})".format(
+                        c, ", ".join(["?"] * len(chunk))
+                    ),
+                    chunk,
+                )
+                deleted = deleted + r.rowcount
+        return deleted
+
+    def deleteLogEntriesOlderThan(self, t):
+        with self.transaction() as c:
+            r = c.execute("DELETE FROM log WHERE t < ?", (t,))
+        return r.rowcount
+
+    def addArchiveEntries(self, c, ids, f):
+        self.insertMany(
+            "archiveindex", [{"itemid": i, "collection": c, "file": f} for i in ids]
+        )
+
+    def getArchiveEntry(self, i):
+        return self.selectOne("archiveindex", "itemid = ?", (i,))
+
+    ##################################################
+    #
+    # Blobs
+    #
+    ##################################################
+
+    def putBlob(self, d, data):
+        with self.transaction() as c:
+            c.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (d, data))
+
+    def getBlob(self, d):
+        r = self.connection().execute(
+            "SELECT data FROM blobs WHERE digest = ?", (d,)
+        ).fetchone()
+        if r is None:
+            return None
+        else:
+            return bytes(r[0])
+
+    ##################################################
+    #
+    # Generics
+    #
+    ##################################################
+
+    def getDatabaseStatus(self):
+        dbstatus = {}
+
+        for t in basebackend.COLLECTIONS:
+            dbstatus[t] = str(self.estimatedCount(t))
+
+        return dbstatus
+
+    def getExactDatabaseStatus(self):
+        dbstatus = {}
+
+        for t in basebackend.COLLECTIONS:
+            dbstatus[t] = str(self.count(t))
+
+        return dbstatus
+
+    def getClientStatistics(self):
+        return {
+            "pid": os.getpid(),
+            "connected": self.pid == os.getpid(),
+            "connections": self.opened,
+        }
+
+    ##################################################
+    #
+    # Logging
+    #
+    ##################################################
+
+    def writeLogEntry(self, t, ch, op, data):
+        self.insert("log", {"t": t, "ch": ch, "op": op, "data": data})
+
+    def newLogEntryKeys(self, n):
+        # A batch is one transaction, it is written completely or not at all
+        return [None] * n
+
+    def writeLogEntries(self, ls, keys=None):
+        es = [{"t": t, "ch": ch, "op": op, "data": data} for (t, ch, op, data) in ls]
+        return self.insertMany("log", es)
+
+    def getLogEntries(self, n, cursor=None, ch=None, op=None):
+        where = []
+        params = []
+        if ch is not None:
+            where.append("ch = ?")
+            params.append(ch)
+        if op is not None:
+            where.append("op = ?")
+            params.append(op)
+        if cursor is not None:
+            # Keyset pagination, the cursor is the t and id of the last entry of the previous page
+            try:
+                (t, i) = cursor.split(":")
+                params = params + [float(t), int(i)]
+            except ValueError:
+                raise ValueError("Invalid log cursor " + str(cursor))
+            where.append("(t, id) < (?, ?)")
+
+        q = "SELECT id, t, doc FROM log"
+        if where != []:
+            q = q + " WHERE " + " AND ".join(where)
+        q = q + " ORDER BY t DESC, id DESC LIMIT ?"
+
+        # One more than asked for tells us whether there is a next page
+        rs = self.connection().execute(q, params + [n + 1]).fetchall()
+
+        next = None
+        if len(rs) > n:
+            rs = rs[:n]
+            next = str(rs[-1][1]) + ":" + str(rs[-1][0])
+
+        return {"entries": [json.loads(r[2]) for r in rs], "cursor": next}
+
+    def getLatestLogEntries(self, n):
+        return self.getLogEntries(n)["entries"]
+
+    def getLogEntryCount(self):
+        return self.estimatedCount("log")
+
+    ##################################################
+    #
+    # Elements
+    #
+    ##################################################
+
+    def addElement(self, e):
+        return self.insert("elements", e)
+
+    def getElement(self, i):
+        return self.selectOne("elements", "itemid = ?", (i,))
+
+    def getElementByName(self, n):
+        return self.selectOne("elements", "name = ?", (n,))
+
+    def getElements(self):
+        return self.selectColumn("elements", "itemid")
+
+    def getElementsFull(self):
+        return self.select("elements")
+
+    def getElementsByIds(self, ids, fields=None):
+        return self.selectByIds("elements", ids, fields)
+
+    def deleteElement(self, e):
+        return self.delete("elements", "itemid", e)
+
+    def updateElement(self, e):
+        return self.update("elements", e)
+
+    ##################################################
+    #
+    # Policies
+    #
+    ##################################################
+
+    def addPolicy(self, e):
+        return self.insert("policies", e)
+
+    def getPolicy(self, i):
+        return self.selectOne("policies", "itemid = ?", (i,))
+
+    def getPolicyByName(self, n):
+        return self.selectOne("policies", "name = ?", (n,))
+
+    def getPolicies(self):
+        return self.selectColumn("policies", "itemid")
+
+    def getPoliciesFull(self):
+        return self.select("policies")
+
+    def getPoliciesByIds(self, ids, fields=None):
+        return self.selectByIds("policies", ids, fields)
+
+    def deletePolicy(self, i):
+        return self.delete("policies", "itemid", i)
+
+    def updatePolicy(self, e):
+        return self.update("policies", e)
+
+    ##################################################
+    #
+    # Hashes
+    #
+    ##################################################
+
+    def addHash(self, h):
+        return self.insert("hashes", h)
+
+    def getHash(self, h):
+        return self.selectOne("hashes", "hash = ?", (h,))
+
+    def getHashes(self):
+        return self.selectColumn("hashes", "hash")
+
+    def getHashesFull(self):
+        return self.select("hashes")
+
+    ##################################################
+    #
+    # Expected Values
+    #
+    ##################################################
+
+    def addExpectedValue(self, e):
+        return self.insert("expectedvalues", e)
+
+    def getExpectedValue(self, i):
+        return self.selectOne("expectedvalues", "itemid = ?", (i,))
+
+    def getExpectedValues(self):
+        return self.selectColumn("expectedvalues", "itemid")
+
+    def getExpectedValuesFull(self):
+        return self.select("expectedvalues")
+
+    def getExpectedValuesForElement(self, i):
+        return self.select("expectedvalues", "elementID = ?", (i,))
+
+    def getExpectedValuesForPolicy(self, i):
+        return self.select("expectedvalues", "policyID = ?", (i,))
+
+    def getExpectedValueForElementAndPolicy(self, e, p):
+        return self.selectOne("expectedvalues", "elementID = ? AND policyID = ?", (e, p))
+
+    def deleteExpectedValue(self, i):
+        return self.delete("expectedvalues", "itemid", i)
+
+    def updateExpectedValue(self, e):
+        return self.update("expectedvalues", e)
+
+    ##################################################
+    #
+    # Claims
+    #
+    ##################################################
+
+    def addClaim(self, e):
+        return self.insert("claims", e)
+
+    def addClaims(self, es):
+        return self.insertMany("claims", es)
+
+    def getClaim(self, i, fields=None):
+        e = self.selectOne("claims", "itemid = ?", (i,))
+        if e is None or fields is None:
+            return e
+        return basebackend.project(e, fields)
+
+    def getClaims(self):
+        return self.selectColumn("claims", "itemid")
+
+    def getClaimsFull(self, n):
+        return self.select("claims", order="as_requested DESC", limit=n)
+
+    def getAssociatedResults(self, i):
+        return self.select("results", "claimID = ?", (i,), order="verifiedAt DESC")
+
+    ##################################################
+    #
+    # Results
+    #
+    ##################################################
+
+    def addResult(self, e):
+        return self.insert("results", e)
+
+    def addResults(self, es):
+        return self.insertMany("results", es)
+
+    def getResult(self, i):
+        return self.selectOne("results", "itemid = ?", (i,))
+
+    def getResults(self):
+        return self.selectColumn("results", "itemid")
+
+    def getResultsSince(self, t, u=None):
+        if u is None:
+            return self.select("results", "verifiedAt > ?", (t,), order="verifiedAt DESC")
+        else:
+            return self.select(
+                "results",
+                "verifiedAt > ? AND verifiedAt < ?",
+                (t, u),
+                order="verifiedAt DESC",
+            )
+
+    def getResultsFull(self, n):
+        return self.select("results", order="verifiedAt DESC", limit=n)
+
+    def getLatestResultPerElement(self, byPolicy=False, byRule=False):
+        # With max() SQLite takes the other columns, here doc, from the row holding the maximum
+        group = "elementID"
+        if byPolicy == True:
+            group = "elementID, policyID"
+            if byRule == True:
+                group = group + ", json_extract(doc, '$.ruleName')"
+        q = "SELECT doc, max(verifiedAt) FROM results GROUP BY " + group
+        return [json.loads(r[0]) for r in self.connection().execute(q)]
+
+    def getResultCounts(self, e, since=None, until=None, bucket=None):
+        where = ["elementID = ?"]
+        params = [e]
+        if since is not None:
+            where.append("verifiedAt >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("verifiedAt < ?")
+            params.append(until)
+
+        b = "NULL"
+        if bucket is not None:
+            # SQLite's % is an integer operation so the bucket is found by division
+            b = "CAST(verifiedAt / ? AS INTEGER) * ?"
+            params = [bucket, bucket] + params
+
+        q = (
+            "SELECT policyID, json_extract(doc, '$.result') AS result, {} AS bucket, count(*) FROM results"
+            " WHERE {} GROUP BY policyID, result, bucket ORDER BY policyID, bucket, result"
+        ).format(b, " AND ".join(where))
+
+        return [
+            {"policyID": r[0], "result": r[1], "bucket": r[2], "count": r[3]}
+            for r in self.connection().execute(q, params)
+        ]
+
+    def getLatestResultCounts(self, e, p, n):
+        # Only the result codes are read, grouping at most n rows in SQLite would need a temporary b-tree
+        q = (
+            "SELECT json_extract(doc, '$.result') FROM results"
+            " WHERE elementID = ? AND policyID = ? ORDER BY verifiedAt DESC LIMIT ?"
+        )
+        return dict(collections.Counter(r[0] for r in self.connection().execute(q, (e, p, n))))
+
+    def getLatestResults(self, e, n):
+        return self.select(
+            "results", "elementID = ?", (e,), order="verifiedAt DESC", limit=n
+        )
+
+    def getLatestResultsForElementAndPolicy(self, e, p, n):
+        return self.select(
+            "results",
+            "elementID = ? AND policyID = ?",
+            (e, p),
+            order="verifiedAt DESC",
+            limit=n,
+        )
+
+    ##################################################
+    #
+    # Element Status
+    #
+    ##################################################
+
+    def updateElementStatus(self, rs):
+        # An out of order result never replaces a newer one
+        q = (
+            "INSERT INTO elementstatus (elementID, policyID, ruleName, verifiedAt, doc) VALUES (?, ?, ?, ?, ?) "
+            + "ON CONFLICT (elementID, policyID, ruleName) DO UPDATE SET verifiedAt = excluded.verifiedAt, doc = excluded.doc "
+            + "WHERE excluded.verifiedAt > elementstatus.verifiedAt"
+        )
+        with self.transaction() as c:
+            for r in rs:
+                s = basebackend.elementStatusEntry(r)
+                c.execute(
+                    q,
+                    (
+                        s["elementID"],
+                        s["policyID"],
+                        s["ruleName"],
+                        s["verifiedAt"],
+                        json.dumps(s, default=str),
+                    ),
+                )
+
+    def getElementStatus(self, e=None):
+        if e is None:
+            return self.select("elementstatus", order="elementID, policyID, ruleName")
+        return self.select(
+            "elementstatus", "elementID = ?", (e,), order="elementID, policyID, ruleName"
+        )
+
+    def deleteElementStatus(self, e=None, p=None):
+        where = []
+        params = []
+        if e is not None:
+            where.append("elementID = ?")
+            params.append(e)
+        if p is not None:
+            where.append("policyID = ?")
+            params.append(p)
+        if where == []:
+            return
+        with self.transaction() as c:
+            c.execute("DELETE FROM elementstatus WHERE " + " AND ".join(where), params)
+
+    ##################################################
+    #
+    # Schedule
+    #
+    ##################################################
+
+    def updateScheduleEntries(self, ss):
+        q = (
+            "INSERT INTO schedule (elementID, policyID, due, doc) VALUES (?, ?, ?, ?) "
+            + "ON CONFLICT (elementID, policyID) DO UPDATE SET due = excluded.due, doc = excluded.doc"
+        )
+        with self.transaction() as c:
+            for s in ss:
+                c.execute(
+                    q,
+                    (s["elementID"], s["policyID"], s["due"], json.dumps(s, default=str)),
+                )
+
+    def getScheduleEntries(self, e=None):
+        if e is None:
+            return self.select("schedule")
+        return self.select("schedule", "elementID = ?", (e,))
+
+    def getDueScheduleEntries(self, t, n):
+        return self.select("schedule", "due <= ?", (t,), order="due", limit=n)
+
+    def deleteScheduleEntry(self, e, p):
+        with self.transaction() as c:
+            c.execute(
+                "DELETE FROM schedule WHERE elementID = ? AND policyID = ?", (e, p)
+            )
@@ -0,0 +1,147 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""A content addressed store for large claim payload items, eg: UEFI event logs.
+
+   Such items are usually identical from one claim to the next, so each is stored once, zlib compressed and
+   keyed by the sha256 digest of its raw bytes. Base85 encoded items are stored as the decoded bytes. The claim
+   holds a reference in place of the item:
+
+       {"blob": <sha256 digest in hex>, "encoding": "base85/utf-8" or "utf-8", "size": <size of the raw bytes>}
+
+   Blobs are kept in the directory given by blobdirectory in the [database] section of /etc/a10.conf, or by the
+   storage backend if that is not set.
+"""
+
+import base64
+import hashlib
+import os
+import tempfile
+import zlib
+
+import a10.asvr.db.configuration
+import a10.asvr.db.core
+
+
+def putBlob(data):
+    """ Stores binary data, unless the same data is already stored
+
+	:param bytes data: the data
+	:return: the sha256 digest of the data in hex
+	:rtype: str
+	"""
+
+    d = hashlib.sha256(data).hexdigest()
+    z = zlib.compress(data)
+
+    directory = a10.asvr.db.configuration.BLOBDIRECTORY
+    if directory == "":
+        a10.asvr.db.core.backend.putBlob(d, z)
+        return d
+
+    f = os.path.join(directory, d[0:2], d + ".z")
+    if not os.path.exists(f):
+        os.makedirs(os.path.dirname(f), exist_ok=True)
+        # Written to a temporary file first so that a blob is never seen half written
+        (fd, tmp) = tempfile.mkstemp(dir=os.path.dirname(f))
+        with os.fdopen(fd, "wb") as b:
+            b.write(z)
+        os.replace(tmp, f)
+    return d
+
+
+def getBlob(d):
+    """ Returns the data stored under the given digest
+
+	:param str d: the sha256 digest of the data in hex
+	:return: the data
+	:rtype: bytes or None
+	"""
+
+    directory = a10.asvr.db.configuration.BLOBDIRECTORY
+    if directory == "":
+        z = a10.asvr.db.core.backend.getBlob(d)
+    else:
+        try:
+            with open(os.path.join(directory, d[0:2], d + ".z"), "rb") as b:
+                z = b.read()
+        except FileNotFoundError:
+            z = None
+
+    if z is None:
+        return None
+    return zlib.decompress(z)
+
+
+def isBlobReference(v):
+    return isinstance(v, dict) and "blob" in v and "encoding" in v
+
+
+def storeLargePayloadItems(e):
+    """ Replaces the items of a claim's payload that are larger than blobthreshold with references to the blob store
+
+	:param dict e: the claim, which is changed
+	:return: the claim
+	:rtype: dict
+	"""
+
+    threshold = a10.asvr.db.configuration.BLOBTHRESHOLD
+    payload = e.get("payload", {}).get("payload")
+    if threshold <= 0 or not isinstance(payload, dict):
+        return e
+
+    for k, v in payload.items():
+        if not isinstance(v, str) or len(v) <= threshold:
+            continue
+
+        encoding = "utf-8"
+        data = None
+        if payload.get("encoding") == "base85/utf-8":
+            try:
+                data = base64.b85decode(v)
+                # Only if the text can be given back exactly as it was
+                if base64.b85encode(data).decode("utf-8") == v:
+                    encoding = "base85/utf-8"
+                else:
+                    data = None
+            except ValueError:
+                pass
+        if data is None:
+            data = v.encode("utf-8")
+
+        payload[k] = {"blob": putBlob(data), "encoding": encoding, "size": len(data)}
+
+    return e
+
+
+def getBlobDigests(e):
+    """ Returns the digests of the blobs a claim's payload refers to
+
+	:param dict e: the claim
+	:return: the sha256 digests in hex
+	:rtype: list
+	"""
+
+    payload = e.get("payload", {}).get("payload")
+    if not isinstance(payload, dict):
+        return []
+    return [v["blob"] for v in payload.values() if isBlobReference(v)]
+
+
+def resolveBlobReference(v):
+    """ Returns the payload item a blob reference stands for, any other value is returned unchanged
+
+	:param v: a payload item
+	:return: the payload item as it was in the claim made by the trust agent
+	"""
+
+    if not isBlobReference(v):
+        return v
+
+    data = getBlob(v["blob"])
+    if data is None:
+        return None
+    if v["encoding"] == "base85/utf-8":
+        return base64.b85encode(data).decode("utf-8")
+    return data.decode("utf-8")
@@ -0,0 +1,139 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""In-process caches of elements, policies and expected values, which are read on every attestation but rarely change.
+
+   Entries are dropped when an item management (IM) add, update or delete is announced, either by this process or,
+   over MQTT, by another. Entries also expire after the ttl in the [cache] section of /etc/a10.conf, which bounds how
+   long a missed announcement can leave an entry stale. Items which do not exist are not cached.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+import a10.asvr.db.configuration
+
+
+class Cache:
+    def __init__(self, name, size, ttl):
+        """
+	   Initialises an empty cache
+
+	   :param str name: the name reported in the statistics
+	   :param int size: the maximum number of entries, the least recently used is dropped first, 0 turns the cache off
+	   :param float ttl: seconds an entry is kept for
+		"""
+
+        self.name = name
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        # Incremented by every invalidation so that a value read before one is not stored after it
+        self.generation = 0
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, k, load):
+        """ Returns the value for the key from the cache, or from load if it is not cached
+
+	:param k: the key
+	:param function load: called with no arguments to read the value from the database
+	:return: a copy of the value, so callers may change it, or None if load returned None
+	"""
+
+        if self.size <= 0:
+            return load()
+
+        now = time.monotonic()
+        with self.lock:
+            e = self.entries.get(k)
+            if e is not None and e[0] > now:
+                self.entries.move_to_end(k)
+                self.counts["hits"] = self.counts["hits"] + 1
+                return copy.deepcopy(e[1])
+            self.counts["misses"] = self.counts["misses"] + 1
+            generation = self.generation
+
+        v = load()
+        if v is None:
+            return None
+
+        with self.lock:
+            if generation == self.generation:
+                self.entries[k] = (now + self.ttl, copy.deepcopy(v))
+                self.entries.move_to_end(k)
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+                    self.counts["evictions"] = self.counts["evictions"] + 1
+        return v
+
+    def invalidate(self, k=None):
+        """ Drops the entry for the key, or every entry if the key is None
+		"""
+
+        with self.lock:
+            self.generation = self.generation + 1
+            self.counts["invalidations"] = self.counts["invalidations"] + 1
+            if k is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(k, None)
+
+    def getStatistics(self):
+        with self.lock:
+            s = dict(self.counts)
+            s["entries"] = len(self.entries)
+        s["size"] = self.size
+        s["ttl"] = self.ttl
+        lookups = s["hits"] + s["misses"]
+        if lookups > 0:
+            s["hitratio"] = round(s["hits"] / lookups, 3)
+        else:
+            s["hitratio"] = None
+        return s
+
+
+ELEMENTS = Cache(
+    "elements", a10.asvr.db.configuration.CACHESIZE, a10.asvr.db.configuration.CACHETTL
+)
+POLICIES = Cache(
+    "policies", a10.asvr.db.configuration.CACHESIZE, a10.asvr.db.configuration.CACHETTL
+)
+# Keyed by (element itemid, policy itemid)
+EXPECTEDVALUES = Cache(
+    "expectedvalues",
+    a10.asvr.db.configuration.CACHESIZE,
+    a10.asvr.db.configuration.CACHETTL,
+)
+
+
+def invalidate(op, data):
+    """ Drops the entries affected by an item management announcement, see a10.asvr.db.announce.announceItemManagement
+
+	:param str op: the operation, eg: add, update or delete
+	:param dict data: the announced type and itemid
+	"""
+
+    if not isinstance(data, dict):
+        return
+
+    t = data.get("type")
+    if t == "element":
+        ELEMENTS.invalidate(data.get("itemid"))
+    elif t == "policy":
+        POLICIES.invalidate(data.get("itemid"))
+    elif t == "ev":
+        # Announcements carry the expected value's itemid but the cache is keyed by element and policy
+        EXPECTEDVALUES.invalidate()
+
+
+def getStatistics():
+    """ Returns the hit, miss, eviction and invalidation counts of each cache
+
+	:rtype: dict
+	"""
+
+    return {c.name: c.getStatistics() for c in [ELEMENTS, POLICIES, EXPECTEDVALUES]}
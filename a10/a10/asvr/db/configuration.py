@@ -27,14 +27,124 @@ try:
     DEBUG = config["Debugging"]["debug"]
 
     LOGFILE = config["Logging"]["logfile"]
+    # Log entries are written to the database in the background in batches, see a10.asvr.db.logsink
+    # A queue of 0 writes each entry as it is made
+    WRITEBEHINDQUEUE = config.getint("Logging", "writebehindqueue", fallback=10000)
+    WRITEBEHINDBATCH = config.getint("Logging", "writebehindbatch", fallback=500)
+    WRITEBEHINDINTERVAL = config.getfloat("Logging", "writebehindinterval", fallback=1.0)
 
     MQTTCLIENTNAME = config["mqtt"]["mqttclientname"]
     MQTTADDRESS = config["mqtt"]["mqttaddress"]
     MQTTPORT = config["mqtt"]["mqttport"]
     MQTTKEEPALIVEPING = config["mqtt"]["keepaliveping"]
 
-    MONGODBURL = config["mongo"]["mongodburl"]
-    MONGODBNAME = config["mongo"]["mongodbname"]
+    # The [database] section is optional, MongoDB is used if it is missing
+    DATABASEBACKEND = config.get("database", "backend", fallback="mongo")
+    SQLITEPATH = config.get("database", "sqlitepath", fallback="/var/lib/a10/a10.sqlite")
+    # Seconds that exact collection counts are cached for, 0 turns them off
+    EXACTCOUNTSTTL = config.getint("database", "exactcountsttl", fallback=300)
+    # Claim payload items larger than this many bytes are kept once in the blob store, 0 turns this off
+    BLOBTHRESHOLD = config.getint("database", "blobthreshold", fallback=16384)
+    # The blob store is a directory if this is set, otherwise the database, eg: GridFS in MongoDB
+    BLOBDIRECTORY = config.get("database", "blobdirectory", fallback="")
+    # MongoDB only, document or timeseries: results are stored in a time-series collection, see INSTALL.md
+    RESULTSLAYOUT = config.get("database", "resultslayout", fallback="document")
+    # Threads that the asyncio functions of a10.asvr.aio run the database calls on
+    AIOWORKERS = config.getint("database", "aioworkers", fallback=32)
+
+    # The [cache] section is optional, elements, policies and expected values are cached per process
+    # for up to ttl seconds, up to size of each, a size of 0 turns caching off
+    CACHESIZE = config.getint("cache", "size", fallback=1000)
+    CACHETTL = config.getint("cache", "ttl", fallback=60)
+
+    # The [attestation] section is optional, the number of elements a batch attests at the same time,
+    # see a10.asvr.attestation.attestMany
+    ATTESTCONCURRENCY = config.getint("attestation", "maxconcurrency", fallback=16)
+
+    # The [scheduler] section is optional, it configures the periodic attestation of a10.asvr.scheduler
+    # Times are in seconds, jitter is the fraction an interval is varied by, a metricsport of 0 turns the metrics off
+    # and they are served on metricsaddress, only to the local machine by default
+    SCHEDULER = {
+        "maxconcurrency": config.getint("scheduler", "maxconcurrency", fallback=32),
+        "perendpoint": config.getint("scheduler", "perendpoint", fallback=2),
+        "jitter": config.getfloat("scheduler", "jitter", fallback=0.1),
+        "poll": config.getfloat("scheduler", "poll", fallback=1.0),
+        "batch": config.getint("scheduler", "batch", fallback=500),
+        "syncinterval": config.getfloat("scheduler", "syncinterval", fallback=60.0),
+        "metricsport": config.getint("scheduler", "metricsport", fallback=8540),
+        "metricsaddress": config.get("scheduler", "metricsaddress", fallback="127.0.0.1"),
+        # Attestations per second over all elements, 0 for no limit
+        "budget": config.getfloat("scheduler", "budget", fallback=0.0),
+        # Intervals are stretched by stretch after history successful attestations in a row, up to maxfactor
+        # times the interval, and drop to minfactor times the interval after a failure or a message from the
+        # trust agent, they are kept when no claim was obtained
+        "adaptive": config.getboolean("scheduler", "adaptive", fallback=True),
+        "history": config.getint("scheduler", "history", fallback=10),
+        "stretch": config.getfloat("scheduler", "stretch", fallback=2.0),
+        "minfactor": config.getfloat("scheduler", "minfactor", fallback=0.25),
+        "maxfactor": config.getfloat("scheduler", "maxfactor", fallback=8.0),
+        # Elements attested per second for trust agent messages, the seconds before an element is attested for
+        # another message, and the number of elements whose messages may wait
+        "priorityrate": config.getfloat("scheduler", "priorityrate", fallback=10.0),
+        "cooldown": config.getfloat("scheduler", "cooldown", fallback=60.0),
+        "messagequeue": config.getint("scheduler", "messagequeue", fallback=100000),
+    }
+
+    # The [jobs] section is optional, it configures the background attestations of a10.asvr.jobs
+    # queue is the most jobs waiting or running, finished jobs are kept for ttl seconds
+    # callbackallow lists the hosts and URL prefixes callbacks may go to, without it every callback is refused
+    JOBS = {
+        "maxconcurrency": config.getint("jobs", "maxconcurrency", fallback=16),
+        "queue": config.getint("jobs", "queue", fallback=1000),
+        "ttl": config.getfloat("jobs", "ttl", fallback=3600.0),
+        "callbacktimeout": config.getfloat("jobs", "callbacktimeout", fallback=10.0),
+        "callbackallow": [
+            a.strip()
+            for a in config.get("jobs", "callbackallow", fallback="").split(",")
+            if a.strip() != ""
+        ],
+    }
+
+    # The [retention] section is optional, everything is kept forever if it is missing
+    # Ages are in seconds, counts are per element and policy, 0 turns a limit off
+    RETENTION = {
+        "logttl": config.getint("retention", "logttl", fallback=0),
+        "logcapsize": config.getint("retention", "logcapsize", fallback=0),
+        "claimsmaxage": config.getint("retention", "claimsmaxage", fallback=0),
+        "claimsperelementpolicy": config.getint(
+            "retention", "claimsperelementpolicy", fallback=0
+        ),
+        "resultsmaxage": config.getint("retention", "resultsmaxage", fallback=0),
+        "resultsperelementpolicy": config.getint(
+            "retention", "resultsperelementpolicy", fallback=0
+        ),
+        "archivedirectory": config.get("retention", "archivedirectory", fallback=""),
+        "prunebatchsize": config.getint("retention", "prunebatchsize", fallback=1000),
+    }
+
+    if DATABASEBACKEND == "mongo":
+        MONGODBURL = config["mongo"]["mongodburl"]
+        MONGODBNAME = config["mongo"]["mongodbname"]
+    else:
+        MONGODBURL = config.get("mongo", "mongodburl", fallback="")
+        MONGODBNAME = config.get("mongo", "mongodbname", fallback="")
+
+    # Connection pool, timeouts (in milliseconds), read preference and write concern of the MongoDB client
+    # A value of 0 or an empty string leaves the driver's default
+    MONGOCLIENTSETTINGS = {
+        "maxpoolsize": config.getint("mongo", "maxpoolsize", fallback=0),
+        "minpoolsize": config.getint("mongo", "minpoolsize", fallback=0),
+        "maxidletimems": config.getint("mongo", "maxidletimems", fallback=0),
+        "connecttimeoutms": config.getint("mongo", "connecttimeoutms", fallback=0),
+        "sockettimeoutms": config.getint("mongo", "sockettimeoutms", fallback=0),
+        "serverselectiontimeoutms": config.getint(
+            "mongo", "serverselectiontimeoutms", fallback=0
+        ),
+        "waitqueuetimeoutms": config.getint("mongo", "waitqueuetimeoutms", fallback=0),
+        "readpreference": config.get("mongo", "readpreference", fallback=""),
+        "writeconcern": config.get("mongo", "writeconcern", fallback=""),
+        "wtimeoutms": config.getint("mongo", "wtimeoutms", fallback=0),
+    }
 
 except Exception as e:
     print("A10 configuration file error ", e, " while reading ", CONFIGURATIONFILE)
@@ -42,6 +152,19 @@ except Exception as e:
     exit(1)
 
 
+# Passed to the storage backend, see a10.asvr.db.backends
+DATABASESETTINGS = {
+    "backend": DATABASEBACKEND,
+    "sqlitepath": SQLITEPATH,
+    "mongodburl": MONGODBURL,
+    "mongodbname": MONGODBNAME,
+    "mongoclient": MONGOCLIENTSETTINGS,
+    "resultslayout": RESULTSLAYOUT,
+    "logttl": RETENTION["logttl"],
+    "logcapsize": RETENTION["logcapsize"],
+}
+
+
 if DEBUG == "on":
     print("Configuration")
     print("   +-- configuration file: ", CONFIGURATIONFILE)
@@ -54,10 +177,27 @@ def getConfiguration():
         "asvrname": ASVRNAME,
         "debug": DEBUG,
         "logfile": LOGFILE,
+        "writebehindqueue": WRITEBEHINDQUEUE,
+        "writebehindbatch": WRITEBEHINDBATCH,
+        "writebehindinterval": WRITEBEHINDINTERVAL,
         "mqttclientname": MQTTCLIENTNAME,
         "mqttaddress": MQTTADDRESS,
         "mqttport": MQTTPORT,
         "mqttkeepaliveping": MQTTKEEPALIVEPING,
+        "databasebackend": DATABASEBACKEND,
+        "sqlitepath": SQLITEPATH,
+        "exactcountsttl": EXACTCOUNTSTTL,
+        "blobthreshold": BLOBTHRESHOLD,
+        "blobdirectory": BLOBDIRECTORY,
+        "resultslayout": RESULTSLAYOUT,
+        "aioworkers": AIOWORKERS,
+        "cachesize": CACHESIZE,
+        "cachettl": CACHETTL,
+        "attestconcurrency": ATTESTCONCURRENCY,
+        "scheduler": SCHEDULER,
+        "jobs": JOBS,
         "mongodburl": MONGODBURL,
         "mongodbname": MONGODBNAME,
+        "mongoclient": MONGOCLIENTSETTINGS,
+        "retention": RETENTION,
     }
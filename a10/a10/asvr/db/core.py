@@ -2,16 +2,189 @@
 # Licensed under the BSD 3-Clause Clear License.
 # SPDX-License-Identifier: BSD-3-Clear
 
-import pymongo
+import threading
+import time
+
+import a10.asvr.db.archive
 import a10.asvr.db.configuration
+import a10.asvr.db.backends.backend_dispatcher
+import a10.asvr.db.backends.basebackend
+
+import a10.structures.constants
+import a10.structures.timestamps
 
-"""This module is used to communicate with MongoDB. 
-   As long as it matches the semantics of the functions, replacement of this file can be used to interface 
-   with any database system
+"""This module is used to communicate with the database.
+   Every function here delegates to a storage backend, a subclass of a10.asvr.db.backends.basebackend.BaseBackend,
+   which is chosen by the backend entry of the [database] section in /etc/a10.conf. New database systems are
+   supported by adding a backend to a10.asvr.db.backends.backend_dispatcher
 """
 
-asclient = pymongo.MongoClient(a10.asvr.db.configuration.MONGODBURL)
-asdb = asclient[a10.asvr.db.configuration.MONGODBNAME]
+handler_return = a10.asvr.db.backends.backend_dispatcher.getBackendHandler(
+    a10.asvr.db.configuration.DATABASEBACKEND
+)
+if handler_return.rc() != a10.structures.constants.SUCCESS:
+    print("A10 database backend error ", handler_return.msg())
+    print("Exiting.")
+    exit(1)
+
+# The backend does not connect to the database until it is first used
+backend = handler_return.msg()(a10.asvr.db.configuration.DATABASESETTINGS)
+
+
+##################################################
+#
+# Indexes and Migration
+#
+##################################################
+
+
+def createIndexes():
+    """ Creates the indexes used by the functions in this module if they do not already exist.
+
+	This is called once when the backend is created and is safe to run against a populated database.
+
+	:return: the names of the indexes per collection
+	:rtype: dict
+	"""
+
+    return backend.createIndexes()
+
+
+def migrateTimestamps(batchsize=1000):
+    """ Converts timestamps stored as strings into numbers.
+
+	This can be run while the ASVR is in use. Documents are converted in batches and only
+	if the field has not been changed in the meantime. Strings which are not numbers are left alone.
+
+	:param int batchsize: number of documents to convert per round trip, defaults to 1000
+	:return: the number of fields converted per collection
+	:rtype: dict
+	"""
+
+    return backend.migrateTimestamps(batchsize)
+
+
+def migrateResultsLayout(batchsize=1000):
+    """ Moves the stored results into the layout given by resultslayout in the [database] section, eg: into a
+	MongoDB time-series collection.
+
+	Results are moved in batches and the migration continues where it stopped if it is run again.
+
+	:param int batchsize: number of results to move per round trip, defaults to 1000
+	:return: the number of results moved under results, and the number which could not be under notmoved
+	:rtype: dict
+	:raises NotImplementedError: if the storage backend has only one layout, eg: SQLite
+	"""
+
+    return backend.migrateResultsLayout(batchsize)
+
+
+##################################################
+#
+# Retention and Archive
+#
+##################################################
+
+
+def pruneCollections():
+    """ Removes the log entries, claims and results which are older, or more numerous per element and policy,
+	than the [retention] section of /etc/a10.conf allows.
+
+	Claims and results are written to an archive file first if an archivedirectory is configured, from where
+	getClaim and getResult can still read them. This can be run while the ASVR is in use.
+
+	:return: the number of items removed per collection
+	:rtype: dict
+	"""
+
+    retention = a10.asvr.db.configuration.RETENTION
+    n = retention["prunebatchsize"]
+    t = a10.structures.timestamps.now()
+
+    pruned = {"log": 0, "claims": 0, "results": 0}
+
+    # MongoDB's TTL index only removes entries which have a createdAt field, a capped log is left to its cap
+    if retention["logttl"] > 0:
+        pruned["log"] = backend.deleteLogEntriesOlderThan(t - retention["logttl"])
+
+    for c in ["claims", "results"]:
+        maxage = retention[c + "maxage"]
+        keep = retention[c + "perelementpolicy"]
+        if maxage > 0:
+            pruned[c] = pruned[c] + pruneBatches(
+                c, lambda k: backend.getItemsOlderThan(c, t - maxage, k), n
+            )
+        if keep > 0:
+            # The pairs are read once, each is then pruned down to keep on its own
+            for (e, p) in backend.getElementPolicyPairs(c):
+                pruned[c] = pruned[c] + pruneBatches(
+                    c, lambda k: backend.getItemsBeyondCount(c, e, p, keep, k), n
+                )
+
+    return pruned
+
+
+def pruneBatches(c, getItems, n):
+    # getItems is called with the batch size until it returns fewer, as the items it returned are deleted
+    pruned = 0
+
+    while True:
+        es = getItems(n)
+        if es == []:
+            return pruned
+
+        ids = [e["itemid"] for e in es]
+        d = a10.asvr.db.configuration.RETENTION["archivedirectory"]
+        if d != "":
+            f = a10.asvr.db.archive.writeArchive(d, c, es)
+            backend.addArchiveEntries(c, ids, f)
+
+        deleted = backend.deleteItems(c, ids)
+        if deleted == 0:
+            return pruned
+        pruned = pruned + deleted
+        if len(es) < n:
+            return pruned
+
+
+def getArchivedItem(i, fields=None):
+    """ Returns a claim or result which has been archived by pruneCollections
+
+	:param str i: ItemID of the claim or result
+	:param list fields: dotted paths of the fields to return, or None for the whole document
+	:return: the document
+	:rtype: dict or None
+	"""
+
+    a = backend.getArchiveEntry(i)
+    if a is None:
+        return None
+
+    e = a10.asvr.db.archive.readArchive(a["file"], i)
+    if e is not None and fields is not None:
+        e = a10.asvr.db.backends.basebackend.project(e, fields)
+    return e
+
+
+##################################################
+#
+# Change Events
+#
+##################################################
+
+
+def watch(cs, since=None, idle=None):
+    """ Returns a generator of the changes made to the given collections
+
+	:param list cs: the collections, eg: claims
+	:param str since: the token of the last change seen, or None to start with the next change
+	:param float idle: if given an idle event is generated when no change is made for this many seconds
+	:return: a generator of changes, see a10.asvr.events.stream
+	:raises NotImplementedError: if the storage backend does not support this, eg: SQLite or MongoDB without a replica set
+	:raises ValueError: if since is not a token or its change is no longer kept
+	"""
+
+    return backend.watch(cs, since, idle)
 
 
 ##################################################
@@ -22,29 +195,66 @@ asdb = asclient[a10.asvr.db.configuration.MONGODBNAME]
 
 
 def getDatabaseStatus():
-    """ Returns information on the state of the database
+    """ Returns information on the state of the database. The counts are estimates taken from the database's metadata.
 
 	:return: a structure containing information about the number of items stored in the database and other meta-data
 	:rtype: dict
 
 	"""
 
-    dbstatus = {}
+    return backend.getDatabaseStatus()
+
+
+# Exact counts need to visit every document so they are computed in a background thread and cached
+# for exactcountsttl seconds, see getExactDatabaseStatus
+exactstatus = {"counts": None, "computedAt": None, "refreshing": False}
+exactstatuslock = threading.Lock()
 
-    for c in [
-        "elements",
-        "policies",
-        "expectedvalues",
-        "claims",
-        "results",
-        "hashes",
-        "log",
-    ]:
-        collection = asdb[c]
-        count = collection.find().count()
-        dbstatus[c] = str(count)
 
-    return dbstatus
+def refreshExactDatabaseStatus():
+    try:
+        counts = backend.getExactDatabaseStatus()
+        with exactstatuslock:
+            exactstatus["counts"] = counts
+            exactstatus["computedAt"] = time.monotonic()
+    finally:
+        with exactstatuslock:
+            exactstatus["refreshing"] = False
+
+
+def getExactDatabaseStatus():
+    """ Returns the exact number of items stored in the database, as cached by the last background count.
+
+	If the cached counts are older than exactcountsttl then a recount is started in the background; this
+	call never waits for it.
+
+	:return: the number of items in each collection, or None if the counts are not yet available or turned off
+	:rtype: dict or None
+	"""
+
+    ttl = a10.asvr.db.configuration.EXACTCOUNTSTTL
+    if ttl <= 0:
+        return None
+
+    with exactstatuslock:
+        stale = (
+            exactstatus["computedAt"] is None
+            or time.monotonic() - exactstatus["computedAt"] > ttl
+        )
+        if stale and exactstatus["refreshing"] == False:
+            exactstatus["refreshing"] = True
+            threading.Thread(target=refreshExactDatabaseStatus, daemon=True).start()
+        return exactstatus["counts"]
+
+
+def getClientStatistics():
+    """ Returns the statistics of this process's connections to the database, eg: the MongoDB connection pool.
+
+	:return: the process id, whether it has connected, and backend specific statistics
+	:rtype: dict
+	"""
+
+    return backend.getClientStatistics()
 
 
 ##################################################
@@ -63,11 +273,51 @@ def writeLogEntry(t, ch, op, data):
 	:params dict data: associated data
 	"""
 
-    collection = asdb["log"]
+    return backend.writeLogEntry(t, ch, op, data)
 
-    e = {"t": t, "ch": ch, "op": op, "data": data}
 
-    r = collection.insert_one(e)
+def newLogEntryKeys(n):
+    """ Returns keys for a batch of log entries, see writeLogEntries
+
+	:params int n: the number of entries
+	:returns: one key per entry
+	:rtype: list
+	"""
+
+    return backend.newLogEntryKeys(n)
+
+
+def writeLogEntries(ls, keys=None):
+    """ Writes a list of entries to the logging table in one batch
+
+	The same entries written again with the same keys, eg: after an error part way through the batch, are not
+	written twice.
+
+	:params list ls: list of (t, ch, op, data) tuples, see writeLogEntry
+	:params list keys: the keys from newLogEntryKeys, one per entry, or None
+	:returns: one entry per log entry, None if written otherwise an error message
+	:rtype: list
+	"""
+
+    return backend.writeLogEntries(ls, keys)
+
+
+def getLogEntries(n=250, cursor=None, ch=None, op=None):
+    """ Returns one page of log entries, newest first.
+
+	Pages are read by passing the cursor returned with one page to get the next, older, page.
+	Entries written after the first page was read do not move the later pages.
+
+	:params int n: maximum number of entries in the page, defaults to 250
+	:params str cursor: the cursor returned with the previous page, or None for the latest entries
+	:params str ch: only entries on this channel, eg: C, or None for all channels
+	:params str op: only entries with this operation, eg: add, or None for all operations
+	:returns: the entries under "entries" and the cursor for the next page under "cursor", which is None on the last page
+	:rtype: dict
+	:raises ValueError: if the cursor is not one returned by this function
+	"""
+
+    return backend.getLogEntries(n, cursor, ch, op)
 
 
 def getLatestLogEntries(n):
@@ -78,9 +328,7 @@ def getLatestLogEntries(n):
 	:rtype: list dict
 	"""
 
-    collection = asdb["log"]
-    ls = collection.find({}, {"_id": False}).sort("t", pymongo.DESCENDING)
-    return list(ls)
+    return backend.getLatestLogEntries(n)
 
 
 def getLogEntryCount():
@@ -89,8 +337,8 @@ def getLogEntryCount():
 	:returns: number of log entries
 	:rtype: int
 	"""
-    collection = asdb["log"]
-    return collection.find().count()
+
+    return backend.getLogEntryCount()
 
 
 ##################################################
@@ -113,13 +361,7 @@ def addElement(e):
 
 	"""
 
-    collection = asdb["elements"]
-    r = collection.insert_one(e)
-
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
+    return backend.addElement(e)
 
 
 def getElement(i):
@@ -130,9 +372,7 @@ def getElement(i):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["elements"]
-    e = collection.find_one({"itemid": i}, {"_id": False})
-    return e
+    return backend.getElement(i)
 
 
 def getElementByName(n):
@@ -143,9 +383,7 @@ def getElementByName(n):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["elements"]
-    e = collection.find_one({"name": n}, {"_id": False})
-    return e
+    return backend.getElementByName(n)
 
 
 def getElements():
@@ -156,9 +394,7 @@ def getElements():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["elements"]
-    e = collection.find({}, {"_id": False, "itemid": True})
-    return list(e)
+    return backend.getElements()
 
 
 def getElementsFull():
@@ -169,29 +405,27 @@ def getElementsFull():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["elements"]
-    e = collection.find({}, {"_id": False})
-    return list(e)
+    return backend.getElementsFull()
 
 
-def deleteElement(e):
-    collection = asdb["elements"]
-    r = collection.delete_one({"itemid": e})
+def getElementsByIds(ids, fields=None):
+    """ Returns the elements with the given itemids in one query
 
-    if r.deleted_count == 1:
-        return True
-    else:
-        return False
+	:param list ids: ItemIDs of the elements, itemids of elements which do not exist are ignored
+	:param list fields: dotted paths of the fields to return as well as the itemid, eg: name, or None for the whole element
+	:return: the elements, in no particular order
+	:rtype: list dict
+	"""
 
+    return backend.getElementsByIds(ids, fields)
 
-def updateElement(e):
-    collection = asdb["elements"]
-    r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
 
-    if r.matched_count == 1:
-        return True
-    else:
-        return False
+def deleteElement(e):
+    return backend.deleteElement(e)
+
+
+def updateElement(e):
+    return backend.updateElement(e)
 
 
 ##################################################
@@ -213,14 +447,8 @@ def addPolicy(e):
 
 
 	"""
-    collection = asdb["policies"]
 
-    r = collection.insert_one(e)
-
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
+    return backend.addPolicy(e)
 
 
 def getPolicy(i):
@@ -231,9 +459,7 @@ def getPolicy(i):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["policies"]
-    e = collection.find_one({"itemid": i}, {"_id": False})
-    return e
+    return backend.getPolicy(i)
 
 
 def getPolicyByName(n):
@@ -244,9 +470,7 @@ def getPolicyByName(n):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["policies"]
-    e = collection.find_one({"name": n}, {"_id": False})
-    return e
+    return backend.getPolicyByName(n)
 
 
 def getPolicies():
@@ -257,9 +481,7 @@ def getPolicies():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["policies"]
-    e = collection.find({}, {"_id": False, "itemid": True})
-    return list(e)
+    return backend.getPolicies()
 
 
 def getPoliciesFull():
@@ -270,29 +492,27 @@ def getPoliciesFull():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["policies"]
-    e = collection.find({}, {"_id": False})
-    return list(e)
+    return backend.getPoliciesFull()
 
 
-def deletePolicy(i):
-    collection = asdb["policies"]
-    r = collection.delete_one({"itemid": i})
+def getPoliciesByIds(ids, fields=None):
+    """ Returns the policies with the given itemids in one query
 
-    if r.deleted_count == 1:
-        return True
-    else:
-        return False
+	:param list ids: ItemIDs of the policies, itemids of policies which do not exist are ignored
+	:param list fields: dotted paths of the fields to return as well as the itemid, eg: name, or None for the whole policy
+	:return: the policies, in no particular order
+	:rtype: list dict
+	"""
 
+    return backend.getPoliciesByIds(ids, fields)
 
-def updatePolicy(e):
-    collection = asdb["policies"]
-    r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
 
-    if r.matched_count == 1:
-        return True
-    else:
-        return False
+def deletePolicy(i):
+    return backend.deletePolicy(i)
+
+
+def updatePolicy(e):
+    return backend.updatePolicy(e)
 
 
 ##################################################
@@ -314,13 +534,8 @@ def addHash(h):
 
 
 	"""
-    collection = asdb["hashes"]
-    r = collection.insert_one(h)
 
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
+    return backend.addHash(h)
 
 
 def getHash(h):
@@ -331,9 +546,7 @@ def getHash(h):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["hashes"]
-    e = collection.find_one({"hash": h}, {"_id": False})
-    return e
+    return backend.getHash(h)
 
 
 def getHashes():
@@ -344,9 +557,7 @@ def getHashes():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["hashes"]
-    e = collection.find({}, {"_id": False, "hash": True})
-    return list(e)
+    return backend.getHashes()
 
 
 def getHashesFull():
@@ -357,9 +568,7 @@ def getHashesFull():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["hashes"]
-    e = collection.find({}, {"_id": False})
-    return list(e)
+    return backend.getHashesFull()
 
 
 ##################################################
@@ -381,14 +590,8 @@ def addExpectedValue(e):
 
 
 	"""
-    collection = asdb["expectedvalues"]
-
-    r = collection.insert_one(e)
 
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
+    return backend.addExpectedValue(e)
 
 
 def getExpectedValue(i):
@@ -399,9 +602,7 @@ def getExpectedValue(i):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find_one({"itemid": i}, {"_id": False})
-    return e
+    return backend.getExpectedValue(i)
 
 
 def getExpectedValues():
@@ -412,9 +613,7 @@ def getExpectedValues():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find({}, {"_id": False, "itemid": True})
-    return list(e)
+    return backend.getExpectedValues()
 
 
 def getExpectedValuesFull():
@@ -425,9 +624,7 @@ def getExpectedValuesFull():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find({}, {"_id": False})
-    return list(e)
+    return backend.getExpectedValuesFull()
 
 
 def getExpectedValuesForElement(i):
@@ -438,9 +635,7 @@ def getExpectedValuesForElement(i):
 	:rtype: list
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find({"elementID": i}, {"_id": False})
-    return list(e)
+    return backend.getExpectedValuesForElement(i)
 
 
 def getExpectedValuesForPolicy(i):
@@ -451,9 +646,7 @@ def getExpectedValuesForPolicy(i):
 	:rtype: list
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find({"policyID": i}, {"_id": False})
-    return list(e)
+    return backend.getExpectedValuesForPolicy(i)
 
 
 def getExpectedValueForElementAndPolicy(e, p):
@@ -465,29 +658,15 @@ def getExpectedValueForElementAndPolicy(e, p):
 	:rtype: list
 	"""
 
-    collection = asdb["expectedvalues"]
-    e = collection.find_one({"elementID": e, "policyID": p}, {"_id": False})
-    return e
+    return backend.getExpectedValueForElementAndPolicy(e, p)
 
 
 def deleteExpectedValue(i):
-    collection = asdb["expectedvalues"]
-    r = collection.delete_one({"itemid": i})
-
-    if r.deleted_count == 1:
-        return True
-    else:
-        return False
+    return backend.deleteExpectedValue(i)
 
 
 def updateExpectedValue(e):
-    collection = asdb["expectedvalues"]
-    r = collection.update_one({"itemid": e["itemid"]}, {"$set": e})
-
-    if r.matched_count == 1:
-        return True
-    else:
-        return False
+    return backend.updateExpectedValue(e)
 
 
 ##################################################
@@ -509,26 +688,35 @@ def addClaim(e):
 
 
 	"""
-    collection = asdb["claims"]
 
-    r = collection.insert_one(e)
+    return backend.addClaim(e)
 
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
 
+def addClaims(es):
+    """ Adds a list of entries to the claims collection in one batch.
 
-def getClaim(i):
-    """ Returns an element with the given itemid
+	The batch is unordered, a failure of one claim does not stop the others being added.
 
-	:param str i: ItemID of the element
-	:return: the returned object from Monogo less the mongo object ID
+	:param list es: the claims to be added
+	:return: one entry per claim, None if added otherwise an error message
+	:rtype: list
+	"""
+
+    return backend.addClaims(es)
+
+
+def getClaim(i, fields=None):
+    """ Returns a claim with the given itemid
+
+	:param str i: ItemID of the claim
+	:param list fields: dotted paths of the fields to return, eg: payload.payload.quote, or None for the whole claim
+	:return: the returned object from Monogo less the mongo object ID, or from the archive if it has been pruned
 	:rtype: dict or None
 	"""
 
-    collection = asdb["claims"]
-    e = collection.find_one({"itemid": i}, {"_id": False})
+    e = backend.getClaim(i, fields)
+    if e is None:
+        e = getArchivedItem(i, fields)
     return e
 
 
@@ -540,9 +728,7 @@ def getClaims():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["claims"]
-    e = collection.find({}, {"_id": False, "itemid": True})
-    return list(e)
+    return backend.getClaims()
 
 
 def getClaimsFull(n):
@@ -553,13 +739,7 @@ def getClaimsFull(n):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["claims"]
-    e = (
-        collection.find({}, {"_id": False})
-        .sort("header.as_requested", pymongo.DESCENDING)
-        .limit(n)
-    )
-    return list(e)
+    return backend.getClaimsFull(n)
 
 
 def getAssociatedResults(i):
@@ -570,11 +750,7 @@ def getAssociatedResults(i):
 	:rtype: list 
 	"""
 
-    collection = asdb["results"]
-    rs = collection.find({"claimID": i}, {"_id": False}).sort(
-        "verifiedAt", pymongo.DESCENDING
-    )
-    return list(rs)
+    return backend.getAssociatedResults(i)
 
 
 ##################################################
@@ -596,26 +772,34 @@ def addResult(e):
 
 
 	"""
-    collection = asdb["results"]
 
-    r = collection.insert_one(e)
+    return backend.addResult(e)
 
-    if r.inserted_id == None:
-        return False
-    else:
-        return True
+
+def addResults(es):
+    """ Adds a list of entries to the results collection in one batch.
+
+	The batch is unordered, a failure of one result does not stop the others being added.
+
+	:param list es: the results to be added
+	:return: one entry per result, None if added otherwise an error message
+	:rtype: list
+	"""
+
+    return backend.addResults(es)
 
 
 def getResult(i):
-    """ Returns an element with the given itemid
+    """ Returns a result with the given itemid
 
-	:param str i: ItemID of the element
-	:return: the returned object from Monogo less the mongo object ID
+	:param str i: ItemID of the result
+	:return: the returned object from Monogo less the mongo object ID, or from the archive if it has been pruned
 	:rtype: dict or None
 	"""
 
-    collection = asdb["results"]
-    e = collection.find_one({"itemid": i}, {"_id": False})
+    e = backend.getResult(i)
+    if e is None:
+        e = getArchivedItem(i)
     return e
 
 
@@ -627,32 +811,23 @@ def getResults():
 	:rtype: dict or None
 	"""
 
-    collection = asdb["results"]
-    e = collection.find({}, {"_id": False, "itemid": True})
-    return list(e)
+    return backend.getResults()
+
+
+def getResultsSince(t, u=None):
+    """ Returns results since t timestamp, and optionally before u
 
-def getResultsSince(t):
-    
-    """ Returns results since t timestamp
+	This is a range query on the verifiedAt index. Results whose verifiedAt is still stored
+	as a string, ie: before migrateTimestamps has been run, are not returned.
 
-	:param str t: float timestamp
+	:param float t: timestamp
+	:param float u: timestamp, defaults to None meaning no upper bound
 	:return: the list of results
 	:rtype: list dict or None
 	"""
-    
-    out = []
 
-    collection = asdb["results"]
-    e = collection.find({}, {'_id': False}).sort("verifiedAt", pymongo.DESCENDING)
-    ## Mongodb (3.6) does not support casting string verifiedAt for comparison with timestamp, filtering must be done manually. 
+    return backend.getResultsSince(t, u)
 
-    for i in e:
-        if(i["verifiedAt"] != None):
-            if( float(i["verifiedAt"]) > t):
-                out.append(i)
-            else:
-                return out
-    return out
 
 def getResultsFull(n):
     """ Returns an element with the given itemid
@@ -662,13 +837,48 @@ def getResultsFull(n):
 	:rtype: dict or None
 	"""
 
-    collection = asdb["results"]
-    e = (
-        collection.find({}, {"_id": False})
-        .sort("verifiedAt", pymongo.DESCENDING)
-        .limit(n)
-    )
-    return list(e)
+    return backend.getResultsFull(n)
+
+
+def getLatestResultPerElement(byPolicy=False, byRule=False):
+    """ Returns the latest result of every element, or of every element and policy, in one query.
+
+	:param bool byPolicy: if True the latest result for each element and policy, otherwise for each element
+	:param bool byRule: with byPolicy, the latest result of each rule for each element and policy
+	:return: the list of results
+	:rtype: list dict
+	"""
+
+    return backend.getLatestResultPerElement(byPolicy, byRule)
+
+
+def getResultCounts(e, since=None, until=None, bucket=None):
+    """ Returns the number of results of an element per policy and result code, counted by the database.
+
+	:param str e: ItemID of the element
+	:param float since: only results verified at or after this time, None for no lower bound
+	:param float until: only results verified before this time, None for no upper bound
+	:param float bucket: if given the results are also counted per time bucket of this many seconds, results
+	                     whose verifiedAt is not yet a number, see utilities/Database/migratetimestamps.py, are not
+	                     counted then
+	:return: entries of policyID, result, bucket (the start of the bucket, or None) and count
+	:rtype: list dict
+	"""
+
+    return backend.getResultCounts(e, since, until, bucket)
+
+
+def getLatestResultCounts(e, p, n):
+    """ Returns the number of each result code among the latest n results of an element and policy, counted by the database.
+
+	:param str e: ItemID of the element
+	:param str p: ItemID of the policy
+	:param int n: the number of results counted
+	:return: the count of each result code
+	:rtype: dict
+	"""
+
+    return backend.getLatestResultCounts(e, p, n)
 
 
 def getLatestResults(e, n):
@@ -681,13 +891,7 @@ def getLatestResults(e, n):
 	:rtype: list dict or None
 	"""
 
-    collection = asdb["results"]
-    rs = list(
-        collection.find({"elementID": e},{'_id': False})
-        .sort("verifiedAt", pymongo.DESCENDING)
-        .limit(n)
-    )
-    return rs
+    return backend.getLatestResults(e, n)
 
 
 def getLatestResultsForElementAndPolicy(e, p, n):
@@ -701,10 +905,95 @@ def getLatestResultsForElementAndPolicy(e, p, n):
 	:rtype: list dict or None
 	"""
 
-    collection = asdb["results"]
-    rs = list(
-        collection.find({"elementID": e, "policyID": p})
-        .sort("verifiedAt", pymongo.DESCENDING)
-        .limit(n)
-    )
-    return rs
+    return backend.getLatestResultsForElementAndPolicy(e, p, n)
+
+
+##################################################
+#
+# Element Status
+#
+##################################################
+
+
+def updateElementStatus(rs):
+    """ Records each result as the latest for its element, policy and rule, unless a later result has been recorded.
+
+	:param list rs: the results, as added by addResult or addResults
+	"""
+
+    return backend.updateElementStatus(rs)
+
+
+def getElementStatus(e=None):
+    """ Returns the latest result of each policy and rule for an element, or for every element, as kept by updateElementStatus.
+
+	:param str e: ItemID of the element, defaults to None meaning every element
+	:return: entries of elementID, policyID, verifiedAt, result, resultID, claimID and ruleName
+	:rtype: list dict
+	"""
+
+    return backend.getElementStatus(e)
+
+
+def deleteElementStatus(e=None, p=None):
+    """ Deletes the status entries of an element, of a policy, or of an element and policy, eg: when one is deleted.
+
+	:param str e: ItemID of the element, or None for every element
+	:param str p: ItemID of the policy, or None for every policy
+	"""
+
+    return backend.deleteElementStatus(e, p)
+
+
+def rebuildElementStatus():
+    """ Records the latest result of every element, policy and rule already in the database, eg: after upgrading.
+		  Results added meanwhile are kept as they are the later ones.
+
+	:return: the number of element, policy and rule entries
+	:rtype: int
+	"""
+
+    rs = backend.getLatestResultPerElement(True, True)
+    backend.updateElementStatus(rs)
+    return len(rs)
+
+
+##################################################
+#
+# Schedule
+#
+##################################################
+
+
+def updateScheduleEntries(ss):
+    """ Adds or replaces schedule entries, one per element and policy, see a10.asvr.scheduler
+
+	:param list ss: the entries, each has at least elementID, policyID and due, the time it is next attested
+	"""
+
+    return backend.updateScheduleEntries(ss)
+
+
+def getScheduleEntries(e=None):
+    """ Returns the schedule entries of an element, or every schedule entry
+
+	:param str e: ItemID of the element, defaults to None meaning every element
+	:rtype: list dict
+	"""
+
+    return backend.getScheduleEntries(e)
+
+
+def getDueScheduleEntries(t, n):
+    """ Returns the schedule entries due at or before a time, the earliest first
+
+	:param float t: timestamp
+	:param int n: the maximum number of entries to return
+	:rtype: list dict
+	"""
+
+    return backend.getDueScheduleEntries(t, n)
+
+
+def deleteScheduleEntry(e, p):
+    return backend.deleteScheduleEntry(e, p)
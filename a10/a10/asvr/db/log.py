@@ -15,5 +15,5 @@ logging.basicConfig(
 
 
 def writelog(t, ch, op, data):
-    payload = t + "," + ch + "," + op + "," + str(data)
+    payload = str(t) + "," + ch + "," + op + "," + str(data)
     logging.info(payload)
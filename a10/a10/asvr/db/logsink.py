@@ -0,0 +1,186 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause Clear License.
+# SPDX-License-Identifier: BSD-3-Clear
+
+"""Write-behind of the log entries made by a10.asvr.db.announce.
+
+   Entries are queued and written to the database in batches by a background thread, whenever writebehindbatch
+   entries are waiting or writebehindinterval seconds after the first of them was queued, so the caller does not
+   wait for the database. When writebehindqueue entries are waiting the caller blocks until there is room, so a
+   slow database slows the callers down rather than the queue growing without limit. Anything still queued is
+   written when the process exits. Setting writebehindqueue to 0 in the [Logging] section of /etc/a10.conf
+   writes every entry immediately instead.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+import a10.asvr.db.configuration
+import a10.asvr.db.core
+
+
+# Queued to make the writer write what it has without waiting for the interval
+FLUSH = object()
+
+# The number of times a batch is written before it is given up on
+RETRIES = 3
+
+entries = None
+writer = None
+pid = None
+startlock = threading.Lock()
+
+# Counts of the entries queued but not yet written or given up on, and of those written and dropped
+state = threading.Condition()
+counts = {"pending": 0, "written": 0, "dropped": 0, "batches": 0}
+
+
+def start():
+    # The queue and writer belong to one process, a forked process starts its own
+    global entries, writer, pid
+
+    if writer is not None and pid == os.getpid():
+        return
+    with startlock:
+        if writer is not None and pid == os.getpid():
+            return
+        entries = queue.Queue(maxsize=a10.asvr.db.configuration.WRITEBEHINDQUEUE)
+        with state:
+            counts["pending"] = 0
+        writer = threading.Thread(target=writeBatches, name="a10logsink", daemon=True)
+        pid = os.getpid()
+        writer.start()
+
+
+def writeBatches():
+    batchsize = a10.asvr.db.configuration.WRITEBEHINDBATCH
+    interval = a10.asvr.db.configuration.WRITEBEHINDINTERVAL
+    q = entries
+
+    while True:
+        batch = []
+        l = q.get()
+        if l is not FLUSH:
+            batch.append(l)
+
+            deadline = time.monotonic() + interval
+            while len(batch) < batchsize:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    l = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if l is FLUSH:
+                    break
+                batch.append(l)
+
+        if batch != []:
+            writeBatch(batch)
+
+
+def writeBatch(batch):
+    # The keys are kept for the retries, so entries written by an attempt which then failed are not written again
+    errors = None
+    try:
+        keys = a10.asvr.db.core.newLogEntryKeys(len(batch))
+        for attempt in range(RETRIES):
+            try:
+                errors = a10.asvr.db.core.writeLogEntries(batch, keys)
+                break
+            except Exception as e:
+                print("Log entries not written, attempt ", attempt + 1, " ", e)
+                if attempt + 1 < RETRIES:
+                    time.sleep(attempt + 1)
+    except Exception as e:
+        print("Log entries not written ", e)
+
+    if errors is None:
+        dropped = len(batch)
+    else:
+        # Entries the database refused, the rest of the batch was written
+        dropped = len([err for err in errors if err is not None])
+        if dropped > 0:
+            print("Log entries not written ", dropped)
+
+    with state:
+        counts["pending"] = counts["pending"] - len(batch)
+        counts["written"] = counts["written"] + len(batch) - dropped
+        counts["dropped"] = counts["dropped"] + dropped
+        if errors is not None:
+            counts["batches"] = counts["batches"] + 1
+        state.notify_all()
+
+
+def write(t, ch, op, data):
+    """ Queues a log entry to be written to the database, see a10.asvr.db.core.writeLogEntry
+
+	This blocks only if the queue is full.
+	"""
+
+    writeMany([(t, ch, op, data)])
+
+
+def writeMany(ls):
+    """ Queues log entries to be written to the database, see a10.asvr.db.core.writeLogEntries
+
+	:param list ls: the entries as tuples of time, channel, operation and data
+	"""
+
+    if a10.asvr.db.configuration.WRITEBEHINDQUEUE <= 0:
+        a10.asvr.db.core.writeLogEntries(ls)
+        return
+
+    start()
+    with state:
+        counts["pending"] = counts["pending"] + len(ls)
+    for l in ls:
+        entries.put(l)
+
+
+def flush(timeout=10.0):
+    """ Waits until the entries queued so far have been written
+
+	:param float timeout: the maximum number of seconds to wait, defaults to 10
+	:return: True if nothing is left to write, False if the timeout passed first
+	:rtype: bool
+	"""
+
+    if writer is None or pid != os.getpid():
+        return True
+
+    deadline = time.monotonic() + timeout
+    try:
+        entries.put(FLUSH, timeout=timeout)
+    except queue.Full:
+        return False
+
+    with state:
+        while counts["pending"] > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            state.wait(remaining)
+    return True
+
+
+def getStatistics():
+    """ Returns the number of entries waiting, written and dropped, and of batches written, by this process
+
+	:rtype: dict
+	"""
+
+    with state:
+        s = dict(counts)
+    if s["batches"] > 0:
+        s["meanbatchsize"] = round(s["written"] / s["batches"], 1)
+    else:
+        s["meanbatchsize"] = None
+    return s
+
+
+atexit.register(flush)
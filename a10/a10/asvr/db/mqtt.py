@@ -15,8 +15,14 @@ def on_disconnect(client, userdata, rc):
     client.disconnect_flag = True
 
 
+# The function called for each channel subscribed to, subscribed again whenever the client reconnects
+subscriptions = {}
+
+
 def on_connect(client, metadata, flags, rc):
     print("Connected mqtt: {}".format(rc))
+    for ch in subscriptions:
+        client.subscribe(ch, qos=1)
 
 
 def on_disconnect(client, metadata, flags, rc):
@@ -32,6 +38,20 @@ def publish(ch, t, op, data):
     mqttc.publish(ch, payload)
 
 
+def subscribe(ch, f):
+    """ Calls f with the payload, as bytes, of every message published on the channel
+
+	f is called on the MQTT client's network thread so must not block and must not raise.
+
+	:param str ch: the channel, eg: AS/IM
+	:param function f: the function
+	"""
+
+    subscriptions[ch] = f
+    mqttc.message_callback_add(ch, lambda client, userdata, m: f(m.payload))
+    mqttc.subscribe(ch, qos=1)
+
+
 def sendKeepAlive():
     print(
         "Starting keepalive ping with rate ",
@@ -65,6 +85,8 @@ print("mqtt client id is ", id)
 mqttc = mqtt.Client(id)
 mqttc.on_connect = on_connect
 mqttc.connect(a10.asvr.db.configuration.MQTTADDRESS)
+# Runs the network loop so that subscribed messages are received and reconnects are made
+mqttc.loop_start()
 
 
 # KEEP ALIVE PING
@@ -5,6 +5,7 @@
 import a10.structures.constants
 import a10.structures.identity
 import a10.structures.returncode
+import a10.asvr.db.cache
 import a10.asvr.db.core
 import a10.asvr.db.announce
 
@@ -59,7 +60,7 @@ def getElement(i):
 	:rtype: ResultCode
 	"""
 
-    e = a10.asvr.db.core.getElement(i)
+    e = a10.asvr.db.cache.ELEMENTS.get(i, lambda: a10.asvr.db.core.getElement(i))
     if e is None:
         return a10.structures.returncode.ReturnCode(
             a10.structures.constants.ITEMDOESNOTEXIST, "Element does not exist"
@@ -105,6 +106,18 @@ def getElementsFull():
     return es
 
 
+def getElementsByIds(ids, fields=None):
+    """Returns the elements with the given itemIDs, read in one query, eg: to show the names of the elements of a list of results.
+
+    :param list ids: the element IDs, duplicates and IDs of deleted elements are allowed
+    :param list fields: the fields to return as well as the itemid, eg: ["name"], or None for the whole element
+    :return: the elements keyed by itemid, an ID which does not exist is not a key
+    :rtype: dict
+	"""
+    es = a10.asvr.db.core.getElementsByIds(set(ids), fields)
+    return {e["itemid"]: e for e in es}
+
+
 def updateElement(e):
     """Modifies a given element. The element *must* contain a valid itemid
 
@@ -136,6 +149,7 @@ def deleteElement(i):
 	"""
     e = a10.asvr.db.core.deleteElement(i)
     if e is True:
+        a10.asvr.db.core.deleteElementStatus(i)
         a10.asvr.db.announce.announceItemManagement(
             "delete", {"type": "element", "itemid": i}
         )
@@ -0,0 +1,46 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""A feed of the changes made to the database, as an alternative to subscribing to MQTT.
+
+   Every change carries a token. A consumer which stores the token of the last change it processed can pass it
+   to stream after a restart and will receive every change made in the meantime, as far back as the database
+   keeps them (in MongoDB the oplog). This needs the MongoDB storage backend running as a replica set.
+"""
+
+import a10.asvr.db.core
+
+# The collections changed by item management, attestation and verification
+COLLECTIONS = [
+    "elements",
+    "policies",
+    "expectedvalues",
+    "hashes",
+    "claims",
+    "results",
+]
+
+
+def stream(since=None, collections=COLLECTIONS, idle=None):
+    """
+    Returns a generator of the changes made to the database. The generator waits for the next change.
+
+    Each change is a dict with the fields: token, t (the time of the change), collection, op (insert, update,
+    replace or delete), itemid and document (the document after the change, None if it was deleted).
+    For a delete the itemid is only known for elements, policies, expected values and hashes, and only with
+    MongoDB 6.0 or later and for as long as MongoDB keeps the document before the change (see
+    expireAfterSeconds of changeStreamOptions). Otherwise, eg: claims and results removed by pruning, it is None.
+    If idle is given then a change with op idle and only a token is generated whenever nothing has changed
+    for that long, its token can be used as since like any other.
+
+    :params str since: the token of the last change seen, defaults to None meaning from the next change
+    :params list collections: the collections to watch, defaults to COLLECTIONS
+    :params float idle: seconds to wait for a change before generating an idle change, defaults to None meaning wait forever
+    :return: the changes
+    :rtype: generator dict
+    :raises NotImplementedError: if the storage backend does not support change events, eg: SQLite or MongoDB without a replica set
+    :raises ValueError: if since is not a token or its change is no longer kept, also raised by the generator
+    """
+
+    return a10.asvr.db.core.watch(collections, since, idle)
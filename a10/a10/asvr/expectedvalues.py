@@ -5,6 +5,7 @@
 import a10.structures.constants
 import a10.structures.identity
 import a10.structures.returncode
+import a10.asvr.db.cache
 import a10.asvr.db.core
 import a10.asvr.db.announce
 
@@ -90,7 +91,9 @@ def getExpectedValueForElementAndPolicy(e, p):
     :rtype: ReturnCode
     """
 
-    ev = a10.asvr.db.core.getExpectedValueForElementAndPolicy(e, p)
+    ev = a10.asvr.db.cache.EXPECTEDVALUES.get(
+        (e, p), lambda: a10.asvr.db.core.getExpectedValueForElementAndPolicy(e, p)
+    )
     if ev == None:
         m = str({"elementID": e, "policyID": p})
         return a10.structures.returncode.ReturnCode(
@@ -110,9 +113,19 @@ def deleteExpectedValue(i):
     :rtype: ReturnCode
     """
 
+    ev = a10.asvr.db.core.getExpectedValue(i)
     r = a10.asvr.db.core.deleteExpectedValue(i)
 
     if r == True:
+        # The element is no longer attested against the policy, unless another expected value links them
+        if (
+            ev is not None
+            and a10.asvr.db.core.getExpectedValueForElementAndPolicy(
+                ev["elementID"], ev["policyID"]
+            )
+            is None
+        ):
+            a10.asvr.db.core.deleteElementStatus(ev["elementID"], ev["policyID"])
         a10.asvr.db.announce.announceItemManagement(
             "delete", {"type": "ev", "itemid": i}
         )
@@ -0,0 +1,342 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Attestations and verifications run in the background, so that a caller does not wait on the trust agent.
+
+   A job is submitted, runs on a pool of maxconcurrency threads and is read back by its id, optionally waiting
+   for it to finish. If a callback URL is given the job is also posted there as JSON when it finishes, provided
+   the URL is http or https and its host or a prefix of it is listed in callbackallow. At most
+   queue jobs may be waiting or running, further submissions are refused with JOBQUEUEFULL. Finished jobs are
+   kept for ttl seconds. Jobs are held in memory by the process which runs them, eg: a10rest, and are lost if
+   it restarts.
+
+   A job is:
+
+      { "jobID": ..., "kind": "attest", "status": "done", "submitted": ..., "started": ..., "finished": ...,
+        "request": {...}, "rc": 0, "result": ... }
+
+   with an error instead of a result if rc is not SUCCESS, and callback, the outcome of posting the job, if a
+   callback URL was given.
+"""
+
+import concurrent.futures
+import threading
+import time
+import urllib.parse
+
+import requests
+
+import a10.asvr.db.configuration
+import a10.structures.constants
+import a10.structures.identity
+import a10.structures.returncode
+import a10.structures.timestamps
+
+from a10.asvr import attestation
+
+# The states of a job
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+
+# The most seconds getJob waits for a job to finish
+MAXWAIT = 60.0
+
+
+def callbackAllowed(callback, allow):
+    """
+	   Checks a callback URL against an allowlist, an empty allowlist allows nothing
+
+	   :param str callback: the URL
+	   :param list allow: host names, eg: hooks.example.com, or URL prefixes, eg: https://hooks.example.com/a10/
+	   :return: whether the job may be posted to the URL
+	   :rtype: bool
+		"""
+
+    try:
+        u = urllib.parse.urlsplit(callback)
+        host = u.hostname
+    except (TypeError, ValueError, AttributeError):
+        return False
+    if u.scheme not in ["http", "https"] or not host:
+        return False
+
+    for a in allow:
+        if "://" not in a:
+            if host == a.lower():
+                return True
+            continue
+        # A prefix matches on the whole scheme and host, so https://a.example.com does not allow a.example.com.evil.org
+        p = urllib.parse.urlsplit(a)
+        if (
+            u.scheme == p.scheme.lower()
+            and u.netloc.lower() == p.netloc.lower()
+            and u.path.startswith(p.path)
+        ):
+            return True
+    return False
+
+
+class JobQueue:
+    def __init__(self, settings):
+        """
+	   Initialises an empty job queue
+
+	   :param dict settings: see the [jobs] section of /etc/a10.conf
+		"""
+
+        self.settings = settings
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings["maxconcurrency"], thread_name_prefix="a10jobs"
+        )
+        self.lock = threading.Lock()
+        # Each job id maps to the job and an event set when it finishes
+        self.jobs = {}
+        self.active = 0
+        self.counts = {
+            "submitted": 0,
+            "refused": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "expired": 0,
+            "callbacks": 0,
+            "callbackfailures": 0,
+        }
+
+    def checkCallback(self, callback):
+        """
+	   Checks that a job may be posted to a callback URL, see callbackAllowed
+
+	   :param str callback: the URL, or None
+	   :return: return code structure, SUCCESS or CALLBACKNOTALLOWED
+	   :rtype: ReturnCode
+		"""
+
+        if callback is None or callbackAllowed(callback, self.settings["callbackallow"]):
+            return a10.structures.returncode.ReturnCode(
+                a10.structures.constants.SUCCESS, callback
+            )
+        return a10.structures.returncode.ReturnCode(
+            a10.structures.constants.CALLBACKNOTALLOWED,
+            "Callback not allowed, see callbackallow in [jobs] " + str(callback),
+        )
+
+    def expire(self, now):
+        # Called holding the lock
+        ttl = self.settings["ttl"]
+        for (j, (job, finished)) in list(self.jobs.items()):
+            if job["status"] == DONE and now - job["finished"] >= ttl:
+                del self.jobs[j]
+                self.counts["expired"] = self.counts["expired"] + 1
+
+    def submit(self, kind, f, request, callback=None):
+        """
+	   Queues a job
+
+	   :param str kind: the kind of job, eg: attest
+	   :param function f: called with no arguments on the pool, returns a ReturnCode
+	   :param dict request: the parameters of the job, returned with it
+	   :param str callback: a URL the job is posted to when it finishes, or None
+	   :return: return code structure with the job id, JOBQUEUEFULL, or CALLBACKNOTALLOWED
+	   :rtype: ReturnCode
+		"""
+
+        c = self.checkCallback(callback)
+        if c.rc() != a10.structures.constants.SUCCESS:
+            return c
+
+        now = a10.structures.timestamps.now()
+        with self.lock:
+            self.expire(now)
+            if self.active >= self.settings["queue"]:
+                self.counts["refused"] = self.counts["refused"] + 1
+                return a10.structures.returncode.ReturnCode(
+                    a10.structures.constants.JOBQUEUEFULL,
+                    "Job queue is full, " + str(self.active) + " jobs waiting or running",
+                )
+
+            j = a10.structures.identity.generateID()
+            job = {
+                "jobID": j,
+                "kind": kind,
+                "status": PENDING,
+                "submitted": now,
+                "started": None,
+                "finished": None,
+                "request": request,
+            }
+            if callback is not None:
+                job["callback"] = None
+            self.jobs[j] = (job, threading.Event())
+            self.active = self.active + 1
+            self.counts["submitted"] = self.counts["submitted"] + 1
+
+        self.pool.submit(self.run, j, f, callback)
+        return a10.structures.returncode.ReturnCode(a10.structures.constants.SUCCESS, j)
+
+    def run(self, j, f, callback):
+        (job, finished) = self.jobs[j]
+        with self.lock:
+            job["status"] = RUNNING
+            job["started"] = a10.structures.timestamps.now()
+
+        try:
+            r = f()
+            rc = r.rc()
+            msg = r.msg()
+        except Exception as err:
+            print("Job failed ", j, err)
+            rc = a10.structures.constants.GENERALERROR
+            msg = "Job failed " + str(err)
+
+        with self.lock:
+            job["rc"] = rc
+            if rc == a10.structures.constants.SUCCESS:
+                job["result"] = msg
+                self.counts["succeeded"] = self.counts["succeeded"] + 1
+            else:
+                job["error"] = str(msg)
+                self.counts["failed"] = self.counts["failed"] + 1
+            job["finished"] = a10.structures.timestamps.now()
+            job["status"] = DONE
+            self.active = self.active - 1
+            done = dict(job)
+        finished.set()
+
+        if callback is not None:
+            self.call(job, done, callback)
+
+    def call(self, job, done, callback):
+        # The job is posted once, whoever asked for the callback can still read the job if this fails
+        # Redirects are not followed, they could lead anywhere the allowlist does not
+        try:
+            r = requests.post(
+                callback,
+                json=done,
+                timeout=self.settings["callbacktimeout"],
+                allow_redirects=False,
+            )
+            outcome = r.status_code
+        except Exception as err:
+            print("Job callback failed ", callback, err)
+            outcome = "failed " + str(err)
+
+        with self.lock:
+            job["callback"] = outcome
+            if isinstance(outcome, int) and outcome < 300:
+                self.counts["callbacks"] = self.counts["callbacks"] + 1
+            else:
+                self.counts["callbackfailures"] = self.counts["callbackfailures"] + 1
+
+    def get(self, j, wait=0.0):
+        """
+	   Returns a job
+
+	   :param str j: the job id
+	   :param float wait: seconds to wait for the job to finish, at most MAXWAIT
+	   :return: return code structure with a copy of the job, or ITEMDOESNOTEXIST
+	   :rtype: ReturnCode
+		"""
+
+        with self.lock:
+            self.expire(a10.structures.timestamps.now())
+            e = self.jobs.get(j)
+        if e is None:
+            return a10.structures.returncode.ReturnCode(
+                a10.structures.constants.ITEMDOESNOTEXIST, "Job does not exist " + j
+            )
+
+        (job, finished) = e
+        if wait > 0:
+            finished.wait(min(wait, MAXWAIT))
+        with self.lock:
+            return a10.structures.returncode.ReturnCode(
+                a10.structures.constants.SUCCESS, dict(job)
+            )
+
+    def getStatistics(self):
+        with self.lock:
+            s = dict(self.counts)
+            s["active"] = self.active
+            s["kept"] = len(self.jobs)
+        s["maxconcurrency"] = self.settings["maxconcurrency"]
+        s["queue"] = self.settings["queue"]
+        return s
+
+
+JOBS = JobQueue(a10.asvr.db.configuration.JOBS)
+
+
+def attest(eid, pid, cps, callback=None):
+    """
+	   Attests an element in the background, see a10.asvr.attestation.attest
+
+	   :param str eid: the element id
+	   :param str pid: the policy id
+	   :param dict cps: additional parameters
+	   :param str callback: a URL the finished job is posted to, or None
+	   :return: return code structure with the job id, the result of the job is the claim id
+	   :rtype: ReturnCode
+		"""
+
+    return JOBS.submit(
+        "attest",
+        lambda: attestation.attest(eid, pid, cps),
+        {"eid": eid, "pid": pid, "cps": cps},
+        callback,
+    )
+
+
+def verify(cid, rule, callback=None):
+    """
+	   Verifies a claim in the background, see a10.asvr.attestation.verify
+
+	   :param str cid: the claim id
+	   :param rule: the rule name and parameters
+	   :param str callback: a URL the finished job is posted to, or None
+	   :return: return code structure with the job id, the result of the job is the result id
+	   :rtype: ReturnCode
+		"""
+
+    return JOBS.submit(
+        "verify",
+        lambda: attestation.verify(cid, rule),
+        {"cid": cid, "rule": rule},
+        callback,
+    )
+
+
+def checkCallback(callback):
+    """
+	   Checks that a job may be posted to a callback URL, see JobQueue.checkCallback
+
+	   :param str callback: the URL, or None
+	   :return: return code structure, SUCCESS or CALLBACKNOTALLOWED
+	   :rtype: ReturnCode
+		"""
+
+    return JOBS.checkCallback(callback)
+
+
+def getJob(j, wait=0.0):
+    """
+	   Returns a job, see JobQueue.get
+
+	   :param str j: the job id
+	   :param float wait: seconds to wait for the job to finish
+	   :return: return code structure with the job
+	   :rtype: ReturnCode
+		"""
+
+    return JOBS.get(j, wait)
+
+
+def getStatistics():
+    """
+	   Returns the counts of the jobs submitted, refused, finished and waiting
+
+	   :rtype: dict
+		"""
+
+    return JOBS.getStatistics()
@@ -5,6 +5,7 @@
 import a10.structures.constants
 import a10.structures.identity
 import a10.structures.returncode
+import a10.asvr.db.cache
 import a10.asvr.db.core
 import a10.asvr.db.announce
 
@@ -36,7 +37,7 @@ def addPolicy(e):
 
 
 def getPolicy(i):
-    e = a10.asvr.db.core.getPolicy(i)
+    e = a10.asvr.db.cache.POLICIES.get(i, lambda: a10.asvr.db.core.getPolicy(i))
     if e == None:
         return a10.structures.returncode.ReturnCode(
             a10.structures.constants.ITEMDOESNOTEXIST, i
@@ -72,12 +73,26 @@ def getPoliciesFull():
     return ps
 
 
+def getPoliciesByIds(ids, fields=None):
+    """Returns the policies with the given itemIDs, read in one query, eg: to show the names of the policies of a list of results.
+
+    :param list ids: the policy IDs, duplicates and IDs of deleted policies are allowed
+    :param list fields: the fields to return as well as the itemid, eg: ["name"], or None for the whole policy
+    :return: the policies keyed by itemid, an ID which does not exist is not a key
+    :rtype: dict
+	"""
+    ps = a10.asvr.db.core.getPoliciesByIds(set(ids), fields)
+    return {p["itemid"]: p for p in ps}
+
+
 def deletePolicy(i):
     # itemid MUST be present
 
     r = a10.asvr.db.core.deletePolicy(i)
 
     if r == True:
+        # Otherwise an old failure of the policy would keep its elements untrusted
+        a10.asvr.db.core.deleteElementStatus(p=i)
         a10.asvr.db.announce.announceItemManagement(
             "delete", {"type": "policy", "itemid": i}
         )
@@ -9,6 +9,15 @@ import a10.structures.returncode
 import a10.asvr.db.announce
 
 
+def updateElementStatus(rs):
+    # The status is derived from the results so a failure here does not fail the add,
+    # a10.asvr.db.core.rebuildElementStatus recovers it
+    try:
+        a10.asvr.db.core.updateElementStatus(rs)
+    except Exception as err:
+        print("Element status not updated ", err)
+
+
 def addResult(e):
     #
     # Parameters: e - is a dictionary containing the policy information
@@ -47,6 +56,7 @@ def addResult(e):
     r = a10.asvr.db.core.addResult(e)
 
     if r == True:
+        updateElementStatus([e])
         a10.asvr.db.announce.announceResult(
             "add", {"type": "result", "itemid": i, "result": e["result"]}
         )
@@ -57,6 +67,78 @@ def addResult(e):
         )
 
 
+def addResults(es):
+    """
+    Adds a list of results to the database in one batch. The same fields as addResult MUST be present
+    in each result. A result that is missing fields or fails to be written does not stop the others.
+
+    :params list es: a list of dictionaries with result information
+    :return: one ReturnCode per result in the same order, with the itemid of the result on success
+    :rtype: list ReturnCode
+    """
+
+    rcs = [None] * len(es)
+    batch = []
+
+    for (k, e) in enumerate(es):
+        try:
+            tmp = e["verifiedAt"]
+            tmp = e["claimID"]
+            tmp = e["elementID"]
+            tmp = e["policyID"]
+            tmp = e["result"]
+            tmp = e["message"]
+            tmp = e["additional"]
+            tmp = e["ruleParameters"]
+            tmp = e["ev"]
+        except KeyError as err:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.MISSINGFIELDS, "Missing fields " + (str(err))
+            )
+            continue
+        except Exception as err:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.GENERALERROR, "General error " + (str(err))
+            )
+            continue
+
+        e["itemid"] = a10.structures.identity.generateID()
+        batch.append((k, e))
+
+    try:
+        errors = a10.asvr.db.core.addResults([e for (k, e) in batch])
+    except Exception as err:
+        # Eg: the database is unreachable, nothing in the batch is known to be written
+        for (k, e) in batch:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.GENERALERROR,
+                "Result not added to database " + (str(err)),
+            )
+        return rcs
+
+    added = []
+    status = []
+    for ((k, e), err) in zip(batch, errors):
+        if err is None:
+            status.append(e)
+            added.append({"type": "result", "itemid": e["itemid"], "result": e["result"]})
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.SUCCESS, e["itemid"]
+            )
+        else:
+            rcs[k] = a10.structures.returncode.ReturnCode(
+                a10.structures.constants.ADDITEMFAIL,
+                "Result not added to database " + err,
+            )
+
+    if status != []:
+        updateElementStatus(status)
+    if added != []:
+        a10.asvr.db.announce.announceResults("add", added)
+
+    return rcs
+
+
 def getResult(i):
     e = a10.asvr.db.core.getResult(i)
     if e == None:
@@ -76,10 +158,30 @@ def getResultsFull(n):
     rs = list(a10.asvr.db.core.getResultsFull(n))
     return rs
 
-def getResultsSince(t):
-    rs = a10.asvr.db.core.getResultsSince(t)
+def getResultsSince(t, u=None):
+    """
+	Returns the results verified after timestamp t, and optionally before timestamp u, newest first
+
+	:params float t: the timestamp
+	:params float u: the timestamp, defaults to None meaning no upper bound
+	:return: the set of results
+	:rtype: list dict
+	"""
+    rs = a10.asvr.db.core.getResultsSince(t, u)
     return rs
 
+def getLatestResultPerElement(byPolicy=False):
+    """
+	Returns the latest result of every element, or of every element and policy, in one database query
+
+	:params bool byPolicy: if True the latest result for each element and policy, defaults to False
+	:return: the set of results
+	:rtype: list dict
+	"""
+    rs = a10.asvr.db.core.getLatestResultPerElement(byPolicy)
+    return rs
+
+
 def getLatestResults(e, n=10):
     """
 	Returns the latest n results for an element sorted by the verifiedAt property of the results
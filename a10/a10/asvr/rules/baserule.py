@@ -14,18 +14,41 @@ class BaseRule:
     NAME = "<<abstract>>baserule.BaseRule"
     DESCRIPTION = "Abstract Class Base Rule - not to be used for anything."
 
-    def __init__(self, cid, ps):
+    # The dotted paths of the claim fields that apply reads, eg: payload.payload.quote.magic
+    # Only these are fetched from the database, None fetches the whole claim
+    CLAIMFIELDS = None
+
+    def __init__(self, cid, ps, claim=None):
         # cid is the claim ID
         # ps are additional parameters
         # ps is the set of additional parameters as a python dict
+        # claim is the whole claim if the caller already has it, eg: a10.asvr.attestation.attestAndVerify,
+        #   otherwise it is read from the database
 
         self.claimID = cid
-        self.claim = claims.getClaim(self.claimID).msg()
+        if claim is None:
+            self.claim = claims.getClaim(self.claimID, self.claimFields()).msg()
+        else:
+            self.claim = claim
         self.parameters = ps
         self.ruleClassName = type(self).__name__
         self.ruleName = self.NAME
         self.ev = {}
 
+    def claimFields(self):
+        # The element and policy are always needed by setExpectedValue
+        if self.CLAIMFIELDS is None:
+            return None
+        return [
+            "itemid",
+            "header.element.itemid",
+            "header.policy.itemid",
+        ] + self.CLAIMFIELDS
+
+    def getPayloadItem(self, k):
+        # Use this rather than self.claim["payload"]["payload"][k] for items that may be in the blob store, eg: eventlog
+        return claims.getPayloadItem(self.claim, k)
+
     def apply(self):
         # In subclasses this is overridden to actually apply the rule. It must end with a return.self.returnMessage(...) call
 
@@ -13,9 +13,10 @@ from a10.asvr.rules import baserule
 class AlwaysSuccess(baserule.BaseRule):
     NAME = "nullrules/AlwaysSuccess"
     DESCRIPTION = "Always success null rule. This return always returns SUCCESS"
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = (
             "Always success null rule. This return always returns SUCCESS"
         )
@@ -31,9 +32,10 @@ class AlwaysSuccess(baserule.BaseRule):
 class AlwaysFail(baserule.BaseRule):
     NAME = "nullrules/AlwaysFail"
     DESCRIPTION = "Always fail null rule. This return always returns FAIL"
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = "Always fail null rule. This return always returns FAIL"
 
     def apply(self):
@@ -47,9 +49,10 @@ class AlwaysFail(baserule.BaseRule):
 class AlwaysError(baserule.BaseRule):
     NAME = "nullrules/AlwaysError"
     DESCRIPTION = "Always error null rule. This return always returns ERROR"
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = "Always error null rule. This return always returns ERROR"
 
     def apply(self):
@@ -63,9 +66,10 @@ class AlwaysError(baserule.BaseRule):
 class AlwaysNoResult(baserule.BaseRule):
     NAME = "nullrules/AlwaysNoResult"
     DESCRIPTION = "Always no result null rule. This return always returns NORESULT"
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = (
             "Always no result null rule. This return always returns NORESULT"
         )
@@ -14,9 +14,10 @@ from . import baserule
 class PCRsAllUnassigned(baserule.BaseRule):
     NAME = "tpm2rules/PCRsAllUnassigned"
     DESCRIPTION = "TPM2 Check all PCRS for given bank to be unassigned"
+    CLAIMFIELDS = ["payload.payload.pcrs"]
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
 
     def apply(self):
         try:
@@ -95,9 +96,10 @@ class PCRsAllUnassigned(baserule.BaseRule):
 class TPM2FirmwareVersion(baserule.BaseRule):
     NAME = "tpm2rules/TPM2FirmwareVersion"
     DESCRIPTION = "TPM2 Check Firmware Version for Given Device"
+    CLAIMFIELDS = ["payload.payload.quote.firmwareVersion"]
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
 
     def apply(self):
         sev = self.setExpectedValue()
@@ -142,8 +144,10 @@ class TPM2FirmwareVersion(baserule.BaseRule):
 
 
 class TPM2QuoteMagicNumber(baserule.BaseRule):
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    CLAIMFIELDS = ["payload.payload.quote.magic"]
+
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = "TPM2 Check TPMS_ATTEST Magic Number Correct"
 
     def apply(self):
@@ -167,8 +171,10 @@ class TPM2QuoteMagicNumber(baserule.BaseRule):
 
 
 class TPM2QuoteType(baserule.BaseRule):
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    CLAIMFIELDS = ["payload.payload.quote.type"]
+
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = "TPM2 Check TPMS_ATTEST Type Correct"
 
     def apply(self):
@@ -194,9 +200,10 @@ class TPM2QuoteType(baserule.BaseRule):
 class TPM2QuoteAttestedValue(baserule.BaseRule):
     NAME = "tpm2rules/TPM2QuoteAttestedValue"
     DESCRIPTION = "TPM2 Check TPMS_ATTEST Magic Number Correct"
+    CLAIMFIELDS = ["payload.payload.quote.attested.quote.pcrDigest"]
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
 
     def apply(self):
         sev = self.setExpectedValue()
@@ -249,8 +256,10 @@ class TPM2QuoteAttestedValue(baserule.BaseRule):
 
 
 class TPM2Safe(baserule.BaseRule):
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    CLAIMFIELDS = ["payload.payload.quote.clockInfo.safe"]
+
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
         self.description = "TPM2 Check Safe == 1"
 
     def apply(self):
@@ -281,16 +290,27 @@ class TPM2Safe(baserule.BaseRule):
 class TPM2QuoteStandardVerify(baserule.BaseRule):
     NAME = "tpm2rules/TPM2QuoteStandardVerify"
     DESCRIPTION = "TPM2 Check the quote for its overall integrity, including type, magic number, safe, attestedValue and firmware"
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
+        # The subrules read fields this rule does not, so they only share a whole claim
+        self.wholeClaim = claim
 
     def apply(self):
-        magicRule_result = TPM2QuoteMagicNumber(self.claimID, self.parameters).apply()
-        quoteType_result = TPM2QuoteType(self.claimID, self.parameters).apply()
-        safe_result = TPM2Safe(self.claimID, self.parameters).apply()
-        av_result = TPM2QuoteAttestedValue(self.claimID, self.parameters).apply()
-        fw_result = TPM2FirmwareVersion(self.claimID, self.parameters).apply()
+        magicRule_result = TPM2QuoteMagicNumber(
+            self.claimID, self.parameters, self.wholeClaim
+        ).apply()
+        quoteType_result = TPM2QuoteType(
+            self.claimID, self.parameters, self.wholeClaim
+        ).apply()
+        safe_result = TPM2Safe(self.claimID, self.parameters, self.wholeClaim).apply()
+        av_result = TPM2QuoteAttestedValue(
+            self.claimID, self.parameters, self.wholeClaim
+        ).apply()
+        fw_result = TPM2FirmwareVersion(
+            self.claimID, self.parameters, self.wholeClaim
+        ).apply()
 
         subresults = []
         subresults.append(magicRule_result)
@@ -366,9 +386,10 @@ class TPM2QuoteStandardVerify(baserule.BaseRule):
 class TPM2CredentialVerify(baserule.BaseRule):
     NAME = "tpm2rules/TPM2CredentialVerify"
     DESCRIPTION = "Check the credentials returned from an element according to the make/activate credential process"
+    CLAIMFIELDS = ["payload.payload.secret", "header.transientdata.secret"]
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
 
     def apply(self):
         try:
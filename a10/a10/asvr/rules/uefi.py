@@ -11,9 +11,10 @@ from . import baserule
 class ValidUEFIEventLog(baserule.BaseRule):
     NAME = "uefi/ValidUEFIEventLog"
     DESCRIPTION = "Validates a given UEFI EventLog against something..."
+    CLAIMFIELDS = []
 
-    def __init__(self, cid, ps):
-        super().__init__(cid, ps)
+    def __init__(self, cid, ps, claim=None):
+        super().__init__(cid, ps, claim)
 
     def apply(self):
         return self.returnMessage(
@@ -0,0 +1,591 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Periodic attestation of elements against policies.
+
+   An expected value with an interval, in seconds, is attested and verified that often:
+
+      { "elementID": ..., "policyID": ..., "interval": 300,
+        "rules": [ ["tpm2rules/TPM2QuoteStandardVerify", {}] ], "cps": {} }
+
+   Without rules the element is only attested, cps are the additional parameters of the attestation. The time
+   each is next due is kept in the schedule collection, indexed by due, so that a restarted scheduler carries on
+   where it stopped and each poll reads only what is due. Intervals are varied by the jitter so that elements
+   added together do not stay in step. At most maxconcurrency attestations run at once, and at most perendpoint
+   against any one trust agent, and if a budget is set at most that many are started per second.
+
+   With adaptive on, the interval of each element and policy is multiplied by a factor which follows its latest
+   results, as counted by the database with a10.asvr.analytics.elementanalytics.getResultCountsByPolicy. The
+   window is history attestations, ie: history times the number of rules results, which includes any results of
+   the element and policy made outside the scheduler. When every result in the window succeeded the factor is
+   multiplied by stretch, up to maxfactor, and after a failure or error it drops to minfactor. It is kept when no
+   claim was obtained, eg: the trust agent was unreachable.
+
+   Messages from trust agents, eg: ta_startup, posted to a10rest's /msg and announced on AS/MSG, make the
+   scheduler attest the scheduled policies of the element ahead of the scheduled work, dropping their factors to
+   minfactor. The messages for an element are coalesced into one while they wait, so a storm of them, eg: after
+   a power cut, attests each element once. They are taken in order of PRIORITIES and then of arrival, at most
+   priorityrate elements per second, and an element is not attested this way again within cooldown seconds.
+
+   Run one scheduler per database with:  python3 -m a10.asvr.scheduler
+"""
+
+import ast
+import collections
+import concurrent.futures
+import http.server
+import json
+import random
+import threading
+import time
+
+import a10.asvr.db.configuration
+import a10.asvr.db.core
+import a10.asvr.db.mqtt
+import a10.structures.constants
+import a10.structures.timestamps
+
+from a10.asvr import attestation, elements, expectedvalues
+from a10.asvr.analytics import elementanalytics
+
+# The number of recent attestations the lag is reported over
+LAGSAMPLES = 1000
+
+# The seconds the throughput is reported over
+THROUGHPUTWINDOW = 60.0
+
+# The order in which waiting trust agent messages are taken, lowest first, other ta_ messages come last
+PRIORITIES = {"ta_startup": 0, "ta_signal": 1, "ta_reannounce": 2}
+DEFAULTPRIORITY = 3
+
+
+def scheduleFor(ev):
+    """
+    Returns the schedule entry of an expected value, without its due time
+
+    :params dict ev: the expected value
+    :return: the entry, or None if the expected value has no interval
+    :rtype: dict
+    """
+    try:
+        interval = float(ev.get("interval", 0))
+    except (TypeError, ValueError):
+        return None
+    if interval <= 0:
+        return None
+
+    return {
+        "elementID": ev["elementID"],
+        "policyID": ev["policyID"],
+        "interval": interval,
+        "rules": [[r[0], r[1]] for r in ev.get("rules", [])],
+        "cps": ev.get("cps", {}),
+    }
+
+
+def nextDue(t, s, jitter):
+    # The interval of the entry as adapted by its factor
+    interval = s["interval"] * s.get("factor", 1.0)
+    return t + interval * (1.0 + random.uniform(-jitter, jitter))
+
+
+def adapt(s, settings, attested):
+    """
+    Returns the factor of a schedule entry after it has been attested, see the adaptive settings
+
+    :params dict s: the schedule entry
+    :params dict settings: the [scheduler] section of /etc/a10.conf
+    :params bool attested: whether a claim was obtained
+    :return: the factor
+    :rtype: float
+    """
+    factor = s.get("factor", 1.0)
+    if not settings["adaptive"]:
+        return 1.0
+    # Without a claim, eg: the trust agent is unreachable, there is nothing new to go on and attesting it more
+    # often would only add load, its ta_startup message drops the factor when it is back
+    if not attested:
+        return factor
+    if s["rules"] == []:
+        return factor
+
+    # Each attestation adds one result per rule, so the window covers history attestations
+    n = settings["history"] * len(s["rules"])
+    counts = elementanalytics.getResultCountsByPolicy(s["elementID"], s["policyID"], n)
+    if (
+        counts[a10.structures.constants.VERIFYFAIL] > 0
+        or counts[a10.structures.constants.VERIFYERROR] > 0
+    ):
+        return settings["minfactor"]
+    if counts[a10.structures.constants.VERIFYSUCCEED] >= n:
+        return min(settings["maxfactor"], factor * settings["stretch"])
+    return factor
+
+
+def sync(now=None):
+    """
+    Brings the schedule into line with the intervals of the expected values
+
+    :params float now: the current time, defaults to now
+    :return: the number of entries, and of those added or changed and deleted
+    :rtype: dict
+    """
+    if now is None:
+        now = a10.structures.timestamps.now()
+
+    wanted = {}
+    for ev in expectedvalues.getExpectedValuesFull():
+        s = scheduleFor(ev)
+        if s is not None:
+            wanted[(s["elementID"], s["policyID"])] = s
+
+    existing = {
+        (s["elementID"], s["policyID"]): s
+        for s in a10.asvr.db.core.getScheduleEntries()
+    }
+
+    changed = []
+    demand = 0.0
+    for (k, s) in wanted.items():
+        old = existing.get(k)
+        if old is None:
+            # New entries are spread over their first interval rather than all attested at once
+            s["due"] = now + random.uniform(0, s["interval"])
+            s["lastRun"] = None
+            s["factor"] = 1.0
+            changed.append(s)
+        elif any(old.get(f) != s[f] for f in ["interval", "rules", "cps"]):
+            s["due"] = min(old["due"], now + s["interval"])
+            s["lastRun"] = old.get("lastRun")
+            s["factor"] = old.get("factor", 1.0)
+            changed.append(s)
+        else:
+            s = old
+        demand = demand + 1.0 / (s["interval"] * s.get("factor", 1.0))
+    a10.asvr.db.core.updateScheduleEntries(changed)
+
+    deleted = [k for k in existing if k not in wanted]
+    for (e, p) in deleted:
+        a10.asvr.db.core.deleteScheduleEntry(e, p)
+
+    # The attestations per second needed to keep to every interval, to compare with the budget
+    return {
+        "entries": len(wanted),
+        "changed": len(changed),
+        "deleted": len(deleted),
+        "demand": round(demand, 3),
+    }
+
+
+class Scheduler:
+    def __init__(self, settings=a10.asvr.db.configuration.SCHEDULER):
+        """
+	   Initialises a scheduler, call run to start it
+
+	   :param dict settings: see the [scheduler] section of /etc/a10.conf
+		"""
+
+        self.settings = settings
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings["maxconcurrency"], thread_name_prefix="a10scheduler"
+        )
+        self.stopping = threading.Event()
+
+        # The element and policy pairs being attested and the number of attestations per endpoint
+        self.lock = threading.Lock()
+        self.running = set()
+        self.endpoints = collections.Counter()
+
+        self.counts = {
+            "dispatched": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "deferred": 0,
+            "overbudget": 0,
+            "stretched": 0,
+            "shrunk": 0,
+            "syncs": 0,
+        }
+        self.lags = collections.deque(maxlen=LAGSAMPLES)
+        self.completions = collections.deque()
+        self.lastSync = None
+
+        # A token bucket holding at most one second of the budget
+        self.tokens = settings["budget"]
+        self.refilled = time.monotonic()
+
+        # The trust agent messages waiting, one per element, and the elements attested for one recently
+        self.messages = {}
+        self.recent = {}
+        self.messageCounts = {
+            "received": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "started": 0,
+            "unscheduled": 0,
+        }
+        self.messageTokens = settings["priorityrate"]
+        self.messagesRefilled = time.monotonic()
+
+    def message(self, e, op, now=None):
+        """
+	   Queues the attestation of an element because its trust agent sent a message, see PRIORITIES
+
+	   :param str e: the element id
+	   :param str op: the message, only those starting ta_ are queued
+	   :param float now: the time the message was received, defaults to now
+		"""
+
+        if not isinstance(op, str) or not op.startswith("ta_"):
+            return
+        if now is None:
+            now = a10.structures.timestamps.now()
+        p = PRIORITIES.get(op, DEFAULTPRIORITY)
+
+        with self.lock:
+            self.messageCounts["received"] = self.messageCounts["received"] + 1
+            m = self.messages.get(e)
+            if m is not None:
+                self.messageCounts["coalesced"] = self.messageCounts["coalesced"] + 1
+                m["count"] = m["count"] + 1
+                if p < m["priority"]:
+                    m["priority"] = p
+                    m["op"] = op
+            elif len(self.messages) >= self.settings["messagequeue"]:
+                self.messageCounts["dropped"] = self.messageCounts["dropped"] + 1
+            else:
+                self.messages[e] = {
+                    "elementID": e,
+                    "op": op,
+                    "priority": p,
+                    "received": now,
+                    "count": 1,
+                }
+
+    def receiveMessage(self, payload):
+        # Messages announced on AS/MSG, this is called on the MQTT client's thread so only queues
+        try:
+            m = ast.literal_eval(payload.decode("utf-8"))
+            self.message(m["data"]["elementid"], m["op"])
+        except Exception as err:
+            print("Unreadable AS/MSG message ", err)
+
+    def start(self, s, endpoint, now, lag):
+        # Called holding the lock, the attestation is submitted once the new due time is kept
+        self.endpoints[endpoint] = self.endpoints[endpoint] + 1
+        self.running.add((s["elementID"], s["policyID"]))
+        self.lags.append(lag)
+        self.counts["dispatched"] = self.counts["dispatched"] + 1
+
+        s["lastRun"] = now
+        s["due"] = nextDue(now, s, self.settings["jitter"])
+        return (s, endpoint)
+
+    def pollMessages(self, now, free):
+        """
+	   Starts the attestations asked for by trust agent messages, as far as the limits allow
+
+	   :param float now: the current time
+	   :param int free: the number that may be started
+	   :return: the attestations started, as schedule entry and endpoint
+	   :rtype: list
+		"""
+
+        rate = self.settings["priorityrate"]
+        t = time.monotonic()
+        self.messageTokens = min(
+            max(rate, 1.0), self.messageTokens + (t - self.messagesRefilled) * rate
+        )
+        self.messagesRefilled = t
+        limit = int(self.messageTokens)
+        if limit <= 0 or free <= 0:
+            return []
+
+        with self.lock:
+            cooldown = self.settings["cooldown"]
+            for (e, t0) in list(self.recent.items()):
+                if now - t0 >= cooldown:
+                    del self.recent[e]
+            waiting = sorted(
+                [m for m in self.messages.values() if m["elementID"] not in self.recent],
+                key=lambda m: (m["priority"], m["received"]),
+            )[0 : self.settings["batch"]]
+        if waiting == []:
+            return []
+
+        es = elements.getElementsByIds([m["elementID"] for m in waiting], ["endpoint"])
+
+        started = []
+        left = []
+        n = 0
+        for m in waiting:
+            if n >= limit or len(started) >= free:
+                break
+            e = m["elementID"]
+            endpoint = es.get(e, {}).get("endpoint")
+            with self.lock:
+                busy = self.endpoints[endpoint] >= self.settings["perendpoint"]
+            if busy:
+                # Left waiting, it is picked up again by a later poll
+                continue
+
+            ss = a10.asvr.db.core.getScheduleEntries(e)
+            with self.lock:
+                ss = [s for s in ss if (e, s["policyID"]) not in self.running]
+                self.messages.pop(e, None)
+                self.recent[e] = now
+                if ss == []:
+                    self.messageCounts["unscheduled"] = (
+                        self.messageCounts["unscheduled"] + 1
+                    )
+                    continue
+                self.messageCounts["started"] = self.messageCounts["started"] + 1
+                n = n + 1
+                # As many of the element's policies as the limits allow, the others are made due
+                slots = min(
+                    free - len(started),
+                    self.settings["perendpoint"] - self.endpoints[endpoint],
+                )
+                for s in ss:
+                    if self.settings["adaptive"]:
+                        s["factor"] = self.settings["minfactor"]
+                    if slots > 0:
+                        started.append(self.start(s, endpoint, now, now - m["received"]))
+                        slots = slots - 1
+                    else:
+                        s["due"] = min(s["due"], now)
+                        left.append(s)
+
+        # Made due, they are started by this or later polls as the limits allow
+        if left != []:
+            a10.asvr.db.core.updateScheduleEntries(left)
+
+        self.messageTokens = self.messageTokens - n
+        return started
+
+    def poll(self, now):
+        """
+	   Starts the attestations that are due, as far as the limits allow
+
+	   :param float now: the current time
+	   :return: the number started
+	   :rtype: int
+		"""
+
+        with self.lock:
+            free = self.settings["maxconcurrency"] - len(self.running)
+
+        # Whether the budget rather than the concurrency limits what is started
+        budgeted = False
+        budget = self.settings["budget"]
+        if budget > 0:
+            t = time.monotonic()
+            self.tokens = min(
+                max(budget, 1.0), self.tokens + (t - self.refilled) * budget
+            )
+            self.refilled = t
+            if int(self.tokens) < free:
+                free = max(0, int(self.tokens))
+                budgeted = True
+        if free <= 0 and not budgeted:
+            return 0
+
+        # Trust agent messages go ahead of the scheduled work
+        started = self.pollMessages(now, free)
+
+        if len(started) >= free:
+            # Nothing more may be started, so what is due is not read
+            if budgeted:
+                with self.lock:
+                    # Counts the polls which left something due, or did not look, to keep to the budget
+                    self.counts["overbudget"] = self.counts["overbudget"] + 1
+        else:
+            due = [
+                s
+                for s in a10.asvr.db.core.getDueScheduleEntries(
+                    now, self.settings["batch"]
+                )
+                if (s["elementID"], s["policyID"]) not in self.running
+            ]
+            # The endpoints of the whole batch in one query
+            es = elements.getElementsByIds([s["elementID"] for s in due], ["endpoint"])
+
+            with self.lock:
+                for s in due:
+                    if len(started) >= free:
+                        if budgeted:
+                            self.counts["overbudget"] = self.counts["overbudget"] + 1
+                        break
+                    endpoint = es.get(s["elementID"], {}).get("endpoint")
+                    if self.endpoints[endpoint] >= self.settings["perendpoint"]:
+                        # Left due, it is picked up again by a later poll
+                        self.counts["deferred"] = self.counts["deferred"] + 1
+                        continue
+
+                    started.append(self.start(s, endpoint, now, now - s["due"]))
+
+        if budget > 0:
+            self.tokens = self.tokens - len(started)
+        if started == []:
+            return 0
+
+        # The next due times are kept before attesting, so a restart does not attest these again straight away
+        a10.asvr.db.core.updateScheduleEntries([s for (s, endpoint) in started])
+        for (s, endpoint) in started:
+            self.pool.submit(self.attest, s, endpoint)
+        return len(started)
+
+    def attest(self, s, endpoint):
+        attested = False
+        succeeded = False
+        previous = s.get("factor", 1.0)
+        factor = previous
+        try:
+            if s["rules"] == []:
+                r = attestation.attest(s["elementID"], s["policyID"], s["cps"])
+                attested = r.rc() == a10.structures.constants.SUCCESS
+                succeeded = attested
+            else:
+                av = attestation.attestAndVerify(
+                    s["elementID"],
+                    s["policyID"],
+                    s["cps"],
+                    [(r[0], r[1]) for r in s["rules"]],
+                )
+                attested = av["claim"].rc() == a10.structures.constants.SUCCESS
+                succeeded = attested and all(
+                    r.rc() == a10.structures.constants.SUCCESS for r in av["results"]
+                )
+
+            # The next due time was set when this was started, it changes if the factor does
+            factor = adapt(s, self.settings, attested)
+            if factor != previous:
+                s["factor"] = factor
+                s["due"] = nextDue(s["lastRun"], s, self.settings["jitter"])
+                a10.asvr.db.core.updateScheduleEntries([s])
+        except Exception as err:
+            print("Scheduled attestation failed ", s["elementID"], s["policyID"], err)
+
+        with self.lock:
+            self.running.discard((s["elementID"], s["policyID"]))
+            self.endpoints[endpoint] = self.endpoints[endpoint] - 1
+            if self.endpoints[endpoint] <= 0:
+                del self.endpoints[endpoint]
+            if succeeded:
+                self.counts["succeeded"] = self.counts["succeeded"] + 1
+            else:
+                self.counts["failed"] = self.counts["failed"] + 1
+            if factor > previous:
+                self.counts["stretched"] = self.counts["stretched"] + 1
+            elif factor < previous:
+                self.counts["shrunk"] = self.counts["shrunk"] + 1
+            self.completions.append(time.monotonic())
+
+    def run(self):
+        """
+	   Syncs the schedule with the expected values and polls for due attestations until stop is called
+		"""
+
+        synced = None
+        while not self.stopping.is_set():
+            n = 0
+            try:
+                if (
+                    synced is None
+                    or time.monotonic() - synced >= self.settings["syncinterval"]
+                ):
+                    self.lastSync = sync()
+                    self.counts["syncs"] = self.counts["syncs"] + 1
+                    synced = time.monotonic()
+                n = self.poll(a10.structures.timestamps.now())
+            except Exception as err:
+                print("Scheduler poll failed ", err)
+
+            # A full batch means more is due, so poll again straight away
+            if n < self.settings["batch"]:
+                self.stopping.wait(self.settings["poll"])
+
+        self.pool.shutdown(wait=True)
+
+    def stop(self):
+        self.stopping.set()
+
+    def getStatistics(self):
+        """
+	   Returns the counts of attestations, the lag behind their due times and the throughput
+
+	   :return: lag is in seconds over the last LAGSAMPLES attestations, throughput is per second over the last THROUGHPUTWINDOW seconds
+	   :rtype: dict
+		"""
+
+        with self.lock:
+            s = dict(self.counts)
+            s["running"] = len(self.running)
+            lags = sorted(self.lags)
+            cutoff = time.monotonic() - THROUGHPUTWINDOW
+            while self.completions and self.completions[0] < cutoff:
+                self.completions.popleft()
+            s["throughput"] = round(len(self.completions) / THROUGHPUTWINDOW, 3)
+
+        if lags != []:
+            s["lag"] = {
+                "mean": round(sum(lags) / len(lags), 3),
+                "p95": round(lags[int(0.95 * (len(lags) - 1))], 3),
+                "max": round(lags[-1], 3),
+            }
+        else:
+            s["lag"] = None
+        with self.lock:
+            s["messages"] = dict(self.messageCounts)
+            s["messages"]["waiting"] = len(self.messages)
+        s["budget"] = self.settings["budget"]
+        s["lastsync"] = self.lastSync
+        return s
+
+
+def serveMetrics(scheduler, port, address="127.0.0.1"):
+    """
+    Serves the scheduler's statistics as JSON over HTTP, on a background thread
+
+    :params Scheduler scheduler: the scheduler
+    :params int port: the port
+    :params str address: the address listened on, the loopback address by default
+    :return: the server
+    """
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(scheduler.getStatistics()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((address, port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="a10schedulermetrics", daemon=True
+    ).start()
+    return server
+
+
+def main():
+    scheduler = Scheduler()
+    a10.asvr.db.mqtt.subscribe("AS/MSG", scheduler.receiveMessage)
+    port = a10.asvr.db.configuration.SCHEDULER["metricsport"]
+    address = a10.asvr.db.configuration.SCHEDULER["metricsaddress"]
+    if port > 0:
+        serveMetrics(scheduler, port, address)
+        print("Scheduler metrics on ", address, port)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
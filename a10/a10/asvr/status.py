@@ -0,0 +1,97 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The trust state of the elements, from the latest result of each element, policy and rule.
+
+   A policy is verified by one or more rules, each with its own result, and an element is only trusted if the
+   latest result of every rule of every policy succeeded.
+
+   The latest results are kept in the elementstatus collection as results are added (see a10.asvr.results), so
+   the state of the whole fleet is read without scanning the results. For a database with results from before
+   elementstatus existed run a10.asvr.db.core.rebuildElementStatus once.
+"""
+
+import a10.asvr.db.core
+import a10.asvr.elements
+import a10.structures.constants
+import a10.structures.returncode
+
+# Every policy's latest result succeeded
+TRUSTED = "trusted"
+# At least one policy's latest result failed
+UNTRUSTED = "untrusted"
+# Not attested, or a latest result is neither a success nor a failure, eg: a rule error
+UNKNOWN = "unknown"
+
+
+def verdict(ss):
+    """
+    Rolls the latest results of an element's policies and rules up into one verdict
+
+    :params list ss: the status entries of one element, one per policy and rule
+    :return: TRUSTED, UNTRUSTED or UNKNOWN
+    :rtype: str
+    """
+    rs = [s["result"] for s in ss]
+    if a10.structures.constants.VERIFYFAIL in rs:
+        return UNTRUSTED
+    if rs != [] and all(r == a10.structures.constants.VERIFYSUCCEED for r in rs):
+        return TRUSTED
+    return UNKNOWN
+
+
+def elementStatus(e, ss):
+    if ss == []:
+        lastAttested = None
+    else:
+        lastAttested = max(s["verifiedAt"] for s in ss)
+    return {
+        "elementID": e,
+        "lastAttested": lastAttested,
+        "verdict": verdict(ss),
+        "policies": ss,
+    }
+
+
+def getElementStatus(e):
+    """
+    Returns the trust state of an element
+
+    :params str e: the element id
+    :return: return code structure with the elementID, lastAttested, verdict and the latest result of each policy and rule
+    :rtype: ReturnCode
+    """
+    el = a10.asvr.elements.getElement(e)
+    if el.rc() != a10.structures.constants.SUCCESS:
+        return el
+
+    s = elementStatus(e, a10.asvr.db.core.getElementStatus(e))
+    s["name"] = el.msg()["name"]
+    return a10.structures.returncode.ReturnCode(a10.structures.constants.SUCCESS, s)
+
+
+def getFleetStatus():
+    """
+    Returns the trust state of every element and the number of elements with each verdict
+
+    :return: a dict with elements, a list of the same entries as getElementStatus sorted by element id, and summary
+    :rtype: dict
+    """
+    es = [e["itemid"] for e in a10.asvr.elements.getElements()]
+    names = a10.asvr.elements.getElementsByIds(es, ["name"])
+
+    byElement = {}
+    for s in a10.asvr.db.core.getElementStatus():
+        byElement.setdefault(s["elementID"], []).append(s)
+
+    fleet = []
+    summary = {TRUSTED: 0, UNTRUSTED: 0, UNKNOWN: 0}
+    for e in sorted(es):
+        s = elementStatus(e, byElement.get(e, []))
+        s["name"] = names.get(e, {}).get("name")
+        summary[s["verdict"]] = summary[s["verdict"]] + 1
+        fleet.append(s)
+
+    summary["total"] = len(fleet)
+    return {"elements": fleet, "summary": summary}
@@ -44,3 +44,10 @@ PROTOCOLSUCCESS = SUCCESS
 PROTOCOLEXECUTIONFAILURE = 4000
 PROTOCOLNETWORKFAILURE = 4002
 UNREGISTEREDPROTOCOL = 4001
+
+# Storage backend failures
+UNREGISTEREDBACKEND = 5001
+
+# Job failures
+JOBQUEUEFULL = 6001
+CALLBACKNOTALLOWED = 6002
@@ -6,5 +6,13 @@ import datetime
 
 
 def now():
+    """Returns the current time as a POSIX timestamp.
+
+	Timestamps are stored as numbers so that the database can compare and range query them.
+
+	:return: seconds since the epoch, UTC
+	:rtype: float
+	"""
+
     n = datetime.datetime.now(datetime.timezone.utc)
-    return str(n.timestamp())
+    return n.timestamp()
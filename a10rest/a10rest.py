@@ -5,18 +5,22 @@
 import datetime
 import os
 import sys
+import time
 
 from a10.asvr import (
     elements,
     policies,
     attestation,
     claims,
+    events,
     expectedvalues,
+    jobs,
     results,
+    status,
     types,
 )
 from a10.structures import constants
-from a10.asvr.db import announce
+from a10.asvr.db import announce, cache, core, logsink
 from bson.objectid import ObjectId
 from flask import Flask, request, send_from_directory, jsonify
 from flask.json import JSONEncoder
@@ -46,6 +50,42 @@ def hello():
     return "Hello from A10REST"
 
 
+@a10rest.route("/status/database", methods=["GET"])
+def getdatabasestatus():
+    # Per process, each worker of a pre-forking server has its own connections
+    return jsonify(core.getClientStatistics()), 200
+
+
+@a10rest.route("/status/cache", methods=["GET"])
+def getcachestatus():
+    return jsonify(cache.getStatistics()), 200
+
+
+@a10rest.route("/status/log", methods=["GET"])
+def getlogstatus():
+    return jsonify(logsink.getStatistics()), 200
+
+
+@a10rest.route("/status/jobs", methods=["GET"])
+def getjobsstatus():
+    # Per process, jobs are held by the process which runs them
+    return jsonify(jobs.getStatistics()), 200
+
+
+@a10rest.route("/status/fleet", methods=["GET"])
+def getfleetstatus():
+    return jsonify(status.getFleetStatus()), 200
+
+
+@a10rest.route("/status/element/<itemid>", methods=["GET"])
+def getelementstatus(itemid):
+    s = status.getElementStatus(itemid)
+    if s.rc() == constants.SUCCESS:
+        return jsonify(s.msg()), 200
+    else:
+        return jsonify(s.msg()), 404
+
+
 #
 # Swagger - documentation for OpenAPI
 #
@@ -305,8 +345,14 @@ def getclaim(itemid):
 
     if e.rc() != constants.SUCCESS:
         return e.msg(), 404
-    else:
-        return e.msg(), 200
+
+    # Items kept in the blob store are returned as they were sent by the trust agent
+    c = e.msg()
+    payload = c.get("payload", {}).get("payload")
+    if isinstance(payload, dict):
+        for k in payload:
+            payload[k] = claims.getPayloadItem(c, k)
+    return c, 200
 
 
 #
@@ -330,17 +376,17 @@ def getresultslatest():
     args = request.args
     out = list()
     
-    if("timestamp" in args): # All results since timestamp
+    if("timestamp" in args): # All results since timestamp, optionally until another timestamp
         try:
-            out = results.getResultsSince(float(args["timestamp"]))
+            until = None
+            if("until" in args):
+                until = float(args["until"])
+            out = results.getResultsSince(float(args["timestamp"]), until)
         except ValueError:
             return jsonify(out), 200
-    else: ## First latest result of each element
-        elems = elements.getElements()
-        for i in range(len(elems)):
-            r = results.getLatestResults(elems[i]['itemid'],1)
-            if(r and r[0]):
-                out.append(r[0])
+    else: ## First latest result of each element, or of each element and policy
+        byPolicy = args.get("bypolicy", "false").lower() == "true"
+        out = results.getLatestResultPerElement(byPolicy)
 
 
     return jsonify(out), 200
@@ -366,14 +412,30 @@ def getresultslatestlimit(itemid):
 #
 
 
+def submitted(j):
+    # 202 with the job id, the job is read from /job/<id>
+    if j.rc() == constants.CALLBACKNOTALLOWED:
+        return str(j.msg()), 400
+    if j.rc() != constants.SUCCESS:
+        return str(j.msg()), 503
+    return jsonify({"job": j.msg()}), 202, {"Location": "/job/" + j.msg()}
+
+
 @a10rest.route("/attest", methods=["POST"])
 def attest():
+    # With "async": true, or a "callback" URL, the attestation runs in the background, see /job/<id>
     content = request.json
     print("content", content)
     eid = content["eid"]
     pid = content["pid"]
     cps = content["cps"]
 
+    if content.get("async") or content.get("callback"):
+        c = jobs.checkCallback(content.get("callback"))
+        if c.rc() != constants.SUCCESS:
+            return str(c.msg()), 400
+        return submitted(jobs.attest(eid, pid, cps, content.get("callback")))
+
     e = attestation.attest(eid, pid, cps)
 
     if e.rc() != constants.SUCCESS:
@@ -382,13 +444,73 @@ def attest():
         return e.msg(), 201
 
 
+@a10rest.route("/attest/batch", methods=["POST"])
+def attestbatch():
+    # The body is {"requests": [{"eid":..., "pid":..., "cps":...}, ...]} and optionally "maxconcurrency"
+    content = request.json
+    try:
+        reqs = content["requests"]
+        maxconcurrency = content.get("maxconcurrency")
+        if maxconcurrency is not None:
+            maxconcurrency = int(maxconcurrency)
+        for r in reqs:
+            tmp = r["eid"]
+            tmp = r["pid"]
+    except (KeyError, TypeError, ValueError, AttributeError) as err:
+        return "Malformed batch " + str(err), 400
+
+    b = attestation.attestMany(reqs, maxconcurrency)
+
+    cs = []
+    for (r, c) in zip(reqs, b["claims"]):
+        if c.rc() == constants.SUCCESS:
+            cs.append({"eid": r["eid"], "pid": r["pid"], "rc": c.rc(), "claim": c.msg()})
+        else:
+            cs.append({"eid": r["eid"], "pid": r["pid"], "rc": c.rc(), "error": str(c.msg())})
+    return jsonify({"claims": cs, "elapsed": b["elapsed"]}), 200
+
+
+@a10rest.route("/attestverify", methods=["POST"])
+def attestverify():
+    # The body is {"eid":..., "pid":..., "cps":..., "rules": [[rule name, parameters], ...]}
+    content = request.json
+    try:
+        eid = content["eid"]
+        pid = content["pid"]
+        cps = content["cps"]
+        rules = [(r[0], r[1]) for r in content["rules"]]
+    except (KeyError, TypeError, IndexError) as err:
+        return "Malformed request " + str(err), 400
+
+    av = attestation.attestAndVerify(eid, pid, cps, rules)
+
+    c = av["claim"]
+    if c.rc() != constants.SUCCESS:
+        return str(c.msg()), 400
+
+    rs = []
+    for (r, v) in zip(rules, av["results"]):
+        if v.rc() == constants.SUCCESS:
+            rs.append({"rule": r[0], "rc": v.rc(), "result": v.msg()})
+        else:
+            rs.append({"rule": r[0], "rc": v.rc(), "error": str(v.msg())})
+    return jsonify({"claim": c.msg(), "results": rs}), 201
+
+
 @a10rest.route("/verify", methods=["POST"])
 def verify():
+    # With "async": true, or a "callback" URL, the verification runs in the background, see /job/<id>
     content = request.json
     print("content", content)
     cid = content["cid"]
     rul = content["rule"]
 
+    if content.get("async") or content.get("callback"):
+        c = jobs.checkCallback(content.get("callback"))
+        if c.rc() != constants.SUCCESS:
+            return str(c.msg()), 400
+        return submitted(jobs.verify(cid, rul, content.get("callback")))
+
     e = attestation.verify(cid, rul)
 
     if e.rc() != constants.SUCCESS:
@@ -397,6 +519,20 @@ def verify():
         return e.msg(), 201
 
 
+@a10rest.route("/job/<itemid>", methods=["GET"])
+def getjob(itemid):
+    # Long poll: with wait, in seconds, returns when the job finishes or the wait has passed
+    try:
+        wait = max(0.0, float(request.args.get("wait", 0)))
+    except ValueError:
+        return "Invalid wait", 400
+
+    j = jobs.getJob(itemid, wait)
+    if j.rc() != constants.SUCCESS:
+        return j.msg(), 404
+    return jsonify(j.msg()), 200
+
+
 
 #
 # Rules
@@ -422,6 +558,76 @@ def getRules():
 
 
 
+#
+# LOG
+#
+
+
+@a10rest.route("/log", methods=["GET"])
+def getlog():
+    args = request.args
+
+    try:
+        lim = int(args.get("limit", 250))
+    except ValueError:
+        lim = 250
+    lim = max(1, min(lim, 1000))
+
+    try:
+        page = announce.getLogEntries(
+            lim, args.get("cursor"), args.get("ch"), args.get("op")
+        )
+    except ValueError as e:
+        return str(e), 400
+
+    return jsonify(page), 200
+
+
+#
+# EVENTS
+#
+
+
+@a10rest.route("/events", methods=["GET"])
+def getevents():
+    # Long poll: returns when limit changes are read or wait seconds have passed,
+    # the returned since is passed to the next call to continue from there
+    args = request.args
+    since = args.get("since")
+
+    try:
+        lim = max(1, min(int(args.get("limit", 100)), 1000))
+        wait = max(0.0, min(float(args.get("wait", 10)), 60.0))
+    except ValueError:
+        return "Invalid limit or wait", 400
+
+    try:
+        changes = events.stream(since, idle=1)
+    except NotImplementedError:
+        # Eg: SQLite, or MongoDB not running as a replica set
+        return "Change events are not supported by the storage backend", 501
+    except ValueError as err:
+        return "Invalid since " + str(err), 400
+
+    out = []
+    deadline = time.monotonic() + wait
+    try:
+        for e in changes:
+            since = e["token"]
+            if e["op"] != "idle":
+                out.append(e)
+            if len(out) >= lim or time.monotonic() >= deadline:
+                break
+    except ValueError as err:
+        # The changes after since went from the oplog while reading, those read so far are still returned
+        if out == []:
+            return "Invalid since " + str(err), 400
+    finally:
+        changes.close()
+
+    return jsonify({"events": out, "since": since}), 200
+
+
 #
 # MESSAGES
 #
@@ -436,6 +642,7 @@ def receiveMessage():
     ope=content.get('op',"-")
     eid=content.get('elementid',"missing element ID")
     
+    # The scheduler listens for these on AS/MSG and re-attests the element for ta_ messages, eg: ta_startup
     a10.asvr.db.announce.announceMessage(ope,{ 'msg':msg, 'elementid':eid })
 
     print("Message Received ",msg)
@@ -0,0 +1,81 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import sys
+import requests
+from colors import *
+
+# Long polls a10rest's /events endpoint and prints every change made to the database.
+# The token of the last event seen is kept in a file so that a restarted viewer continues
+# from where it stopped instead of missing what happened in between.
+
+
+COLOURS = {"elements": "white", "policies": "white", "claims": "cyan", "results": "green"}
+
+
+def loadToken(f):
+    try:
+        with open(f) as t:
+            return t.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def saveToken(f, token):
+    with open(f + ".tmp", "w") as t:
+        t.write(token)
+    os.replace(f + ".tmp", f)
+
+
+def printEvent(e):
+    s = (
+        str(e["t"]).ljust(20)
+        + " - "
+        + e["op"].ljust(8)
+        + e["collection"].ljust(15)
+        + " "
+        + str(e["itemid"])
+    )
+    fg = COLOURS.get(e["collection"], "yellow")
+    if e["collection"] == "results" and e["document"] is not None:
+        r = str(e["document"].get("result"))
+        if r != "0":
+            fg = "red"
+        s = s + " " + r
+    print(color(s, fg=fg))
+
+
+# MAIN
+
+print("\n\nAS Event Terminal Viewer\n\n")
+
+aerestendpoint = "http://127.0.0.1:8520"
+tokenfile = "aseventviewer.token"
+if len(sys.argv) > 1:
+    aerestendpoint = sys.argv[1]
+
+since = loadToken(tokenfile)
+print(" +--- Reading events from", aerestendpoint, "since", since)
+print(" +--- Running, press ctrl+C to stop\n\n")
+
+try:
+    while True:
+        ps = {"wait": 20}
+        if since is not None:
+            ps["since"] = since
+        r = requests.get(aerestendpoint + "/events", params=ps, timeout=30)
+        if r.status_code != 200:
+            print(color(" +--- " + str(r.status_code) + " " + r.text, fg="orange"))
+            break
+        page = r.json()
+        for e in page["events"]:
+            printEvent(e)
+        if page["since"] is not None:
+            since = page["since"]
+            saveToken(tokenfile, since)
+except KeyboardInterrupt:
+    pass
+
+print(" +--- Exiting.")
@@ -16,7 +16,7 @@ def processMessage(p, t):
     print(m, t, t == "AS/C")
     if t == "AS/IM":
         s = (
-            m["t"].ljust(20)
+            str(m["t"]).ljust(20)
             + " - "
             + m["op"].ljust(7)
             + m["data"]["kind"].ljust(10)
@@ -26,7 +26,7 @@ def processMessage(p, t):
         print(color(s, fg="white"))
     elif t == "AS/C":
         s = (
-            m["t"].ljust(20)
+            str(m["t"]).ljust(20)
             + " - "
             + m["op"].ljust(7)
             + m["data"]["kind"].ljust(10)
@@ -37,7 +37,7 @@ def processMessage(p, t):
     elif t == "AS/R":
         r = str(m["data"]["result"])
         s = (
-            m["t"].ljust(20)
+            str(m["t"]).ljust(20)
             + " - "
             + m["op"].ljust(7)
             + m["data"]["kind"].ljust(10)
@@ -258,8 +258,8 @@ banner("Creating claim")
 
 c = {
     "header": {
-        "as_requested": "1",
-        "as_received": "1",
+        "as_requested": 1.0,
+        "as_received": 1.0,
         "ta_received": "1",
         "ta_complete": "1",
         "elementID": "1",
@@ -298,7 +298,7 @@ print("Result code ", r.rc(), r.msg(), type(r.msg()))
 bigbanner("Result Tests")
 banner("Creating result")
 
-c = {"type": "result", "verifiedAt": "1", "claimID": "1", "message": "f"}
+c = {"type": "result", "verifiedAt": 1.0, "claimID": "1", "message": "f"}
 
 print(c)
 
@@ -0,0 +1,124 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Tests the element, policy and expected value caches without a database.
+# This needs /etc/a10.conf but neither a running MongoDB nor an MQTT broker.
+#
+
+import sys
+import time
+from a10.asvr.db import cache
+
+
+part = 0
+count = 0
+failures = []
+
+
+def bigbanner(t):
+    global part, count
+    count = 0
+    part = part + 1
+    print(" ")
+    print("+========================================================================")
+    print("+")
+    print("+ Part", part, "   ", t)
+    print("+")
+    print("+========================================================================")
+
+
+def banner(t):
+    global count
+    count = count + 1
+    print(" ")
+    print("+------------------------------------------------------------------------")
+    print("+ Test", part, "/", count, "   ", t)
+    print("+------------------------------------------------------------------------")
+
+
+def check(name, r):
+    if r == True:
+        print("OK   ", name)
+    else:
+        print("FAIL ", name)
+        failures.append(name)
+
+
+#
+#
+#  START HERE
+#
+#
+
+reads = []
+
+
+def load(v):
+    def f():
+        reads.append(v)
+        return v
+
+    return f
+
+
+bigbanner("Caching")
+
+banner("Hits and misses")
+
+c = cache.Cache("test", 2, 60)
+check("miss reads", c.get("a", load({"itemid": "a"})) == {"itemid": "a"} and len(reads) == 1)
+check("hit does not read", c.get("a", load({"itemid": "x"})) == {"itemid": "a"} and len(reads) == 1)
+v = c.get("a", load(None))
+v["itemid"] = "changed"
+check("hit is a copy", c.get("a", load(None)) == {"itemid": "a"})
+check("None is not cached", c.get("b", load(None)) is None and c.getStatistics()["entries"] == 1)
+
+banner("Least recently used eviction")
+
+c.get("b", load({"itemid": "b"}))
+c.get("a", load(None))
+c.get("c", load({"itemid": "c"}))
+s = c.getStatistics()
+print(s)
+check("evicted", s["evictions"] == 1 and s["entries"] == 2)
+check("b was evicted", c.get("b", load({"itemid": "b2"})) == {"itemid": "b2"})
+
+banner("Expiry")
+
+c = cache.Cache("test", 10, 0.1)
+c.get("a", load({"itemid": "a"}))
+time.sleep(0.2)
+check("expired entry is read again", c.get("a", load({"itemid": "a2"})) == {"itemid": "a2"})
+
+banner("Invalidation")
+
+cache.ELEMENTS.get("e1", load({"itemid": "e1"}))
+cache.POLICIES.get("p1", load({"itemid": "p1"}))
+cache.EXPECTEDVALUES.get(("e1", "p1"), load({"itemid": "ev1"}))
+cache.invalidate("update", {"type": "element", "itemid": "e1"})
+check("element invalidated", cache.ELEMENTS.get("e1", load({"itemid": "e1new"}))["itemid"] == "e1new")
+check("policy kept", cache.POLICIES.get("p1", load(None))["itemid"] == "p1")
+cache.invalidate("delete", {"type": "ev", "itemid": "ev1"})
+check("expected values invalidated", cache.EXPECTEDVALUES.get(("e1", "p1"), load(None)) is None)
+
+
+def slowload():
+    # An update announced while the old value is being read
+    cache.invalidate("update", {"type": "policy", "itemid": "p2"})
+    return {"itemid": "p2", "old": True}
+
+
+cache.POLICIES.get("p2", slowload)
+check("value read before an invalidation is not stored", cache.POLICIES.get("p2", load(None)) is None)
+print(cache.getStatistics())
+
+
+bigbanner("Summary")
+
+if failures != []:
+    print("The following tests failed: ", failures)
+    sys.exit("Stop.")
+else:
+    print("All tests passed")
@@ -0,0 +1,300 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Checks that every hot query in the MongoDB backend of a10.asvr.db.core is answered from an index.
+# Each query is explained and the winning plan must not contain a COLLSCAN or SORT stage.
+# This can be run against an empty or a populated database.
+#
+
+import sys
+import bson.objectid
+import pymongo
+import a10.asvr.db.core
+
+
+part = 0
+count = 0
+failures = []
+
+
+def bigbanner(t):
+    global part, count
+    count = 0
+    part = part + 1
+    print(" ")
+    print("+========================================================================")
+    print("+")
+    print("+ Part", part, "   ", t)
+    print("+")
+    print("+========================================================================")
+
+
+def banner(t):
+    global count
+    count = count + 1
+    print(" ")
+    print("+------------------------------------------------------------------------")
+    print("+ Test", part, "/", count, "   ", t)
+    print("+------------------------------------------------------------------------")
+
+
+def planStages(p):
+    # walks the plan tree and returns all stage names
+    # newer MongoDB versions wrap the classic plan in queryPlan
+    ss = []
+    if "stage" in p:
+        ss.append(p["stage"])
+    for k in ["inputStage", "queryPlan", "outerStage", "innerStage"]:
+        if k in p:
+            ss = ss + planStages(p[k])
+    for i in p.get("inputStages", []):
+        ss = ss + planStages(i)
+    return ss
+
+
+def winningPlans(e):
+    # aggregation explains hold the query planner inside their first stage
+    ps = []
+    if isinstance(e, dict):
+        if "queryPlanner" in e:
+            ps.append(e["queryPlanner"]["winningPlan"])
+        for v in e.values():
+            ps = ps + winningPlans(v)
+    elif isinstance(e, list):
+        for v in e:
+            ps = ps + winningPlans(v)
+    return ps
+
+
+def checkPlan(name, cursor):
+    banner(name)
+    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    reportStages(name, planStages(plan))
+
+
+def checkAggregatePlan(name, c, pipeline):
+    banner(name)
+    e = asdb.command("aggregate", c, pipeline=pipeline, explain=True)
+    stages = []
+    for plan in winningPlans(e):
+        stages = stages + planStages(plan)
+    reportStages(name, stages)
+
+
+def reportStages(name, stages):
+    print("Stages ", stages)
+
+    bad = [s for s in stages if s in ["COLLSCAN", "SORT"]]
+    if bad != []:
+        print("FAIL - query uses ", bad)
+        failures.append((name, bad))
+    else:
+        print("OK")
+
+
+#
+#
+#  START HERE
+#
+#
+
+if a10.asvr.db.core.backend.NAME != "mongo":
+    print("These tests are for the MongoDB backend, see sqliteBackendTests.py for SQLite")
+    sys.exit(0)
+
+asdb = a10.asvr.db.core.backend.asdb
+
+
+bigbanner("Index Provisioning")
+banner("Creating indexes")
+
+r = a10.asvr.db.core.createIndexes()
+print("Indexes ", r)
+
+
+bigbanner("Query Plans")
+
+checkPlan("getElement", asdb["elements"].find({"itemid": "x"}).limit(1))
+checkPlan("getElementByName", asdb["elements"].find({"name": "x"}).limit(1))
+checkPlan("getPolicy", asdb["policies"].find({"itemid": "x"}).limit(1))
+checkPlan("getPolicyByName", asdb["policies"].find({"name": "x"}).limit(1))
+checkPlan("getElementsByIds", asdb["elements"].find({"itemid": {"$in": ["x", "y"]}}))
+checkPlan("getPoliciesByIds", asdb["policies"].find({"itemid": {"$in": ["x", "y"]}}))
+checkPlan("getHash", asdb["hashes"].find({"hash": "x"}).limit(1))
+checkPlan("getExpectedValue", asdb["expectedvalues"].find({"itemid": "x"}).limit(1))
+checkPlan(
+    "getExpectedValuesForElement",
+    asdb["expectedvalues"].find({"elementID": "x"}),
+)
+checkPlan(
+    "getExpectedValuesForPolicy",
+    asdb["expectedvalues"].find({"policyID": "x"}),
+)
+checkPlan(
+    "getExpectedValueForElementAndPolicy",
+    asdb["expectedvalues"].find({"elementID": "x", "policyID": "y"}).limit(1),
+)
+checkPlan("getClaim", asdb["claims"].find({"itemid": "x"}).limit(1))
+checkPlan(
+    "getClaimsFull",
+    asdb["claims"].find({}).sort("header.as_requested", pymongo.DESCENDING).limit(50),
+)
+checkPlan(
+    "getAssociatedResults",
+    asdb["results"].find({"claimID": "x"}).sort("verifiedAt", pymongo.DESCENDING),
+)
+checkPlan("getResult", asdb["results"].find({"itemid": "x"}).limit(1))
+checkPlan(
+    "getResultsFull",
+    asdb["results"].find({}).sort("verifiedAt", pymongo.DESCENDING).limit(500),
+)
+checkPlan(
+    "getResultsSince",
+    asdb["results"]
+    .find({"verifiedAt": {"$gt": 0.0}})
+    .sort("verifiedAt", pymongo.DESCENDING),
+)
+checkPlan(
+    "getLatestResults",
+    asdb["results"]
+    .find({"elementID": "x"})
+    .sort("verifiedAt", pymongo.DESCENDING)
+    .limit(10),
+)
+checkPlan(
+    "getLatestResultsForElementAndPolicy",
+    asdb["results"]
+    .find({"elementID": "x", "policyID": "y"})
+    .sort("verifiedAt", pymongo.DESCENDING)
+    .limit(10),
+)
+logsort = [("t", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+logcursor = {
+    "t": {"$lte": 0.0},
+    "$or": [{"t": {"$lt": 0.0}}, {"_id": {"$lt": bson.objectid.ObjectId()}}],
+}
+checkPlan(
+    "getLatestLogEntries",
+    asdb["log"].find({}).sort(logsort).limit(251),
+)
+checkPlan(
+    "getLogEntries cursor",
+    asdb["log"].find(logcursor).sort(logsort).limit(251),
+)
+checkPlan(
+    "getLogEntries channel",
+    asdb["log"].find({"ch": "C"}).sort(logsort).limit(251),
+)
+checkPlan(
+    "getLogEntries operation and cursor",
+    asdb["log"].find(dict(logcursor, op="add")).sort(logsort).limit(251),
+)
+
+checkPlan(
+    "getItemsOlderThan claims",
+    asdb["claims"]
+    .find({"header.as_requested": {"$lt": 0.0}})
+    .sort("header.as_requested", pymongo.ASCENDING)
+    .limit(1000),
+)
+checkPlan(
+    "getItemsOlderThan results",
+    asdb["results"]
+    .find({"verifiedAt": {"$lt": 0.0}})
+    .sort("verifiedAt", pymongo.ASCENDING)
+    .limit(1000),
+)
+checkPlan(
+    "getItemsBeyondCount claims",
+    asdb["claims"]
+    .find({"header.element.itemid": "x", "header.policy.itemid": "y"})
+    .sort("header.as_requested", pymongo.DESCENDING)
+    .skip(100)
+    .limit(1000),
+)
+checkPlan(
+    "getItemsBeyondCount results",
+    asdb["results"]
+    .find({"elementID": "x", "policyID": "y"})
+    .sort("verifiedAt", pymongo.DESCENDING)
+    .skip(100)
+    .limit(1000),
+)
+checkAggregatePlan(
+    "getLatestResultPerElement",
+    "results",
+    [
+        {"$sort": {"elementID": 1, "verifiedAt": -1}},
+        {"$group": {"_id": "$elementID", "latest": {"$first": "$$ROOT"}}},
+    ],
+)
+checkAggregatePlan(
+    "getLatestResultPerElement byPolicy",
+    "results",
+    [
+        {"$sort": {"elementID": 1, "policyID": 1, "verifiedAt": -1}},
+        {
+            "$group": {
+                "_id": {"e": "$elementID", "p": "$policyID"},
+                "latest": {"$first": "$$ROOT"},
+            }
+        },
+    ],
+)
+checkAggregatePlan(
+    "getResultCounts",
+    "results",
+    [
+        {"$match": {"elementID": "x", "verifiedAt": {"$gte": 0.0}}},
+        {
+            "$group": {
+                "_id": {"policyID": "$policyID", "result": "$result"},
+                "count": {"$sum": 1},
+            }
+        },
+    ],
+)
+checkAggregatePlan(
+    "getResultCounts bucket",
+    "results",
+    [
+        {"$match": {"elementID": "x", "verifiedAt": {"$gte": 0.0, "$type": "number"}}},
+        {
+            "$group": {
+                "_id": {
+                    "policyID": "$policyID",
+                    "result": "$result",
+                    "bucket": {"$subtract": ["$verifiedAt", {"$mod": ["$verifiedAt", 60.0]}]},
+                },
+                "count": {"$sum": 1},
+            }
+        },
+    ],
+)
+checkAggregatePlan(
+    "getLatestResultCounts",
+    "results",
+    [
+        {"$match": {"elementID": "x", "policyID": "y"}},
+        {"$sort": {"verifiedAt": -1}},
+        {"$limit": 10},
+        {"$group": {"_id": "$result", "count": {"$sum": 1}}},
+    ],
+)
+checkPlan("deleteElementStatus policy", asdb["elementstatus"].find({"policyID": "x"}))
+checkPlan(
+    "deleteElementStatus element and policy",
+    asdb["elementstatus"].find({"elementID": "x", "policyID": "y"}),
+)
+checkPlan("getArchiveEntry", asdb["archiveindex"].find({"itemid": "x"}).limit(1))
+
+
+bigbanner("Summary")
+
+if failures != []:
+    print("The following queries do not use an index: ", failures)
+    sys.exit("Stop.")
+else:
+    print("All queries use an index")
@@ -0,0 +1,450 @@
+# Copyright 2021 Nokia
+# Licensed under the BSD 3-Clause License.
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Tests the SQLite storage backend directly against an in-memory database.
+# This needs neither /etc/a10.conf nor a running MongoDB or MQTT broker.
+#
+
+import sys
+from a10.asvr.db.backends import sqlitebackend
+
+
+part = 0
+count = 0
+failures = []
+
+
+def bigbanner(t):
+    global part, count
+    count = 0
+    part = part + 1
+    print(" ")
+    print("+========================================================================")
+    print("+")
+    print("+ Part", part, "   ", t)
+    print("+")
+    print("+========================================================================")
+
+
+def banner(t):
+    global count
+    count = count + 1
+    print(" ")
+    print("+------------------------------------------------------------------------")
+    print("+ Test", part, "/", count, "   ", t)
+    print("+------------------------------------------------------------------------")
+
+
+def check(name, r):
+    if r == True:
+        print("OK   ", name)
+    else:
+        print("FAIL ", name)
+        failures.append(name)
+
+
+#
+#
+#  START HERE
+#
+#
+
+db = sqlitebackend.SQLiteBackend({"sqlitepath": ":memory:"})
+check("not connected until first use", db.getClientStatistics()["connected"] == False)
+
+
+bigbanner("Elements and Policies")
+
+banner("Adding, getting, updating and deleting an element")
+
+e = {"itemid": "e1", "name": "Element One", "type": ["tpm2.0"], "endpoint": "x"}
+check("addElement", db.addElement(e))
+check("getElement", db.getElement("e1") == e)
+check("getElementByName", db.getElementByName("Element One")["itemid"] == "e1")
+check("getElements", db.getElements() == [{"itemid": "e1"}])
+check("updateElement", db.updateElement({"itemid": "e1", "endpoint": "y"}))
+check("updateElement merges", db.getElement("e1")["type"] == ["tpm2.0"])
+check("updateElement sets", db.getElement("e1")["endpoint"] == "y")
+check("updateElement missing", db.updateElement({"itemid": "nope"}) == False)
+check("deleteElement", db.deleteElement("e1"))
+check("deleteElement missing", db.deleteElement("e1") == False)
+check("getElement missing", db.getElement("e1") is None)
+
+banner("Adding and getting policies")
+
+check("addPolicy", db.addPolicy({"itemid": "p1", "name": "P1", "intent": "tpm2/quote"}))
+check("addPolicy", db.addPolicy({"itemid": "p2", "name": "P2", "intent": "tpm2/pcrs"}))
+check("getPolicy", db.getPolicy("p2")["intent"] == "tpm2/pcrs")
+check("getPoliciesFull", len(db.getPoliciesFull()) == 2)
+check(
+    "getPoliciesByIds",
+    sorted(db.getPoliciesByIds(["p2", "p1", "nope"], ["name"]), key=lambda p: p["itemid"])
+    == [{"itemid": "p1", "name": "P1"}, {"itemid": "p2", "name": "P2"}],
+)
+check("getPoliciesByIds full", db.getPoliciesByIds(["p2"])[0]["intent"] == "tpm2/pcrs")
+check("getElementsByIds none", db.getElementsByIds([]) == [])
+
+
+bigbanner("Expected Values and Hashes")
+
+banner("Expected values by element and policy")
+
+db.addExpectedValue({"itemid": "ev1", "elementID": "e1", "policyID": "p1", "evs": {}})
+db.addExpectedValue({"itemid": "ev2", "elementID": "e1", "policyID": "p2", "evs": {}})
+check(
+    "getExpectedValueForElementAndPolicy",
+    db.getExpectedValueForElementAndPolicy("e1", "p2")["itemid"] == "ev2",
+)
+check("getExpectedValuesForElement", len(db.getExpectedValuesForElement("e1")) == 2)
+check("getExpectedValuesForPolicy", len(db.getExpectedValuesForPolicy("p1")) == 1)
+
+banner("Hashes")
+
+db.addHash({"hash": "abc", "type": "sha256", "short": "s", "long": "l"})
+check("getHash", db.getHash("abc")["short"] == "s")
+check("getHashes", db.getHashes() == [{"hash": "abc"}])
+
+
+bigbanner("Claims, Results and Log")
+
+banner("Claims")
+
+for i in range(0, 5):
+    db.addClaim(
+        {
+            "itemid": "c" + str(i),
+            "header": {"as_requested": 100.0 + i, "as_received": 101.0 + i},
+            "payload": {},
+        }
+    )
+check("getClaim", db.getClaim("c3")["header"]["as_requested"] == 103.0)
+check(
+    "getClaim fields",
+    db.getClaim("c3", ["itemid", "header.as_requested", "payload.missing"])
+    == {"itemid": "c3", "header": {"as_requested": 103.0}},
+)
+check(
+    "getClaimsFull",
+    [c["itemid"] for c in db.getClaimsFull(2)] == ["c4", "c3"],
+)
+
+banner("Results")
+
+for i in range(0, 10):
+    db.addResult(
+        {
+            "itemid": "r" + str(i),
+            "elementID": "e1",
+            "policyID": ["p1", "p2"][i % 2],
+            "claimID": "c" + str(i % 5),
+            "verifiedAt": 200.0 + i,
+            "result": 0,
+        }
+    )
+check("getResult", db.getResult("r7")["verifiedAt"] == 207.0)
+check(
+    "getResultsSince",
+    [r["itemid"] for r in db.getResultsSince(206.5)] == ["r9", "r8", "r7"],
+)
+check(
+    "getResultsSince window",
+    [r["itemid"] for r in db.getResultsSince(205.5, 207.5)] == ["r7", "r6"],
+)
+check("getLatestResults", [r["itemid"] for r in db.getLatestResults("e1", 2)] == ["r9", "r8"])
+check(
+    "getLatestResultsForElementAndPolicy",
+    [r["itemid"] for r in db.getLatestResultsForElementAndPolicy("e1", "p1", 2)]
+    == ["r8", "r6"],
+)
+check(
+    "getLatestResultPerElement",
+    [r["itemid"] for r in db.getLatestResultPerElement()] == ["r9"],
+)
+check(
+    "getLatestResultPerElement byPolicy",
+    sorted([r["itemid"] for r in db.getLatestResultPerElement(True)]) == ["r8", "r9"],
+)
+check(
+    "getResultCounts",
+    db.getResultCounts("e1")
+    == [
+        {"policyID": "p1", "result": 0, "bucket": None, "count": 5},
+        {"policyID": "p2", "result": 0, "bucket": None, "count": 5},
+    ],
+)
+check(
+    "getResultCounts window and bucket",
+    db.getResultCounts("e1", 204.0, 208.0, 2.5)
+    == [
+        {"policyID": "p1", "result": 0, "bucket": 202.5, "count": 1},
+        {"policyID": "p1", "result": 0, "bucket": 205.0, "count": 1},
+        {"policyID": "p2", "result": 0, "bucket": 205.0, "count": 2},
+    ],
+)
+check("getLatestResultCounts", db.getLatestResultCounts("e1", "p1", 3) == {0: 3})
+check("getLatestResultCounts none", db.getLatestResultCounts("e1", "p3", 3) == {})
+check("getAssociatedResults", [r["itemid"] for r in db.getAssociatedResults("c1")] == ["r6", "r1"])
+
+banner("Element status")
+
+db.updateElementStatus(db.getLatestResultPerElement(True))
+check(
+    "updateElementStatus",
+    [(s["policyID"], s["resultID"], s["verifiedAt"]) for s in db.getElementStatus("e1")]
+    == [("p1", "r8", 208.0), ("p2", "r9", 209.0)],
+)
+older = dict(db.getResult("r2"), itemid="o2", result=9001)
+newer = dict(db.getResult("r9"), itemid="n9", verifiedAt=210.0, result=9001)
+db.updateElementStatus([older, newer])
+check(
+    "updateElementStatus keeps the latest",
+    [(s["resultID"], s["result"]) for s in db.getElementStatus("e1")]
+    == [("r8", 0), ("n9", 9001)],
+)
+# A policy verified by two rules is only as good as the worse of them
+failed = dict(db.getResult("r9"), itemid="q1", verifiedAt=211.0, result=9001, ruleName="quote")
+passed = dict(db.getResult("r9"), itemid="q2", verifiedAt=212.0, result=0, ruleName="pcrs")
+db.updateElementStatus([failed, passed])
+check(
+    "updateElementStatus per rule",
+    [(s["ruleName"], s["resultID"]) for s in db.getElementStatus("e1") if s["policyID"] == "p2"]
+    == [("", "n9"), ("pcrs", "q2"), ("quote", "q1")],
+)
+check(
+    "updateElementStatus failed rule not replaced by another rule",
+    sorted(s["result"] for s in db.getElementStatus("e1") if s["ruleName"] != "") == [0, 9001],
+)
+db.deleteElementStatus("e1")
+db.updateElementStatus(db.getLatestResultPerElement(True, True))
+check(
+    "getLatestResultPerElement byRule",
+    [(s["policyID"], s["resultID"]) for s in db.getElementStatus("e1")]
+    == [("p1", "r8"), ("p2", "r9")],
+)
+db.updateElementStatus([dict(newer, elementID="e3")])
+check("getElementStatus all", [s["elementID"] for s in db.getElementStatus()] == ["e1", "e1", "e3"])
+db.deleteElementStatus("e3")
+check("deleteElementStatus", db.getElementStatus("e3") == [])
+db.updateElementStatus([dict(newer, elementID="e3")])
+db.deleteElementStatus(p="p2")
+check("deleteElementStatus policy", [s["policyID"] for s in db.getElementStatus()] == ["p1"])
+db.deleteElementStatus("e1", "p1")
+check("deleteElementStatus element and policy", db.getElementStatus() == [])
+
+banner("Schedule")
+
+db.updateScheduleEntries(
+    [
+        {"elementID": "e1", "policyID": "p1", "interval": 60.0, "due": 120.0},
+        {"elementID": "e1", "policyID": "p2", "interval": 60.0, "due": 100.0},
+        {"elementID": "e2", "policyID": "p1", "interval": 60.0, "due": 300.0},
+    ]
+)
+check("getScheduleEntries", len(db.getScheduleEntries()) == 3)
+check(
+    "getDueScheduleEntries",
+    [s["policyID"] for s in db.getDueScheduleEntries(200.0, 10)] == ["p2", "p1"],
+)
+check("getDueScheduleEntries limit", len(db.getDueScheduleEntries(200.0, 1)) == 1)
+db.updateScheduleEntries([{"elementID": "e1", "policyID": "p2", "interval": 60.0, "due": 160.0}])
+check(
+    "updateScheduleEntries replaces",
+    [s["due"] for s in db.getDueScheduleEntries(200.0, 10)] == [120.0, 160.0],
+)
+db.deleteScheduleEntry("e2", "p1")
+check("deleteScheduleEntry", len(db.getScheduleEntries()) == 2)
+
+banner("Log")
+
+db.writeLogEntry(1.0, "IM", "add", {"type": "element", "itemid": "e1"})
+db.writeLogEntry(2.0, "C", "add", {"type": "claim", "itemid": "c1"})
+check("getLogEntryCount", db.getLogEntryCount() == 2)
+check("getLatestLogEntries", db.getLatestLogEntries(10)[0]["ch"] == "C")
+check("getLatestLogEntries limit", len(db.getLatestLogEntries(1)) == 1)
+
+banner("Batch writes")
+
+rs = [
+    {
+        "itemid": "b" + str(i),
+        "elementID": "e2",
+        "policyID": "p1",
+        "claimID": "c9",
+        "verifiedAt": 300.0 + i,
+        "result": 0,
+    }
+    for i in range(0, 3)
+]
+check("addResults", db.addResults(rs) == [None, None, None])
+check("addResults written", [r["itemid"] for r in db.getLatestResults("e2", 5)] == ["b2", "b1", "b0"])
+check("addResults empty", db.addResults([]) == [])
+check(
+    "addClaims",
+    db.addClaims([{"itemid": "bc1", "header": {"as_requested": 1.0}, "payload": {}}]) == [None],
+)
+check("addClaims written", db.getClaim("bc1")["itemid"] == "bc1")
+check(
+    "writeLogEntries",
+    db.writeLogEntries([(3.0, "R", "add", {"itemid": "b0"}), (3.0, "R", "add", {"itemid": "b1"})])
+    == [None, None],
+)
+check("writeLogEntries count", db.getLogEntryCount() == 4)
+
+banner("Log pages")
+
+p1 = db.getLogEntries(3)
+p2 = db.getLogEntries(3, p1["cursor"])
+check("getLogEntries first page", [l["t"] for l in p1["entries"]] == [3.0, 3.0, 2.0])
+check("getLogEntries last page", [l["t"] for l in p2["entries"]] == [1.0] and p2["cursor"] is None)
+check(
+    "getLogEntries ties",
+    [l["data"]["itemid"] for l in p1["entries"][0:2]] == ["b1", "b0"],
+)
+check("getLogEntries channel", [l["ch"] for l in db.getLogEntries(10, ch="R")["entries"]] == ["R", "R"])
+check("getLogEntries operation", db.getLogEntries(10, ch="IM", op="add")["entries"][0]["ch"] == "IM")
+try:
+    db.getLogEntries(3, "nonsense")
+    check("getLogEntries invalid cursor", False)
+except ValueError:
+    check("getLogEntries invalid cursor", True)
+for i in range(0, 3):
+    db.connection().execute("DELETE FROM results WHERE itemid = ?", ("b" + str(i),))
+db.connection().execute("DELETE FROM claims WHERE itemid = 'bc1'")
+
+banner("Database status")
+
+s = db.getDatabaseStatus()
+print(s)
+check("getDatabaseStatus", s["results"] == "10" and s["claims"] == "5")
+s = db.getExactDatabaseStatus()
+print(s)
+check("getExactDatabaseStatus", s["results"] == "10" and s["claims"] == "5")
+s = db.getClientStatistics()
+print(s)
+check("getClientStatistics", s["connected"] and s["connections"] == 1)
+
+
+bigbanner("Retention and Archive")
+
+banner("Pruning claims and results")
+
+rdb = sqlitebackend.SQLiteBackend({"sqlitepath": ":memory:"})
+for i in range(0, 6):
+    rdb.addClaim(
+        {
+            "itemid": "rc" + str(i),
+            "header": {
+                "as_requested": 100.0 + i,
+                "element": {"itemid": "e" + str(i % 2)},
+                "policy": {"itemid": "p1"},
+            },
+            "payload": {},
+        }
+    )
+check(
+    "getItemsOlderThan",
+    [c["itemid"] for c in rdb.getItemsOlderThan("claims", 102.5, 10)] == ["rc0", "rc1", "rc2"],
+)
+check("getItemsOlderThan limit", len(rdb.getItemsOlderThan("claims", 102.5, 2)) == 2)
+check(
+    "getElementPolicyPairs",
+    sorted(rdb.getElementPolicyPairs("claims")) == [("e0", "p1"), ("e1", "p1")],
+)
+check(
+    "getItemsBeyondCount",
+    [c["itemid"] for c in rdb.getItemsBeyondCount("claims", "e0", "p1", 1, 10)] == ["rc2", "rc0"],
+)
+check(
+    "getItemsBeyondCount limit",
+    [c["itemid"] for c in rdb.getItemsBeyondCount("claims", "e1", "p1", 1, 1)] == ["rc3"],
+)
+check("deleteItems", rdb.deleteItems("claims", ["rc0", "rc1", "nope"]) == 2)
+check("getItemsBeyondCount after delete", rdb.getItemsBeyondCount("claims", "e0", "p1", 2, 10) == [])
+
+rdb.writeLogEntry(1.0, "IM", "add", {})
+rdb.writeLogEntry(5.0, "IM", "add", {})
+check("deleteLogEntriesOlderThan", rdb.deleteLogEntriesOlderThan(2.0) == 1)
+
+banner("Archive files")
+
+import tempfile
+import a10.asvr.db.archive
+
+d = tempfile.mkdtemp()
+f = a10.asvr.db.archive.writeArchive(d, "claims", [{"itemid": "rc0", "payload": {"x": 1}}])
+rdb.addArchiveEntries("claims", ["rc0"], f)
+check("getArchiveEntry", rdb.getArchiveEntry("rc0")["file"] == f)
+check("getArchiveEntry missing", rdb.getArchiveEntry("rc1") is None)
+check("readArchive", a10.asvr.db.archive.readArchive(f, "rc0")["payload"] == {"x": 1})
+check("readArchive missing", a10.asvr.db.archive.readArchive(f, "rc9") is None)
+
+
+banner("Blobs")
+
+rdb.putBlob("d1", b"\x00\x01blob")
+rdb.putBlob("d1", b"ignored")
+check("getBlob", rdb.getBlob("d1") == b"\x00\x01blob")
+check("getBlob missing", rdb.getBlob("d2") is None)
+
+
+bigbanner("Query Plans")
+
+banner("Checking the hot queries use an index")
+
+statements = []
+db.connection().set_trace_callback(statements.append)
+
+db.getElement("e1")
+db.getPolicy("p1")
+db.getHash("abc")
+db.getExpectedValueForElementAndPolicy("e1", "p1")
+db.getClaim("c1")
+db.getClaimsFull(10)
+db.getAssociatedResults("c1")
+db.getResult("r1")
+db.getResultsFull(10)
+db.getResultsSince(205.0)
+db.getLatestResults("e1", 10)
+db.getLatestResultsForElementAndPolicy("e1", "p1", 10)
+db.getLatestResultPerElement()
+db.getLatestResultPerElement(True)
+db.getElementStatus()
+db.getElementStatus("e1")
+db.deleteElementStatus(p="p9")
+db.deleteElementStatus("e9", "p9")
+db.getDueScheduleEntries(200.0, 10)
+db.getLatestResultCounts("e1", "p1", 10)
+db.getLatestLogEntries(10)
+db.getLogEntries(10, p1["cursor"])
+db.getLogEntries(10, p1["cursor"], ch="R")
+db.getLogEntries(10, p1["cursor"], op="add")
+db.getItemsOlderThan("results", 205.0, 10)
+db.getItemsOlderThan("claims", 102.0, 10)
+db.getItemsBeyondCount("results", "e1", "p1", 2, 10)
+db.getItemsBeyondCount("claims", "e1", "p1", 2, 10)
+db.getArchiveEntry("r1")
+
+db.connection().set_trace_callback(None)
+
+for q in statements:
+    plan = [r[3] for r in db.connection().execute("EXPLAIN QUERY PLAN " + q)]
+    print(q)
+    print("    ", plan)
+    # SCAN on its own is a full table scan, SCAN ... USING INDEX walks an index in order
+    bad = [
+        p
+        for p in plan
+        if (p.startswith("SCAN") and "INDEX" not in p) or "TEMP B-TREE" in p
+    ]
+    check("query plan " + q, bad == [])
+
+
+bigbanner("Summary")
+
+if failures != []:
+    print("The following tests failed: ", failures)
+    sys.exit("Stop.")
+else:
+    print("All tests passed")
@@ -39,8 +39,15 @@ def attestverify_post():
     cp = ast.literal_eval(request.form["cp"])  # needed to make sure that cp is a DICT
     rp = ast.literal_eval(request.form["rp"])  # needed to make sure that rp is a DICT
 
-    # so try to get a claim
-    cres = attestation.attest(i, p, cp)
+    # so try to get a claim, and verify it without reading it back unless it is for attestation only
+    if av == "aonly":
+        cres = attestation.attest(i, p, cp)
+        vs = []
+    else:
+        fused = attestation.attestAndVerify(i, p, cp, [(r, rp)])
+        cres = fused["claim"]
+        vs = fused["results"]
+
     if cres.rc() != a10.structures.constants.SUCCESS:
         flash(
             "Error obtaining claim: " + str(cres.msg()) + " " + str(cres.rc()), "danger"
@@ -55,14 +62,13 @@ def attestverify_post():
             + "</a> successfully obtained"
         )
         flash(message, "success")
-        if av == "aonly":
+        if vs == []:
             flash(
                 "NB: request was for attestation only (no verification applied)", "info"
             )
             return redirect("/claim/" + cres.msg())
         else:
-            rule = (r, rp)
-            v = attestation.verify(cres.msg(), rule)
+            v = vs[0]
             if v.rc() != a10.structures.constants.RESULTSUCCESSFUL:
                 flash("Error applying the verification rule: " + r, "danger")
                 return redirect("/claim/" + cres.msg())
@@ -83,10 +89,10 @@ def attestverify_post():
 def attestverifyall_get(itemid):
     e = elements.getElement(itemid)
     evs = expectedvalues.getExpectedValuesForElement(itemid)
+    ps = a10.asvr.policies.getPoliciesByIds([i["policyID"] for i in evs], ["name"])
     for i in evs:
-        p = a10.asvr.policies.getPolicy(i["policyID"])
-        if p.rc() == a10.structures.constants.SUCCESS:
-            i["policyname"] = p.msg()["name"]
+        if i["policyID"] in ps:
+            i["policyname"] = ps[i["policyID"]]["name"]
         else:
             i["policyname"] = "POLICY DELETED"
     rs = rule_dispatcher.getRegisteredRules()
@@ -130,8 +136,6 @@ def attestverifyall_post():
     )
 
     for a in attreqs:
-        print("Attesting ", a["policyid"], a["op"])
-
         if a["op"] == "d":
             flash(
                 "NB: attest/verify for " + a["policyid"] + " was not required",
@@ -139,42 +143,52 @@ def attestverifyall_post():
             )
         else:
             a["cp"]["attestAllSessionString"] = sessionstring
-            cres = attestation.attest(eid, a["policyid"], a["cp"])
-            if cres.rc() != a10.structures.constants.SUCCESS:
+
+    # The policies are attested concurrently, so one slow trust agent does not hold up the others
+    todo = [a for a in attreqs if a["op"] != "d"]
+    batch = attestation.attestMany(
+        [{"eid": eid, "pid": a["policyid"], "cps": a["cp"]} for a in todo]
+    )
+    print("Attested ", len(todo), " policies in ", batch["elapsed"], "s")
+
+    for (a, cres) in zip(todo, batch["claims"]):
+        print("Attesting ", a["policyid"], a["op"])
+
+        if cres.rc() != a10.structures.constants.SUCCESS:
+            flash(
+                "Error obtaining claim: " + str(cres.msg()) + " " + str(cres.rc()),
+                "danger",
+            )
+        else:
+            message = Markup(
+                "Claim <a href=/claim/"
+                + str(cres.msg())
+                + ">"
+                + str(cres.msg())
+                + "</a> successfully obtained"
+            )
+            flash(message, "success")
+            if a["op"] == "a":
                 flash(
-                    "Error obtaining claim: " + str(cres.msg()) + " " + str(cres.rc()),
-                    "danger",
-                )
-            else:
-                message = Markup(
-                    "Claim <a href=/claim/"
-                    + str(cres.msg())
-                    + ">"
+                    "NB: claim "
                     + str(cres.msg())
-                    + "</a> successfully obtained"
+                    + " was for attestation only (no verification applied)",
+                    "info",
                 )
-                flash(message, "success")
-                if a["op"] == "a":
-                    flash(
-                        "NB: claim "
-                        + str(cres.msg())
-                        + " was for attestation only (no verification applied)",
-                        "info",
-                    )
+            else:
+                a["rp"]["attestAllSessionString"] = sessionstring
+                rule = (a["rule"], a["rp"])
+                v = attestation.verify(cres.msg(), rule)
+                if v.rc() != a10.structures.constants.RESULTSUCCESSFUL:
+                    flash("Error applying the verification rule: " + r, "danger")
                 else:
-                    a["rp"]["attestAllSessionString"] = sessionstring
-                    rule = (a["rule"], a["rp"])
-                    v = attestation.verify(cres.msg(), rule)
-                    if v.rc() != a10.structures.constants.RESULTSUCCESSFUL:
-                        flash("Error applying the verification rule: " + r, "danger")
-                    else:
-                        message = Markup(
-                            "Result <a href=/result/"
-                            + str(v.msg())
-                            + ">"
-                            + str(v.msg())
-                            + "</a> successfully obtained"
-                        )
-                        flash(message, "success")
+                    message = Markup(
+                        "Result <a href=/result/"
+                        + str(v.msg())
+                        + ">"
+                        + str(v.msg())
+                        + "</a> successfully obtained"
+                    )
+                    flash(message, "success")
 
     return redirect("/results")
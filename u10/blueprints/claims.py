@@ -105,11 +105,11 @@ def claimprettyprintQuote(item_id):
 def claimprettyprintUEFIEventLog(item_id):
     c = a10.asvr.claims.getClaim(item_id).msg()
 
-    # claim body contains a base85 encoded claim
-    
+    # claim body contains a base85 encoded claim, which may be in the blob store
+    eventlog = a10.asvr.claims.getPayloadItem(c, "eventlog")
 
-    
-    if c.get("payload").get("payload").get("eventlog")==None:
+    if eventlog==None:
        return render_template("claimprettyprint/incorrecttype.html", cla=c, msg="Claim does not appear to be a UEFI Eventlog")        
     else:
+       c["payload"]["payload"]["eventlog"] = eventlog
        return render_template("claimprettyprint/uefieventlog.html", cla=c)        
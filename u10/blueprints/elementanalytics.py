@@ -12,6 +12,7 @@ from flask import Blueprint, send_from_directory, render_template, request
 
 import a10.structures.constants
 import a10.structures.identity
+import a10.structures.timestamps
 
 import a10.asvr.db.core
 import a10.asvr.db.configuration
@@ -30,10 +31,12 @@ elementanalytics_blueprint.secret_key = secret
 
 @elementanalytics_blueprint.route("/element/graph/<item_id>", methods=["GET"])
 def eapage(item_id):
-    lrs = 250  # default number of latest results if nothing else is specified
+    window = 604800  # default window of one week if nothing else is specified, in seconds
 
-    if "lrs" in request.args:
-        lrs = int(request.args["lrs"])
+    if "window" in request.args:
+        window = int(request.args["window"])
+        if window < 1:
+            window = 1
 
     # First get the element
     e = a10.asvr.elements.getElement(item_id).msg()
@@ -41,13 +44,15 @@ def eapage(item_id):
     # Then get the expected values which show which policies the element is associated with
     evs = a10.asvr.expectedvalues.getExpectedValuesForElement(item_id)
 
-    ps = []
-    for i in evs:
-        p = a10.asvr.policies.getPolicy(i["policyID"])
-        if p.rc() == a10.structures.constants.SUCCESS:
-            ps.append(p.msg())
+    pbyid = a10.asvr.policies.getPoliciesByIds([i["policyID"] for i in evs])
+    ps = [pbyid[i["policyID"]] for i in evs if i["policyID"] in pbyid]
 
-    # For each policy, get the Results Count for that element
+    # Get the Results Count for that element for all policies at once
+
+    since = a10.structures.timestamps.now() - window
+    allcounts = a10.asvr.analytics.elementanalytics.getResultCountsPerPolicy(
+        item_id, since
+    )
 
     ds = []
     for p in ps:
@@ -58,20 +63,16 @@ def eapage(item_id):
             "policyname": p["name"],
         }
 
-        counts = a10.asvr.analytics.elementanalytics.getResultCountsByPolicy(
-            item_id, p["itemid"], 250
-        )
-        # zips are clever!
-        clabels, cvalues = zip(*counts.items())
+        counts = {c["result"]: c["count"] for c in allcounts if c["policyID"] == p["itemid"]}
         entry["counts"] = counts
-        entry["clabels"] = list(clabels)
-        entry["cvalues"] = list(cvalues)
+        entry["clabels"] = list(counts.keys())
+        entry["cvalues"] = list(counts.values())
         # This generates a random variable name for javascript between 10 and 15 characters
         entry["vname"] = "".join(
             random.choice(string.ascii_letters) for x in range(random.randint(10, 15))
         )
         ds.append(entry)
 
-    print(ds)
-
-    return render_template("elementanalytics.html", ds=ds, ename=e["name"])
+    return render_template(
+        "elementanalytics.html", ds=ds, ename=e["name"], window=window
+    )
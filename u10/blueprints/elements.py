@@ -33,14 +33,19 @@ def elements():
 
     es = a10.asvr.elements.getElementsFull()
 
+    latest = {e["itemid"]: a10.asvr.results.getLatestResults(e["itemid"], lrs) for e in es}
+    ps = a10.asvr.policies.getPoliciesByIds(
+        [r["policyID"] for res in latest.values() for r in res], ["name"]
+    )
+
     for e in es:
-        res = a10.asvr.results.getLatestResults(e["itemid"], lrs)
+        res = latest[e["itemid"]]
         resultsummary = []
         for r in res:
             summarystr = {
                 "verifiedAt": formatting.futc(r["verifiedAt"]),
                 "pid": r["policyID"],
-                "pname": a10.asvr.policies.getPolicy(r["policyID"]).msg()["name"],
+                "pname": ps.get(r["policyID"], {"name": "POLICY DELETED"})["name"],
                 "res": r["result"],
                 "rul": r["ruleName"],
                 "rid": r["itemid"],
@@ -66,22 +71,26 @@ def element(item_id):
 
     e = a10.asvr.elements.getElement(item_id)
     evs = a10.asvr.expectedvalues.getExpectedValuesForElement(item_id)
+    res = a10.asvr.results.getLatestResults(item_id, lrs)
+
+    ps = a10.asvr.policies.getPoliciesByIds(
+        [i["policyID"] for i in evs] + [r["policyID"] for r in res], ["name"]
+    )
+
     for i in evs:
-        p = a10.asvr.policies.getPolicy(i["policyID"])
-        if p.rc() == a10.structures.constants.SUCCESS:
-            i["policyname"] = p.msg()["name"]
+        if i["policyID"] in ps:
+            i["policyname"] = ps[i["policyID"]]["name"]
         else:
             i["policyname"] = "POLICY DELETED"
 
     resultsummary = []
-    res = a10.asvr.results.getLatestResults(item_id, lrs)
 
     for r in res:
         resultsummary.append(
             {
                 "verifiedAt": formatting.futc(r["verifiedAt"]),
                 "pid": r["policyID"],
-                "pname": a10.asvr.policies.getPolicy(r["policyID"]).msg()["name"],
+                "pname": ps.get(r["policyID"], {"name": "POLICY DELETED"})["name"],
                 "res": r["result"],
                 "rul": r["ruleName"],
                 "msg": r["message"],
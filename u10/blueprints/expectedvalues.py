@@ -26,19 +26,20 @@ expectedvalues_blueprint.secret_key = secret
 def expectedvalues():
     evs = a10.asvr.expectedvalues.getExpectedValuesFull()
 
+    es = a10.asvr.elements.getElementsByIds([ev["elementID"] for ev in evs], ["name"])
+    ps = a10.asvr.policies.getPoliciesByIds([ev["policyID"] for ev in evs], ["name"])
+
     for ev in evs:
 
-        e = a10.asvr.elements.getElement(ev["elementID"])
-        if e.rc() == a10.structures.constants.SUCCESS:
-            ev["elementname"] = e.msg()["name"]
+        if ev["elementID"] in es:
+            ev["elementname"] = es[ev["elementID"]]["name"]
         else:
             ev["elementname"] = "ELEMENT DELETED"
 
-        p = a10.asvr.policies.getPolicy(ev["policyID"])
-        if p.rc() == a10.structures.constants.SUCCESS:
-            ev["policyname"] = p.msg()["name"]
+        if ev["policyID"] in ps:
+            ev["policyname"] = ps[ev["policyID"]]["name"]
         else:
-            ev["policyname"] = "ELEMENT DELETED"
+            ev["policyname"] = "POLICY DELETED"
 
     evs_sorted = sorted(evs, key=lambda i: (i["name"]))
 
@@ -9,6 +9,7 @@ from flask import Blueprint, send_from_directory, render_template
 import a10.structures.constants
 import a10.structures.identity
 
+import a10.asvr.db.cache
 import a10.asvr.db.core
 import a10.asvr.db.configuration
 
@@ -33,10 +34,19 @@ def favicon():
 @home_blueprint.route("/")
 def hello():
     dbstatus = a10.asvr.db.core.getDatabaseStatus()
+    exactstatus = a10.asvr.db.core.getExactDatabaseStatus()
     constatus = a10.asvr.db.configuration.getConfiguration()
+    clientstatus = a10.asvr.db.core.getClientStatistics()
+    cachestatus = a10.asvr.db.cache.getStatistics()
     return render_template(
         "home/home.html",
-        d={"dbstatus": dbstatus, "configuration": constatus},
+        d={
+            "dbstatus": dbstatus,
+            "exactstatus": exactstatus,
+            "configuration": constatus,
+            "clientstatus": clientstatus,
+            "cachestatus": cachestatus,
+        },
         release=release,
     )
 
@@ -40,15 +40,35 @@ def getlog():
         if ref > 300000:
             ref = 300000
 
-    ls = a10.asvr.db.announce.getLatestLogEntries(lrs)
+    # The page is read from cursor onwards, optionally only one channel and/or operation
+    cursor = request.args.get("cursor")
+    ch = request.args.get("ch") or None
+    op = request.args.get("op") or None
+
+    try:
+        page = a10.asvr.db.announce.getLogEntries(lrs, cursor, ch, op)
+    except ValueError:
+        flash("Invalid log cursor, showing the latest entries")
+        cursor = None
+        page = a10.asvr.db.announce.getLogEntries(lrs, None, ch, op)
+
+    ls = page["entries"]
     for l in ls:
         l["tUTC"] = formatting.futc(l["t"])
 
     ts = a10.structures.timestamps.now()
     lc = a10.asvr.db.announce.getLogEntryCount()
-    if lrs > lc:
-        lrs = lc
 
     return render_template(
-        "log.html", ls=ls, lrs=lrs, lc=lc, lt=ts, ltutc=formatting.futc(ts),ref=ref
+        "log.html",
+        ls=ls,
+        lrs=lrs,
+        lc=lc,
+        lt=ts,
+        ltutc=formatting.futc(ts),
+        ref=ref,
+        cursor=cursor,
+        next=page["cursor"],
+        ch=ch,
+        op=op,
     )
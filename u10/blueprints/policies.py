@@ -31,10 +31,10 @@ def policies():
 def policy(item_id):
     p = a10.asvr.policies.getPolicy(item_id)
     evs = a10.asvr.expectedvalues.getExpectedValuesForPolicy(item_id)
+    es = a10.asvr.elements.getElementsByIds([i["elementID"] for i in evs], ["name"])
     for i in evs:
-        e = a10.asvr.elements.getElement(i["elementID"])
-        if e.rc() == a10.structures.constants.SUCCESS:
-            i["elementname"] = e.msg()["name"]
+        if i["elementID"] in es:
+            i["elementname"] = es[i["elementID"]]["name"]
         else:
             i["elementname"] = "ELEMENT DELETED"
     pp = json.dumps(p.msg(), sort_keys=True, indent=4)
@@ -28,20 +28,22 @@ results_blueprint.secret_key = secret
 def results():
     rs = a10.asvr.results.getResultsFull(500)
 
+    # The names for all the results in two queries
+    es = a10.asvr.elements.getElementsByIds([r["elementID"] for r in rs], ["name"])
+    ps = a10.asvr.policies.getPoliciesByIds([r["policyID"] for r in rs], ["name"])
+
     for r in rs:
         r["verifiedAtUTC"] = formatting.futc(r["verifiedAt"])
 
-        e = a10.asvr.elements.getElement(r["elementID"])
-        if e.rc() == a10.structures.constants.SUCCESS:
-            r["elementname"] = e.msg()["name"]
+        if r["elementID"] in es:
+            r["elementname"] = es[r["elementID"]]["name"]
         else:
             r["elementname"] = "ELEMENT DELETED"
 
-        p = a10.asvr.policies.getPolicy(r["policyID"])
-        if p.rc() == a10.structures.constants.SUCCESS:
-            r["policyname"] = p.msg()["name"]
+        if r["policyID"] in ps:
+            r["policyname"] = ps[r["policyID"]]["name"]
         else:
-            r["policyname"] = "ELEMENT DELETED"
+            r["policyname"] = "POLICY DELETED"
 
     return render_template("results.html", results=rs)
 
@@ -0,0 +1,27 @@
+#Copyright 2021 Nokia
+#Licensed under the BSD 3-Clause Clear License.
+#SPDX-License-Identifier: BSD-3-Clear
+
+#
+# Moves the results into the layout given by resultslayout in the [database] section of /etc/a10.conf,
+# eg: into a MongoDB time-series collection. Uses the database given in /etc/a10.conf
+#
+
+import sys
+import pprint
+
+import a10.asvr.db.configuration
+import a10.asvr.db.core
+
+batchsize = 1000
+if len(sys.argv) > 1:
+    batchsize = int(sys.argv[1])
+
+print("Migrating results to the", a10.asvr.db.configuration.RESULTSLAYOUT, "layout in batches of", batchsize)
+try:
+    r = a10.asvr.db.core.migrateResultsLayout(batchsize)
+except NotImplementedError:
+    print("The", a10.asvr.db.configuration.DATABASEBACKEND, "backend has only one layout for results")
+    sys.exit(1)
+print("Migration complete")
+pprint.pprint(r, indent=4)
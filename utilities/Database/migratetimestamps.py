@@ -0,0 +1,22 @@
+#Copyright 2021 Nokia
+#Licensed under the BSD 3-Clause Clear License.
+#SPDX-License-Identifier: BSD-3-Clear
+
+#
+# Converts timestamps stored as strings by earlier versions of A10 into numbers
+# Uses the database given in /etc/a10.conf and may be run while A10 is running
+#
+
+import sys
+import pprint
+
+import a10.asvr.db.core
+
+batchsize = 1000
+if len(sys.argv) > 1:
+    batchsize = int(sys.argv[1])
+
+print("Migrating timestamps in batches of", batchsize)
+r = a10.asvr.db.core.migrateTimestamps(batchsize)
+print("Migration complete")
+pprint.pprint(r, indent=4)
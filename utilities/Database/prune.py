@@ -0,0 +1,19 @@
+#Copyright 2021 Nokia
+#Licensed under the BSD 3-Clause Clear License.
+#SPDX-License-Identifier: BSD-3-Clear
+
+#
+# Removes old log entries, claims and results according to the [retention] section of /etc/a10.conf
+# Uses the database given in /etc/a10.conf and may be run while A10 is running, eg: daily from cron
+#
+
+import pprint
+
+import a10.asvr.db.configuration
+import a10.asvr.db.core
+
+print("Pruning with retention settings")
+pprint.pprint(a10.asvr.db.configuration.RETENTION, indent=4)
+r = a10.asvr.db.core.pruneCollections()
+print("Pruning complete")
+pprint.pprint(r, indent=4)
@@ -0,0 +1,14 @@
+#Copyright 2021 Nokia
+#Licensed under the BSD 3-Clause Clear License.
+#SPDX-License-Identifier: BSD-3-Clear
+
+#
+# Fills in the element status, the latest result of each element and policy, from the results already in the
+# database, see a10.asvr.status. Uses the database given in /etc/a10.conf
+#
+
+import a10.asvr.db.core
+
+print("Rebuilding the element status")
+n = a10.asvr.db.core.rebuildElementStatus()
+print("Rebuild complete,", n, "element and policy pairs")